@@ -4,6 +4,12 @@ Setup configuration for the Unthread Data Extractor package
 
 from setuptools import setup, find_packages
 
+try:
+    with open("README.md", encoding="utf-8") as f:
+        long_description = f.read()
+except FileNotFoundError:
+    long_description = ""
+
 setup(
     name="unthread_extractor",
     version="0.1.0",
@@ -19,7 +25,7 @@ setup(
     author="Your Name",
     author_email="your.email@example.com",
     description="A tool to extract data from Unthread API and store it in DuckDB",
-    long_description=open("README.md").read(),
+    long_description=long_description,
     long_description_content_type="text/markdown",
     url="https://github.com/yourusername/unthread_extractor",
     classifiers=[
@@ -2,12 +2,30 @@
 Unthread Data Extractor - A tool to extract data from Unthread API and store it in DuckDB
 """
 
+import importlib
+
 __version__ = "0.1.0"
 
-from .api import UnthreadAPI
-from .storage import DuckDBStorage
-from .extractor import UnthreadExtractor
-from .config import Config
-from .updater import UnthreadUpdater
+# Public names and the submodules defining them; imported on first access (PEP 562)
+# so that e.g. `python -m unthread_extractor.bg_query` doesn't pull in every dependency
+_LAZY_IMPORTS = {
+    'UnthreadAPI': '.api',
+    'DuckDBStorage': '.storage',
+    'UnthreadExtractor': '.extractor',
+    'Config': '.config',
+    'UnthreadUpdater': '.updater',
+}
+
+__all__ = ['UnthreadAPI', 'DuckDBStorage', 'UnthreadExtractor', 'Config', 'UnthreadUpdater']
+
+
+def __getattr__(name):
+    if name in _LAZY_IMPORTS:
+        value = getattr(importlib.import_module(_LAZY_IMPORTS[name], __name__), name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 
-__all__ = ['UnthreadAPI', 'DuckDBStorage', 'UnthreadExtractor', 'Config', 'UnthreadUpdater'] 
\ No newline at end of file
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
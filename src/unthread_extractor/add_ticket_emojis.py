@@ -7,15 +7,30 @@ import sys
 import os
 import logging
 import argparse
-import time
-from typing import List, Dict, Any, Optional
+import itertools
+import uuid
+import zlib
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Any, Optional, Tuple
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 # Add the src directory to the Python path
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
 
 from unthread_extractor.storage import DuckDBStorage
 from unthread_extractor.config import Config
+from unthread_extractor.ratelimit import TokenBucket
+
+# Number of processed links buffered before they are written to DuckDB
+PROCESSED_LINKS_FLUSH_SIZE = 10000
+
+# Number of most recent failed links kept in memory for the run summary
+RECENT_FAILURES_SIZE = 200
+
+SLACK_LINK_TEMPLATE = "https://langchain.slack.com/app_redirect?channel={}&message_ts={}"
 
 class TicketEmojiAdder:
     """Class to add ticket emojis to Slack messages"""
@@ -31,6 +46,29 @@ class TicketEmojiAdder:
         self.production_mode = production_mode
         self.base_url = "https://langchain.slack.com/api"
         
+        # Persistent session so Slack calls reuse pooled keep-alive connections;
+        # it carries the auth headers for every request
+        self.session = requests.Session()
+        self.session.headers.update({
+            "Authorization": f"Bearer {slack_token}",
+            "Content-Type": "application/json"
+        })
+        # 429s are handled by _slack_request so the rate limiter sees the cooldown
+        retry = Retry(
+            total=5,
+            backoff_factor=0.5,
+            status_forcelist=[500, 502, 503, 504],
+            allowed_methods=frozenset(["GET", "POST"]),
+            respect_retry_after_header=True
+        )
+        self.session.mount("https://", HTTPAdapter(pool_connections=16, pool_maxsize=32, max_retries=retry))
+        
+        # Per-endpoint token buckets to stay under Slack's rate limits
+        self.limiter = {
+            endpoint: TokenBucket(1, 3)
+            for endpoint in ("reactions.add", "reactions.get", "conversations.history")
+        }
+        
         # Setup logging
         logging.basicConfig(
             level=logging.INFO,
@@ -40,70 +78,121 @@ class TicketEmojiAdder:
         self.logger = logging.getLogger(__name__)
         self.logger.setLevel(logging.INFO)
         
-        # Ensure immediate output
-        for handler in self.logger.handlers:
-            handler.flush = lambda: handler.stream.flush() if hasattr(handler, 'stream') else None
-        
         if production_mode:
             self.logger.info("Running in PRODUCTION MODE - API calls will be made")
         else:
             self.logger.info("Running in TEST MODE - no actual API calls will be made")
     
-    def get_open_slack_tickets(self, storage: DuckDBStorage, batch_size: int = 100, offset: int = 0) -> List[Dict[str, Any]]:
-        """Get open tickets from Slack source
+    def _slack_request(self, method: str, endpoint: str, max_attempts: int = 3, **kwargs) -> requests.Response:
+        """Make a rate-limited Slack API request
+        
+        Acquires a token for the endpoint before each attempt. When Slack answers
+        429, the endpoint is blocked for the Retry-After period and the call is
+        retried.
+        
+        Args:
+            method: HTTP method (GET, POST)
+            endpoint: Slack API method name (e.g. reactions.get)
+            max_attempts: Maximum number of attempts when throttled
+            **kwargs: Extra arguments passed to the session request
+            
+        Returns:
+            The final response
+        """
+        url = f"{self.base_url}/{endpoint}"
+        limiter = self.limiter[endpoint]
+        
+        for attempt in range(max_attempts):
+            limiter.acquire()
+            response = self.session.request(method, url, timeout=10, **kwargs)
+            
+            if response.status_code != 429 or attempt == max_attempts - 1:
+                return response
+            
+            retry_after = float(response.headers.get("Retry-After", 1))
+            self.logger.warning(f"Rate limited on {endpoint}, retrying in {retry_after:g}s (attempt {attempt + 1}/{max_attempts})")
+            limiter.block(retry_after)
+        
+        return response
+    
+    def get_open_slack_tickets(self, storage: DuckDBStorage, batch_size: int = 100, after: Optional[Tuple[str, str]] = None, emoji: str = "ticket", source: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Get open tickets from Slack source that don't have the emoji yet
+        
+        Messages already recorded in the message_reactions table are skipped.
+        Tickets are returned newest first and paginated by keyset: pass the
+        (created_at, conversation_id) of the last ticket of the previous batch.
         
         Args:
             storage: Database storage instance
             batch_size: Number of tickets to retrieve
-            offset: Offset for pagination
+            after: Keyset cursor from the previous batch (None for the first batch)
+            emoji: Emoji name (without colons) the tickets should receive
+            source: Alias of an attached database to read conversations from
+                (None to use the storage's own conversations table)
             
         Returns:
             List of ticket data dictionaries
         """
+        # Filter on materialized columns, then extract the remaining fields with a
+        # single list-path call so each JSON blob is parsed once
         query = """
             SELECT 
                 c.id as conversation_id,
-                json_extract_string(c.data, 'sourceType') as source_type,
-                json_extract_string(c.data, 'status') as status,
-                json_extract_string(c.data, 'title') as title,
-                json_extract_string(c.data, 'summary') as summary,
-                json_extract_string(c.data, 'createdAt') as created_at,
-                json_extract_string(c.data, 'updatedAt') as updated_at,
-                json_extract_string(c.data, 'initialMessageId') as initial_message_id,
-                json_extract_string(c.data, 'channelId') as channel_id,
-                -- Extract Slack channel ID and timestamp from Slack ticket structure
-                json_extract_string(c.data, 'channelId') as slack_channel_id,
-                json_extract_string(c.data, '$.initialMessage.ts') as slack_timestamp
-            FROM conversations c
-            WHERE json_extract_string(c.data, 'sourceType') = 'slack'
-                AND json_extract_string(c.data, 'status') != 'closed'
-                AND json_extract_string(c.data, 'channelId') IS NOT NULL
-                AND json_extract_string(c.data, '$.initialMessage.ts') IS NOT NULL
-            ORDER BY json_extract_string(c.data, 'createdAt') DESC
-            LIMIT ? OFFSET ?
+                c.source_type,
+                c.status,
+                c.je[1] as title,
+                c.je[2] as summary,
+                c.created_at,
+                c.je[3] as updated_at,
+                c.je[4] as initial_message_id,
+                c.je[5] as channel_id,
+                -- Slack channel ID and timestamp from Slack ticket structure
+                c.je[5] as slack_channel_id,
+                c.je[6] as slack_timestamp
+            FROM (
+                SELECT
+                    id,
+                    source_type,
+                    status,
+                    created_at,
+                    json_extract_string(data, [
+                        '$.title', '$.summary', '$.updatedAt', '$.initialMessageId',
+                        '$.channelId', '$.initialMessage.ts'
+                    ]) as je
+                FROM {conversations_table}
+                -- Filter on the materialized columns before touching the JSON
+                WHERE source_type = 'slack'
+                    AND status != 'closed'
+            ) c
+                LEFT JOIN message_reactions r
+                    ON r.channel_id = c.je[5]
+                    AND r.ts = c.je[6]
+                    AND r.emoji = ?
+            WHERE c.je[5] IS NOT NULL
+                AND c.je[6] IS NOT NULL
+                AND r.ts IS NULL
+                {keyset_filter}
+            ORDER BY COALESCE(c.created_at, '') DESC, c.id DESC
+            LIMIT ?
         """
+        params = [emoji]
+        if after:
+            keyset_filter = "AND (COALESCE(c.created_at, ''), c.id) < (?, ?)"
+            params.extend(after)
+        else:
+            keyset_filter = ""
+        conversations_table = f"{source}.conversations" if source else "conversations"
+        query = query.format(keyset_filter=keyset_filter, conversations_table=conversations_table)
+        params.append(batch_size)
         
         try:
-            results = storage.conn.execute(query, [batch_size, offset]).fetchall()
-            tickets = []
-            
-            for row in results:
-                ticket = {
-                    'conversation_id': row[0],
-                    'source_type': row[1],
-                    'status': row[2],
-                    'title': row[3],
-                    'summary': row[4],
-                    'created_at': row[5],
-                    'updated_at': row[6],
-                    'initial_message_id': row[7],
-                    'channel_id': row[8],
-                    'slack_channel_id': row[9],  # Same as channel_id
-                    'slack_timestamp': row[10]  # Direct from initialMessage.ts
-                }
-                tickets.append(ticket)
+            # Fetch column-wise; masked (NULL) cells come back as None from tolist()
+            columns = storage.conn.execute(query, params).fetchnumpy()
+            cols = {name: values.tolist() for name, values in columns.items()}
+            num_rows = len(cols['conversation_id'])
+            tickets = [{name: cols[name][i] for name in cols} for i in range(num_rows)]
             
-            self.logger.info(f"Retrieved {len(tickets)} open Slack tickets (batch_size={batch_size}, offset={offset})")
+            self.logger.info(f"Retrieved {len(tickets)} open Slack tickets (batch_size={batch_size}, after={after})")
             return tickets
             
         except Exception as e:
@@ -120,16 +209,16 @@ class TicketEmojiAdder:
         Returns:
             Slack link string
         """
-        # Convert timestamp to proper format for Slack link
-        # Slack timestamps are in seconds, but we need to ensure proper formatting
-        try:
-            # If timestamp is a float/string, convert to proper format
-            ts = float(timestamp)
-            formatted_ts = f"{ts:.6f}".rstrip('0').rstrip('.')
-        except (ValueError, TypeError):
-            formatted_ts = str(timestamp)
+        # Slack timestamps from the database are already "seconds.micros" strings
+        if isinstance(timestamp, str) and "." in timestamp:
+            formatted_ts = timestamp
+        else:
+            try:
+                formatted_ts = format(float(timestamp), ".6f").rstrip('0').rstrip('.')
+            except (ValueError, TypeError):
+                formatted_ts = str(timestamp)
         
-        return f"https://langchain.slack.com/app_redirect?channel={channel_id}&message_ts={formatted_ts}"
+        return SLACK_LINK_TEMPLATE.format(channel_id, formatted_ts)
 
     def debug_message_reactions(self, channel_id: str, timestamp: str) -> Dict[str, Any]:
         """Debug method to get detailed information about a message's reactions
@@ -141,18 +230,11 @@ class TicketEmojiAdder:
         Returns:
             Dictionary with debug information
         """
-        url = f"{self.base_url}/reactions.get"
-        
         params = {
             "channel": channel_id,
             "timestamp": timestamp
         }
         
-        headers = {
-            "Authorization": f"Bearer {self.slack_token}",
-            "Content-Type": "application/json"
-        }
-        
         debug_info = {
             "channel_id": channel_id,
             "timestamp": timestamp,
@@ -164,7 +246,7 @@ class TicketEmojiAdder:
         }
         
         try:
-            response = requests.get(url, params=params, headers=headers, timeout=10)
+            response = self._slack_request("GET", "reactions.get", params=params)
             
             if response.status_code == 200:
                 data = response.json()
@@ -200,31 +282,23 @@ class TicketEmojiAdder:
         Returns:
             True if emoji exists, False otherwise
         """
-        url = f"{self.base_url}/reactions.get"
-        
         params = {
             "channel": channel_id,
             "timestamp": timestamp
         }
         
-        headers = {
-            "Authorization": f"Bearer {self.slack_token}",
-            "Content-Type": "application/json"
-        }
-        
         if not self.production_mode:
             self.logger.info(f"[TEST] Would check if :{emoji}: exists on message {timestamp} in channel {channel_id}")
             # In test mode, simulate that some messages already have emojis (for testing skip logic)
             # Use timestamp as a simple way to simulate some messages having emojis
-            import hashlib
-            hash_value = int(hashlib.md5(f"{channel_id}{timestamp}".encode()).hexdigest(), 16)
-            has_emoji = (hash_value % 10) < 3  # 30% chance of having emoji in test mode
+            # crc32 is cheap and, unlike hash(), stable across runs
+            has_emoji = (zlib.crc32(f"{channel_id}{timestamp}".encode()) % 10) < 3  # 30% chance of having emoji in test mode
             if has_emoji:
                 self.logger.info(f"[TEST] Simulating existing :{emoji}: on message {timestamp}")
             return has_emoji
         
         try:
-            response = requests.get(url, params=params, headers=headers, timeout=10)
+            response = self._slack_request("GET", "reactions.get", params=params)
             
             if response.status_code == 200:
                 data = response.json()
@@ -234,14 +308,14 @@ class TicketEmojiAdder:
                     
                     # Debug: Log all reactions found
                     if reactions:
-                        self.logger.debug(f"Found {len(reactions)} reactions on message {timestamp}: {[r.get('name') for r in reactions]}")
+                        self.logger.debug("Found %s reactions on message %s: %s", len(reactions), timestamp, [r.get('name') for r in reactions])
                     else:
-                        self.logger.debug(f"No reactions found on message {timestamp}")
+                        self.logger.debug("No reactions found on message %s", timestamp)
                     
                     # Check if any reaction has the ticket emoji name
                     for reaction in reactions:
                         if reaction.get("name") == emoji:
-                            self.logger.debug(f"Found existing :{emoji}: reaction on message {timestamp}")
+                            self.logger.debug("Found existing :%s: reaction on message %s", emoji, timestamp)
                             return True
                     
                     return False
@@ -256,13 +330,101 @@ class TicketEmojiAdder:
             # Don't log exceptions here as they're expected
             return False
 
-    def add_ticket_emoji(self, channel_id: str, timestamp: str, emoji: str = "ticket") -> bool:
+    def get_channel_reactions(self, channel_id: str, timestamps: List[str]) -> Optional[Dict[str, List[str]]]:
+        """Get reactions for several messages in a channel with conversations.history
+        
+        A single window from the oldest to the newest timestamp is fetched so one
+        API call returns the reactions of many ticket messages at once.
+        
+        Args:
+            channel_id: Slack channel ID
+            timestamps: Slack message timestamps to look up
+            
+        Returns:
+            Dictionary mapping message timestamp to its reaction names, or None
+            if the channel history could not be fetched
+        """
+        if not self.production_mode:
+            # Test mode keeps simulating reactions per message in has_ticket_emoji
+            return None
+        
+        wanted = set(timestamps)
+        params = {
+            "channel": channel_id,
+            "oldest": min(wanted, key=float),
+            "latest": max(wanted, key=float),
+            "inclusive": "true",
+            "limit": 200
+        }
+        
+        reactions = {}
+        page_count = 0
+        
+        try:
+            while True:
+                page_count += 1
+                response = self._slack_request("GET", "conversations.history", params=params)
+                
+                if response.status_code != 200:
+                    self.logger.debug("conversations.history failed for channel %s: HTTP %s", channel_id, response.status_code)
+                    return None
+                
+                data = response.json()
+                if not data.get("ok"):
+                    self.logger.debug("conversations.history failed for channel %s: %s", channel_id, data.get('error', 'Unknown error'))
+                    return None
+                
+                for message in data.get("messages", []):
+                    ts = message.get("ts")
+                    if ts in wanted:
+                        reactions[ts] = [r.get("name") for r in message.get("reactions", [])]
+                
+                cursor = data.get("response_metadata", {}).get("next_cursor")
+                if not data.get("has_more") or not cursor or len(reactions) == len(wanted):
+                    break
+                params["cursor"] = cursor
+                
+        except requests.exceptions.RequestException as e:
+            self.logger.debug("conversations.history request failed for channel %s: %s", channel_id, str(e))
+            return None
+        
+        self.logger.debug("Fetched reactions for %s/%s messages in channel %s (%s pages)", len(reactions), len(wanted), channel_id, page_count)
+        return reactions
+    
+    def get_batch_reactions(self, tickets: List[Dict[str, Any]]) -> Dict[tuple, List[str]]:
+        """Get reactions for a batch of tickets, one history fetch per channel
+        
+        Args:
+            tickets: List of ticket data dictionaries
+            
+        Returns:
+            Dictionary mapping (channel_id, timestamp) to reaction names. Messages
+            missing from the result must be checked individually.
+        """
+        batch_reactions = {}
+        
+        valid_tickets = [t for t in tickets if t['slack_channel_id'] and t['slack_timestamp']]
+        valid_tickets.sort(key=lambda t: t['slack_channel_id'])
+        
+        for channel_id, channel_tickets in itertools.groupby(valid_tickets, key=lambda t: t['slack_channel_id']):
+            timestamps = [t['slack_timestamp'] for t in channel_tickets]
+            channel_reactions = self.get_channel_reactions(channel_id, timestamps)
+            if not channel_reactions:
+                continue
+            for ts, names in channel_reactions.items():
+                batch_reactions[(channel_id, ts)] = names
+        
+        return batch_reactions
+
+    def add_ticket_emoji(self, channel_id: str, timestamp: str, emoji: str = "ticket", reactions: Optional[List[str]] = None) -> bool:
         """Add a ticket emoji to a Slack message (only if it doesn't already exist)
         
         Args:
             channel_id: Slack channel ID
             timestamp: Slack message timestamp
             emoji: Emoji name (without colons)
+            reactions: Reaction names already known for the message; when given,
+                the reactions.get probe is skipped
             
         Returns:
             True if successful or already exists, False otherwise
@@ -271,46 +433,33 @@ class TicketEmojiAdder:
         slack_link = self.generate_slack_link(channel_id, timestamp)
         
         # Check if emoji already exists
-        if self.has_ticket_emoji(channel_id, timestamp, emoji):
+        if reactions is not None:
+            already_exists = emoji in reactions
+        else:
+            already_exists = self.has_ticket_emoji(channel_id, timestamp, emoji)
+        
+        if already_exists:
             self.logger.info(f"⏭️  Skipped (already has :{emoji}:) | 🔗 Slack Link: {slack_link}")
-            sys.stdout.flush()  # Ensure immediate output
             return True
         
-        url = f"{self.base_url}/reactions.add"
-        
         payload = {
             "channel": channel_id,
             "timestamp": timestamp,
             "name": emoji
         }
         
-        headers = {
-            "Authorization": f"Bearer {self.slack_token}",
-            "Content-Type": "application/json"
-        }
-        
         if not self.production_mode:
             self.logger.info(f"[TEST] Would add :{emoji}: to message {timestamp} in channel {channel_id}")
             self.logger.info(f"🔗 Slack Link: {slack_link}")
             return True
         
         try:
-            response = requests.post(url, json=payload, headers=headers, timeout=10)
+            response = self._slack_request("POST", "reactions.add", json=payload)
             
             if response.status_code == 200:
                 data = response.json()
                 if data.get("ok"):
                     self.logger.info(f"✅ Added :{emoji}: to message | 🔗 Slack Link: {slack_link}")
-                    sys.stdout.flush()  # Ensure immediate output
-                    
-                    # Verify the emoji was actually added by checking again
-                    if self.production_mode:
-                        time.sleep(1)  # Wait a moment for Slack to process
-                        if self.has_ticket_emoji(channel_id, timestamp, emoji):
-                            self.logger.debug(f"Verified :{emoji}: was successfully added to message {timestamp}")
-                        else:
-                            self.logger.warning(f"API said :{emoji}: was added but verification failed for message {timestamp}")
-                    
                     return True
                 else:
                     error = data.get('error', 'Unknown error')
@@ -318,7 +467,6 @@ class TicketEmojiAdder:
                     # If the error is "already_reacted", treat it as success (emoji already exists)
                     if error == "already_reacted":
                         self.logger.info(f"⏭️  Skipped (already has :{emoji}:) | 🔗 Slack Link: {slack_link}")
-                        sys.stdout.flush()  # Ensure immediate output
                         return True
                     else:
                         self.logger.error(f"❌ Failed to add :{emoji}: to message | 🔗 Slack Link: {slack_link} | Error: {error}")
@@ -331,100 +479,159 @@ class TicketEmojiAdder:
             self.logger.error(f"❌ Request exception for message | 🔗 Slack Link: {slack_link} | Error: {str(e)}")
             return False
     
-    def process_tickets(self, storage: DuckDBStorage, batch_size: int = 100, max_tickets: Optional[int] = None) -> Dict[str, Any]:
+    def _process_ticket(self, ticket: Dict[str, Any], batch_reactions: Dict[tuple, List[str]]) -> Dict[str, Any]:
+        """Add the ticket emoji for a single ticket (thread-safe)
+        
+        Args:
+            ticket: Ticket data dictionary with Slack channel and timestamp
+            batch_reactions: Prefetched reactions keyed by (channel_id, timestamp)
+            
+        Returns:
+            Dictionary with the Slack link and whether the emoji was added
+        """
+        channel_id = ticket['slack_channel_id']
+        timestamp = ticket['slack_timestamp']
+        
+        success = self.add_ticket_emoji(
+            channel_id,
+            timestamp,
+            reactions=batch_reactions.get((channel_id, timestamp))
+        )
+        
+        return {
+            'link': self.generate_slack_link(channel_id, timestamp),
+            'success': success,
+            'title': ticket.get('title', 'No title'),
+            'conversation_id': ticket['conversation_id']
+        }
+    
+    def process_tickets(self, storage: DuckDBStorage, batch_size: int = 100, max_tickets: Optional[int] = None, max_workers: int = 5, source: Optional[str] = None) -> Dict[str, Any]:
         """Process tickets and add emojis
         
         Args:
             storage: Database storage instance
             batch_size: Number of tickets to process per batch
             max_tickets: Maximum number of tickets to process (None for all)
+            max_workers: Maximum number of concurrent Slack API calls
+            source: Alias of an attached database to read conversations from
             
         Returns:
-            Dictionary with processing results
+            Dictionary with processing results; the processed links are stored
+            in the processed_links table under the returned run_id
         """
-        offset = 0
+        cursor = None
         total_processed = 0
         total_successful = 0
         total_failed = 0
-        processed_links = []  # Store all processed Slack links
-        
-        while True:
-            # Get batch of tickets
-            tickets = self.get_open_slack_tickets(storage, batch_size, offset)
-            
-            if not tickets:
-                self.logger.info("No more tickets to process")
-                break
-            
-            self.logger.debug(f"Processing batch of {len(tickets)} tickets (offset={offset})")
-            
-            for ticket in tickets:
-                if max_tickets and total_processed >= max_tickets:
-                    self.logger.debug(f"Reached maximum tickets limit ({max_tickets})")
+        run_id = uuid.uuid4().hex
+        links_buffer = deque()  # Processed Slack links not yet written to the database
+        links_count = 0
+        recent_failures = deque(maxlen=RECENT_FAILURES_SIZE)  # Tail of failed links for the summary
+        
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            while True:
+                # Get batch of tickets
+                tickets = self.get_open_slack_tickets(storage, batch_size, cursor, source=source)
+                
+                if not tickets:
+                    self.logger.info("No more tickets to process")
                     break
                 
-                total_processed += 1
+                self.logger.debug("Processing batch of %s tickets (after=%s)", len(tickets), cursor)
                 
-                # Check if we have required Slack data
-                if not ticket['slack_channel_id'] or not ticket['slack_timestamp']:
-                    self.logger.warning(f"Missing Slack data for ticket {ticket['conversation_id']}: channel_id={ticket['slack_channel_id']}, timestamp={ticket['slack_timestamp']}")
-                    total_failed += 1
-                    continue
+                pending = []
+                seen_messages = set()
+                for ticket in tickets:
+                    if max_tickets and total_processed >= max_tickets:
+                        self.logger.debug("Reached maximum tickets limit (%s)", max_tickets)
+                        break
+                    
+                    # Several conversations can point at the same Slack message; only react once
+                    message = (ticket['slack_channel_id'], ticket['slack_timestamp'])
+                    if message in seen_messages:
+                        self.logger.debug("Skipping ticket %s: message %s in channel %s already queued", ticket['conversation_id'], message[1], message[0])
+                        continue
+                    seen_messages.add(message)
+                    
+                    total_processed += 1
+                    
+                    # Check if we have required Slack data
+                    if not ticket['slack_channel_id'] or not ticket['slack_timestamp']:
+                        self.logger.warning(f"Missing Slack data for ticket {ticket['conversation_id']}: channel_id={ticket['slack_channel_id']}, timestamp={ticket['slack_timestamp']}")
+                        total_failed += 1
+                        continue
+                    
+                    pending.append(ticket)
                 
-                # Generate Slack link for this ticket
-                slack_link = self.generate_slack_link(ticket['slack_channel_id'], ticket['slack_timestamp'])
+                # Group by channel so reaction prefetches and Slack calls stay channel-local
+                pending.sort(key=lambda t: t['slack_channel_id'])
                 
-                # Add ticket emoji
-                success = self.add_ticket_emoji(
-                    ticket['slack_channel_id'],
-                    ticket['slack_timestamp']
-                )
+                # Prefetch reactions per channel instead of probing each message
+                batch_reactions = self.get_batch_reactions(pending)
                 
-                # Store link with status for summary
-                processed_links.append({
-                    'link': slack_link,
-                    'success': success,
-                    'title': ticket.get('title', 'No title'),
-                    'conversation_id': ticket['conversation_id']
-                })
+                # Add ticket emojis concurrently; map keeps the ticket order for the summary
+                reacted = []
+                for ticket, link_info in zip(pending, executor.map(lambda t: self._process_ticket(t, batch_reactions), pending)):
+                    links_count += 1
+                    link_info['position'] = links_count
+                    links_buffer.append(link_info)
+                    
+                    if link_info['success']:
+                        total_successful += 1
+                        reacted.append((ticket['slack_channel_id'], ticket['slack_timestamp']))
+                    else:
+                        total_failed += 1
+                        recent_failures.append(link_info)
                 
-                if success:
-                    total_successful += 1
-                else:
-                    total_failed += 1
+                if len(links_buffer) >= PROCESSED_LINKS_FLUSH_SIZE:
+                    storage.store_processed_links(run_id, list(links_buffer))
+                    links_buffer.clear()
+                    self.logger.info(f"Progress: {links_count} threads processed, {total_successful} successful, {total_failed} failed")
                 
-                # Add small delay to avoid rate limiting
-                if not self.production_mode:
-                    time.sleep(0.1)
-            
-            if max_tickets and total_processed >= max_tickets:
-                break
-            
-            offset += batch_size
-            
-            # If we got fewer tickets than batch_size, we've reached the end
-            if len(tickets) < batch_size:
-                break
+                # Remember messages that now carry the emoji so reruns skip them in SQL
+                # (test mode only simulates reactions, so nothing is recorded)
+                if self.production_mode:
+                    storage.store_message_reactions(reacted, "ticket")
+                
+                if max_tickets and total_processed >= max_tickets:
+                    break
+                
+                # Continue after the last ticket of this batch
+                last = tickets[-1]
+                cursor = (last['created_at'] or '', last['conversation_id'])
+                
+                # If we got fewer tickets than batch_size, we've reached the end
+                if len(tickets) < batch_size:
+                    break
+        
+        storage.store_processed_links(run_id, list(links_buffer))
+        links_buffer.clear()
         
         # Log summary of all processed links
         self.logger.info(f"\n=== Summary ===")
-        self.logger.debug(f"Total threads processed: {len(processed_links)}")
+        self.logger.debug("Total threads processed: %s", links_count)
         self.logger.info(f"Successful: {total_successful}, Failed: {total_failed}")
-        self.logger.debug(f"Success rate: {(total_successful / len(processed_links) * 100) if processed_links else 0:.1f}%")
+        self.logger.debug("Success rate: %.1f%%", total_successful / links_count * 100 if links_count else 0)
+        
+        # Show every processed thread in debug mode, otherwise only the most recent failures
+        if self.logger.isEnabledFor(logging.DEBUG):
+            self.logger.debug("\nAll processed threads:")
+            summary_links = storage.iter_processed_links(run_id)
+        else:
+            if recent_failures:
+                self.logger.info(f"\nLast {len(recent_failures)} failed threads:")
+            summary_links = recent_failures
         
-        # Only show detailed list if there are failures or in debug mode
-        if total_failed > 0 or self.logger.isEnabledFor(logging.DEBUG):
-            self.logger.debug(f"\nAll processed threads:")
-            for i, link_info in enumerate(processed_links, 1):
-                status_emoji = "✅" if link_info['success'] else "❌"
-                self.logger.info(f"{i:3d}. {status_emoji} {link_info['link']} | {link_info['title'][:50]}...")
+        for link_info in summary_links:
+            status_emoji = "✅" if link_info['success'] else "❌"
+            self.logger.info(f"{link_info['position']:3d}. {status_emoji} {link_info['link']} | {(link_info['title'] or 'No title')[:50]}...")
         
         results = {
             'total_processed': total_processed,
             'total_successful': total_successful,
             'total_failed': total_failed,
             'success_rate': (total_successful / total_processed * 100) if total_processed > 0 else 0,
-            'processed_links': processed_links
+            'run_id': run_id
         }
         
         return results
@@ -435,7 +642,9 @@ def main():
     parser.add_argument("--mode", type=str, default="test", help="Run in test or production mode")
     parser.add_argument("--batch-size", type=int, default=50, help="Number of tickets to process per batch (default: 50)")
     parser.add_argument("--max-tickets", type=int, help="Maximum number of tickets to process (default: all)")
+    parser.add_argument("--max-workers", type=int, default=5, help="Maximum number of concurrent Slack API calls (default: 5)")
     parser.add_argument("--db-path", help="Path to DuckDB database (default: from config)")
+    parser.add_argument("--source-db", help="Read conversations in place from this DuckDB file (attached read-only) instead of --db-path")
     
     args = parser.parse_args()
     
@@ -449,6 +658,10 @@ def main():
         config = Config.from_env()
         db_path = args.db_path or config.db_path
         storage = DuckDBStorage(db_path)
+        source = None
+        if args.source_db:
+            storage.attach(args.source_db, "src")
+            source = "src"
         
         # Create emoji adder
         emoji_adder = TicketEmojiAdder(slack_token, production_mode=args.mode == "prod")
@@ -457,7 +670,9 @@ def main():
         results = emoji_adder.process_tickets(
             storage=storage,
             batch_size=args.batch_size,
-            max_tickets=args.max_tickets
+            max_tickets=args.max_tickets,
+            max_workers=args.max_workers,
+            source=source
         )
         
         # No need for duplicate summary since it's already shown above
@@ -4,22 +4,70 @@ API client for Unthread
 
 import requests
 import logging
+import threading
 from typing import Optional, Dict, Any, Tuple, List
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from .ratelimit import TokenBucket
 
 logger = logging.getLogger(__name__)
 
+SUPPORTED_METHODS = frozenset(["GET", "POST", "PATCH"])
+
+# Seconds to wait for the server before giving up on a request
+REQUEST_TIMEOUT = 30
+
+# Conversation IDs filtered per /conversations/list request in get_conversations_bulk
+BULK_CONVERSATION_IDS = 100
+
 class UnthreadAPI:
     """API client for Unthread"""
     
-    def __init__(self, api_key: str, base_url: str):
-        """Initialize API client"""
+    def __init__(self, api_key: str, base_url: str, max_retries: int = 3, rate_limit: Optional[float] = None):
+        """Initialize API client
+        
+        Args:
+            api_key: Unthread API key
+            base_url: Base URL of the Unthread API
+            max_retries: Maximum number of retries for failed or throttled requests
+            rate_limit: Maximum requests per second across all threads using this client (None: unlimited)
+        """
         self.api_key = api_key
         self.base_url = base_url
+        self.max_retries = max_retries
         self.headers = {
             "X-Api-Key": f"{api_key}",
             "Content-Type": "application/json"
         }
-        logger.debug(f"Initialized UnthreadAPI with base_url: {base_url}")
+        
+        # Persistent session so connections are kept alive and pooled across requests
+        self.session = requests.Session()
+        self.session.headers.update(self.headers)
+        retry = Retry(
+            total=max_retries,
+            backoff_factor=0.5,
+            status_forcelist=[429, 500, 502, 503, 504],
+            allowed_methods=SUPPORTED_METHODS,
+            respect_retry_after_header=True
+        )
+        adapter = HTTPAdapter(pool_connections=16, pool_maxsize=32, max_retries=retry)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        
+        # Shared by every thread using the client, so parallel workers together
+        # stay under the rate instead of each being throttled separately
+        self.limiter = TokenBucket(rate_limit, max(1, int(rate_limit))) if rate_limit else None
+        
+        # Number of requests that were answered 429 at least once (retries included)
+        self.throttled_requests = 0
+        self._throttled_lock = threading.Lock()
+        logger.debug("Initialized UnthreadAPI with base_url: %s", base_url)
+    
+    def _record_throttled(self):
+        """Count a request the server throttled"""
+        with self._throttled_lock:
+            self.throttled_requests += 1
     
     def make_api_request(
         self,
@@ -27,17 +75,17 @@ class UnthreadAPI:
         method: str = "GET",
         data: Optional[Dict[str, Any]] = None,
         params: Optional[Dict[str, Any]] = None,
-        max_retries: int = 3,
         cursor: Optional[str] = None
     ) -> Tuple[List[Dict[str, Any]], Optional[str], bool]:
         """Make an API request with cursor-based pagination support
         
+        Retries with backoff are handled by the session's HTTP adapter.
+        
         Args:
             endpoint: API endpoint to call
             method: HTTP method (GET, POST, etc.)
             data: Request body data
             params: URL query parameters
-            max_retries: Maximum number of retry attempts
             cursor: Pagination cursor
             
         Returns:
@@ -47,72 +95,95 @@ class UnthreadAPI:
             - Whether there are more items to fetch
         """
         url = f"{self.base_url}{endpoint}"
-        logger.debug(f"Making {method} request to {url}")
+        logger.debug("Making %s request to %s", method, url)
         if data:
-            logger.debug(f"Request data: {data}")
+            logger.debug("Request data: %s", data)
         
-        # Add cursor to request data if provided
+        # Add cursor to a copy of the request data, so callers can reuse one body for every page
         if cursor and data is not None:
-            data["cursor"] = cursor
-            logger.debug(f"Using cursor: {cursor}")
+            data = {**data, "cursor": cursor}
+            logger.debug("Using cursor: %s", cursor)
         
-        for attempt in range(max_retries):
-            try:
-                logger.debug(f"Request attempt {attempt + 1}/{max_retries}")
-                if method == "GET":
-                    response = requests.get(
-                        url=url,
-                        headers=self.headers,
-                        params=params
-                    )
-                elif method == "PATCH":
-                    response = requests.patch(
-                        url=url,
-                        headers=self.headers,
-                        json=data,
-                        params=params
-                    )
-                elif method == "POST":
-                    response = requests.post(
-                        url=url,
-                        headers=self.headers,
-                        json=data,
-                        params=params
-                    )
-                else:
-                    raise ValueError(f"Unsupported HTTP method: {method}")
-                
-                # Log response details for debugging
-                logger.debug(f"Response status code: {response.status_code}")
-                logger.debug(f"Response headers: {dict(response.headers)}")
-                                
-                response.raise_for_status()
+        try:
+            if method not in SUPPORTED_METHODS:
+                raise ValueError(f"Unsupported HTTP method: {method}")
+            
+            if self.limiter is not None:
+                self.limiter.acquire()
+            
+            # Headers are set on the session; GET requests carry no body
+            response = self.session.request(
+                method,
+                url,
+                json=data if method != "GET" else None,
+                params=params,
+                timeout=REQUEST_TIMEOUT
+            )
+            
+            # Log response details for debugging
+            logger.debug("Response status code: %s", response.status_code)
+            logger.debug("Response headers: %s", response.headers)
+            
+            # The adapter retries 429s itself; its retry history still shows them
+            retries = getattr(response.raw, "retries", None)
+            if retries is not None and any(attempt.status == 429 for attempt in retries.history):
+                self._record_throttled()
+                            
+            response.raise_for_status()
+        except requests.exceptions.RequestException as e:
+            if isinstance(e, requests.exceptions.RetryError):
+                # Retries ran out on 429/5xx answers: the server is overloaded
+                self._record_throttled()
+            error_msg = f"API request failed after {self.max_retries} retries: {str(e)}"
+            if hasattr(e.response, 'text'):
+                error_msg += f"\nResponse: {e.response.text}"
+            logger.error(error_msg)
+            raise Exception(error_msg)
 
-                if method == "GET" or method == "PATCH":
-                    return response.json(), None, False
+        if method == "GET" or method == "PATCH":
+            return response.json(), None, False
 
-                try:
-                    response_data = response.json()
-                    logger.debug(f"Response data: {response_data}")
-                except ValueError as e:
-                    logger.error(f"Failed to parse JSON response: {response.text}")
-                    raise Exception(f"Invalid JSON response: {str(e)}")
-                
-                # Extract data and pagination info
-                items = response_data.get("data", [])
-                response_metadata = response_data.get('cursors', {})
-                next_cursor = response_metadata.get('next')
-                has_next = response_metadata.get('hasNext', False)
-                
-                logger.debug(f"Received {len(items)} items, has_next: {has_next}")
-                return items, next_cursor, has_next
-                
-            except requests.exceptions.RequestException as e:
-                if attempt == max_retries - 1:
-                    error_msg = f"API request failed after {max_retries} attempts: {str(e)}"
-                    if hasattr(e.response, 'text'):
-                        error_msg += f"\nResponse: {e.response.text}"
-                    logger.error(error_msg)
-                    raise Exception(error_msg)
-                logger.warning(f"API request failed (attempt {attempt + 1}/{max_retries}): {str(e)}")
-                continue 
\ No newline at end of file
+        try:
+            response_data = response.json()
+            logger.debug("Response data: %s", response_data)
+        except ValueError as e:
+            logger.error(f"Failed to parse JSON response: {response.text}")
+            raise Exception(f"Invalid JSON response: {str(e)}")
+        
+        # Extract data and pagination info
+        items = response_data.get("data", [])
+        response_metadata = response_data.get('cursors', {})
+        next_cursor = response_metadata.get('next')
+        has_next = response_metadata.get('hasNext', False)
+        
+        logger.debug("Received %s items, has_next: %s", len(items), has_next)
+        return items, next_cursor, has_next
+    
+    def get_conversations_bulk(self, conversation_ids: List[str], page_size: int = 200) -> Dict[str, Dict[str, Any]]:
+        """Fetch several conversations through the list endpoint
+        
+        IDs are sent BULK_CONVERSATION_IDS at a time as an "in" filter, so a
+        few paged list requests replace one GET per conversation.
+        
+        Args:
+            conversation_ids: IDs of the conversations to fetch
+            page_size: Conversations per list page
+            
+        Returns:
+            Dictionary mapping conversation ID to its listed data (IDs not found are left out)
+        """
+        conversations = {}
+        for i in range(0, len(conversation_ids), BULK_CONVERSATION_IDS):
+            data = {
+                "where": [{"field": "id", "operator": "in", "value": conversation_ids[i:i + BULK_CONVERSATION_IDS]}],
+                "limit": page_size
+            }
+            cursor = None
+            while True:
+                items, cursor, has_next = self.make_api_request("/conversations/list", method="POST", data=data, cursor=cursor)
+                for item in items:
+                    conversations[item["id"]] = item
+                if not has_next or not cursor:
+                    break
+        logger.debug("Fetched %s of %s conversations in bulk", len(conversations), len(conversation_ids))
+        return conversations
@@ -1,18 +1,22 @@
 import argparse
-from google.cloud import bigquery
-from google.oauth2 import service_account
+import sys
 
-def run_sql(service_account_file: str, sql_file: str):
+def run_sql(service_account_file: str, sql_file: str, page_size: int = 10000):
     """
     Run a SQL command on BigQuery using a service account JSON file.
 
     Args:
         service_account_file (str): Path to service account JSON key.
         sql_file (str): Path to a SQL file containing the query/command.
+        page_size (int): Number of rows fetched per results page.
 
     Returns:
         bigquery.table.RowIterator | None: Query results (for SELECT queries).
     """
+    # Imported here so that importing this module stays cheap
+    from google.cloud import bigquery
+    from google.oauth2 import service_account
+    
     # Read SQL from file
     with open(sql_file, "r", encoding="utf-8") as f:
         sql = f.read()
@@ -25,7 +29,7 @@ def run_sql(service_account_file: str, sql_file: str):
 
     print(f"Running SQL from {sql_file}:\n{sql}\n")
     query_job = client.query(sql)
-    results = query_job.result()  # Waits for job to finish
+    results = query_job.result(page_size=page_size)  # Waits for job to finish
 
     # Return results if it's a SELECT query
     if sql.strip().lower().startswith("select"):
@@ -43,5 +47,6 @@ if __name__ == "__main__":
     result = run_sql(args.key, args.file)
 
     if result:
-        for row in result:
-            print(dict(row))
\ No newline at end of file
+        # Stream page by page with one write per page instead of a print per row
+        for page in result.pages:
+            sys.stdout.write("".join(f"{dict(row)}\n" for row in page))
@@ -3,36 +3,91 @@ Command Line Interface for Unthread Data Extractor
 """
 
 import argparse
+import atexit
 import logging
+import logging.handlers
+import os
+import queue
 import sys
-from datetime import datetime
+import re
+from functools import lru_cache
+from typing import List, Optional, Tuple
 
-from .api import UnthreadAPI
 from .config import Config
-from .extractor import UnthreadExtractor
-from .storage import DuckDBStorage
-from .updater import UnthreadUpdater
-from .reclassify import process_conversations_batch
-from .migrate_categories import CategoryMigrator
-from .fix_missing_categories import MissingCategoryFixer
 
 logger = logging.getLogger(__name__)
 
+# Same inputs as strptime("%Y-%m-%d"), which allows single-digit months and days
+_DATE_RE = re.compile(r"(\d{4})-(\d{1,2})-(\d{1,2})")
+
+class _QueueDrainStreamHandler(logging.StreamHandler):
+    """StreamHandler that flushes its stream only once the log queue is drained
+    
+    While records are backed up the stream's own buffer batches the writes;
+    output still appears as soon as the listener catches up.
+    """
+    
+    def __init__(self, stream, log_queue: queue.SimpleQueue):
+        """Initialize the handler
+        
+        Args:
+            stream: Stream to write records to
+            log_queue: Queue the records are read from
+        """
+        super().__init__(stream)
+        self.log_queue = log_queue
+    
+    def flush(self):
+        if self.log_queue.empty():
+            super().flush()
+
 def setup_logging(level: str = "INFO"):
     """Set up logging configuration
     
+    Records are handed to a queue and written to stdout by a background
+    listener thread, so logging calls don't block on console I/O. Calling
+    this again once the root logger has handlers does nothing. With
+    UNTHREAD_QUIET set and stdout not a terminal, nothing is logged at all.
+    
     Args:
         level: Logging level (DEBUG, INFO, WARNING, ERROR, CRITICAL)
+        
+    Raises:
+        ValueError: If level is not a known logging level name
     """
+    numeric_level = logging.getLevelName(level.upper())
+    if not isinstance(numeric_level, int):
+        raise ValueError(f"Invalid log level: {level}")
+    
+    # Like basicConfig, leave an already configured root logger alone
+    if logging.getLogger().handlers:
+        return
+    
+    # Unattended runs that asked for silence: no listener thread, and every
+    # logging call stops at the level check
+    if os.environ.get('UNTHREAD_QUIET') and not sys.stdout.isatty():
+        logging.basicConfig(level=logging.CRITICAL, handlers=[logging.NullHandler()])
+        return
+    
+    log_queue = queue.SimpleQueue()
+    stream_handler = _QueueDrainStreamHandler(sys.stdout, log_queue)
+    stream_handler.setFormatter(logging.Formatter('%(asctime)s - %(levelname)s - %(message)s'))
+    listener = logging.handlers.QueueListener(log_queue, stream_handler)
+    listener.start()
+    # At exit (atexit runs in reverse order): drain the queue, then flush the stream
+    atexit.register(lambda: logging.StreamHandler.flush(stream_handler))
+    atexit.register(listener.stop)
+    
+    # Only merge the message and traceback here; the listener applies the layout
+    queue_handler = logging.handlers.QueueHandler(log_queue)
+    queue_handler.setFormatter(logging.Formatter('%(message)s'))
     logging.basicConfig(
-        level=getattr(logging, level),
-        format='%(asctime)s - %(levelname)s - %(message)s',
-        handlers=[
-            logging.StreamHandler(sys.stdout)
-        ]
+        level=numeric_level,
+        handlers=[queue_handler]
     )
-    logger.debug(f"Logging configured with level: {level}")
+    logger.debug("Logging configured with level: %s", level)
 
+@lru_cache(maxsize=1024)
 def parse_date(date_str: str) -> str:
     """Parse date string to ISO format
     
@@ -45,275 +100,516 @@ def parse_date(date_str: str) -> str:
     Raises:
         ValueError: If date string is in invalid format
     """
+    # Imported here: only commands with date filters need datetime
+    from datetime import date
+    
     try:
-        return datetime.strptime(date_str, "%Y-%m-%d").isoformat()
-    except ValueError:
+        match = _DATE_RE.fullmatch(date_str)
+        if not match:
+            raise ValueError(date_str)
+        # date() validates the fields without strptime's format parsing
+        return f"{date(*map(int, match.groups())).isoformat()}T00:00:00"
+    except (ValueError, TypeError):
         raise ValueError(f"Invalid date format: {date_str}. Use YYYY-MM-DD format.")
 
-def main():
-    """Main entry point for the CLI"""
-    parser = argparse.ArgumentParser(description='Extract data from Unthread API')
-    subparsers = parser.add_subparsers(dest='command', help='Command to execute')
+def _date_range(start_date: Optional[str], end_date: Optional[str]) -> Tuple[Optional[str], Optional[str]]:
+    """Parse an optional --start-date/--end-date pair
+    
+    Args:
+        start_date: Start date in YYYY-MM-DD format, or None
+        end_date: End date in YYYY-MM-DD format, or None
+        
+    Returns:
+        Tuple of ISO formatted start and end dates (None where not given)
+        
+    Raises:
+        ValueError: If a date is invalid or the start date is after the end date
+    """
+    start = parse_date(start_date) if start_date else None
+    end = parse_date(end_date) if end_date else None
+    # Same fixed-width ISO format, so the strings compare like the dates
+    if start and end and start > end:
+        raise ValueError(f"Start date {start_date} is after end date {end_date}")
+    return start, end
+
+# Built-in --batch-size / --max-workers defaults, used when neither the flag nor
+# the corresponding environment variable (see Config) is set
+DEFAULT_BATCH_SIZES = {
+    'conversations': 10,
+    'all': 10,
+    'update': 50,
+    'reclassify': 10,
+    'migrate-categories': 50,
+    'fix-missing-categories': 10000,
+}
+DEFAULT_MAX_WORKERS = 5
 
-    # Users command
-    users_parser = subparsers.add_parser('users', help='Extract users')
+def _add_users_parser(subparsers):
+    subparsers.add_parser('users', help='Extract users')
 
-    # Conversations command
+def _add_conversations_parser(subparsers):
     conversations_parser = subparsers.add_parser('conversations', help='Extract conversations')
     conversations_parser.add_argument('--conversation-id', help='Extract a specific conversation by ID')
     conversations_parser.add_argument('--start-date', help='Filter conversations modified after this date (YYYY-MM-DD)')
     conversations_parser.add_argument('--end-date', help='Filter conversations modified before this date (YYYY-MM-DD)')
     conversations_parser.add_argument('--parallel', action='store_true', help='Use parallel processing for faster downloads')
-    conversations_parser.add_argument('--max-workers', type=int, default=5, help='Maximum number of parallel workers (default: 5)')
-    conversations_parser.add_argument('--batch-size', type=int, default=10, help='Number of conversations to process in each batch (default: 10)')
+    conversations_parser.add_argument('--skip-unchanged', action='store_true', help='Skip conversations already stored with the same updatedAt')
+    conversations_parser.add_argument('--use-list-data', action='store_true', help='Store conversations as listed instead of fetching each one (when no needed field is missing)')
+    conversations_parser.add_argument('--max-workers', type=int, help='Maximum number of parallel workers (default: 5, or UNTHREAD_MAX_WORKERS)')
+    conversations_parser.add_argument('--batch-size', type=int, help='Number of conversations to process in each batch (default: 10, or UNTHREAD_BATCH_SIZE)')
 
-    # Messages command
+def _add_messages_parser(subparsers):
     messages_parser = subparsers.add_parser('messages', help='Extract messages')
     messages_parser.add_argument('--conversation-id', required=True, help='Extract messages for a specific conversation')
 
-    # Customers command
-    customers_parser = subparsers.add_parser('customers', help='Extract customers')
+def _add_customers_parser(subparsers):
+    subparsers.add_parser('customers', help='Extract customers')
 
-    # All command
+def _add_all_parser(subparsers):
     all_parser = subparsers.add_parser('all', help='Extract all data')
     all_parser.add_argument('--parallel', action='store_true', help='Use parallel processing for faster downloads')
-    all_parser.add_argument('--max-workers', type=int, default=5, help='Maximum number of parallel workers (default: 5)')
-    all_parser.add_argument('--batch-size', type=int, default=10, help='Number of conversations to process in each batch (default: 10)')
+    all_parser.add_argument('--skip-unchanged', action='store_true', help='Skip conversations already stored with the same updatedAt')
+    all_parser.add_argument('--use-list-data', action='store_true', help='Store conversations as listed instead of fetching each one (when no needed field is missing)')
+    all_parser.add_argument('--max-workers', type=int, help='Maximum number of parallel workers (default: 5, or UNTHREAD_MAX_WORKERS)')
+    all_parser.add_argument('--batch-size', type=int, help='Number of conversations to process in each batch (default: 10, or UNTHREAD_BATCH_SIZE)')
 
-    # Update command
+def _add_update_parser(subparsers):
     update_parser = subparsers.add_parser('update', help='Update conversations with classifications from database')
-    update_parser.add_argument('--batch-size', type=int, default=50, help='Number of conversations to update in each batch (default: 50)')
+    update_parser.add_argument('--batch-size', type=int, help='Number of conversations to update in each batch (default: 50, or UNTHREAD_BATCH_SIZE)')
+    update_parser.add_argument('--max-workers', type=int, help='Number of conversations updated in parallel (default: 5, or UNTHREAD_MAX_WORKERS)')
 
-    # Reclassify command
+def _add_reclassify_parser(subparsers):
     reclassify_parser = subparsers.add_parser('reclassify', help='Reclassify conversations using LLM')
-    reclassify_parser.add_argument('--batch-size', type=int, default=10, help='Number of conversations to process in each batch (default: 10)')
+    reclassify_parser.add_argument('--batch-size', type=int, help='Number of conversations to process in each batch (default: 10, or UNTHREAD_BATCH_SIZE)')
     reclassify_parser.add_argument('--max-conversations', type=int, default=100, help='Maximum number of conversations to process (default: 100)')
+    reclassify_parser.add_argument('--use-batch-api', action='store_true', help='Classify through the OpenAI Batch API (half the cost, results within 24h)')
 
-    # Migrate categories command
+def _add_migrate_categories_parser(subparsers):
     migrate_parser = subparsers.add_parser('migrate-categories', help='Migrate ticket categories')
-    migrate_parser.add_argument('--batch-size', type=int, default=50, help='Number of tickets to process per batch (default: 50)')
+    migrate_parser.add_argument('--batch-size', type=int, help='Number of tickets to process per batch (default: 50, or UNTHREAD_BATCH_SIZE)')
     migrate_parser.add_argument('--max-tickets', type=int, help='Maximum number of tickets to process (default: all)')
+    migrate_parser.add_argument('--max-workers', type=int, help='Number of tickets updated in parallel (default: 5, or UNTHREAD_MAX_WORKERS)')
     migrate_parser.add_argument('--ticket-ids', nargs='+', help='Specific conversation IDs to migrate (space-separated)')
     migrate_parser.add_argument('--dry-run', action='store_true', help='Show what would be migrated without making API calls')
 
-    # Fix missing categories command
+def _add_fix_missing_categories_parser(subparsers):
     fix_categories_parser = subparsers.add_parser('fix-missing-categories', help='Fix missing categories for conversations that resulted in empty migration categories')
     fix_categories_parser.add_argument('--conversation-id', '-c', help='Test with a specific conversation ID')
-    fix_categories_parser.add_argument('--batch-size', type=int, default=100, help='Batch size for BigQuery queries (default: 100)')
+    fix_categories_parser.add_argument('--batch-size', type=int, help='Conversation IDs per BigQuery query (default: 10000, or UNTHREAD_BATCH_SIZE)')
     fix_categories_parser.add_argument('--limit', type=int, help='Maximum number of conversations to process (default: all)')
+    fix_categories_parser.add_argument('--max-workers', type=int, help='Maximum number of conversations processed in parallel (default: 5, or UNTHREAD_MAX_WORKERS)')
+    fix_categories_parser.add_argument('--use-batch-api', action='store_true', help='Classify through the OpenAI Batch API (half the cost, results within 24h)')
+    fix_categories_parser.add_argument('--refresh-cache', action='store_true', help='Query BigQuery for every conversation instead of using cached results')
+    fix_categories_parser.add_argument('--max-input-tokens', type=int, default=6000, help='Conversation tokens sent per AI classification (default: 6000)')
+    fix_categories_parser.add_argument('--min-content-chars', type=int, default=50, help='Minimum conversation text length sent to AI classification (default: 50)')
+    fix_categories_parser.add_argument('--no-resume', dest='resume', action='store_false', help='Process conversations a previous run already fixed again')
+    fix_categories_parser.add_argument('--ignore-ai-cache', action='store_true', help='Classify with AI again instead of using cached classifications')
     fix_categories_parser.add_argument('--log-file', default='logs/migrate_categories.log', help='Path to migration log file (default: logs/migrate_categories.log)')
 
+# Subcommand name -> function adding its parser, in help order
+SUBCOMMAND_BUILDERS = {
+    'users': _add_users_parser,
+    'conversations': _add_conversations_parser,
+    'messages': _add_messages_parser,
+    'customers': _add_customers_parser,
+    'all': _add_all_parser,
+    'update': _add_update_parser,
+    'reclassify': _add_reclassify_parser,
+    'migrate-categories': _add_migrate_categories_parser,
+    'fix-missing-categories': _add_fix_missing_categories_parser,
+}
+
+def build_parser(argv: Optional[List[str]] = None) -> argparse.ArgumentParser:
+    """Build the argument parser
+    
+    Only the subparser of the requested command is built; all of them are built
+    when no known command is given (top-level help, usage errors).
+    
+    Args:
+        argv: Command line arguments without the program name (default: sys.argv[1:])
+        
+    Returns:
+        Argument parser
+    """
+    if argv is None:
+        argv = sys.argv[1:]
+    command = next((arg for arg in argv if arg in SUBCOMMAND_BUILDERS), None)
+    return _build_parser(command)
+
+@lru_cache(maxsize=None)
+def _build_parser(command: Optional[str]) -> argparse.ArgumentParser:
+    """Build (once per command) the argument parser
+    
+    Args:
+        command: Command whose subparser should be built, or None for all of them
+        
+    Returns:
+        Argument parser
+    """
+    parser = argparse.ArgumentParser(description='Extract data from Unthread API')
+    subparsers = parser.add_subparsers(dest='command', help='Command to execute')
+    
+    if command:
+        SUBCOMMAND_BUILDERS[command](subparsers)
+    else:
+        for add_parser in SUBCOMMAND_BUILDERS.values():
+            add_parser(subparsers)
+    
     # Common arguments
-    parser.add_argument('--log-level', default='INFO', help='Set the logging level')
-    args = parser.parse_args()
+    parser.add_argument('--log-level', help='Set the logging level (default: INFO, or WARNING when CI is set)')
+    return parser
 
-    setup_logging(args.log_level)
-    logger.debug("Starting Unthread Data Extractor")
+class CommandContext:
+    """Objects shared by the command handlers
+    
+    The API client, storage and extractor are only constructed when a handler
+    first uses them, so commands don't open the database or build clients they
+    never touch.
+    """
+    
+    def __init__(self, config: Config):
+        """Initialize the context
+        
+        Args:
+            config: Configuration loaded from the environment
+        """
+        self.config = config
+        self._api = None
+        self._storage = None
+        self._extractor = None
+    
+    @property
+    def api(self):
+        """Unthread API client"""
+        if self._api is None:
+            from .api import UnthreadAPI
+            self._api = UnthreadAPI(self.config.api_key, self.config.base_url, rate_limit=self.config.rate_limit)
+        return self._api
+    
+    @property
+    def storage(self):
+        """Database storage instance"""
+        if self._storage is None:
+            from .storage import DuckDBStorage
+            self._storage = DuckDBStorage(self.config.db_path)
+        return self._storage
+    
+    @property
+    def extractor(self):
+        """Data extractor"""
+        if self._extractor is None:
+            from .extractor import UnthreadExtractor
+            self._extractor = UnthreadExtractor(self.api, self.storage, page_size=self.config.page_size)
+            logger.debug("Extractor initialized")
+        return self._extractor
+    
+    def close(self):
+        """Close the storage connection if it was opened"""
+        if self._storage is not None:
+            self._storage.close()
+
+def _cmd_users(args: argparse.Namespace, ctx: CommandContext):
+    """Extract users"""
+    logger.info("Starting users extraction...")
+    ctx.extractor.download_users(return_records=False)
+    logger.info("Users extraction completed successfully")
 
-    storage = None  # Initialize storage to None
+def _cmd_customers(args: argparse.Namespace, ctx: CommandContext):
+    """Extract customers"""
+    logger.info("Starting customers extraction...")
+    ctx.extractor.download_customers(return_records=False)
+    logger.info("Customers extraction completed successfully")
+
+def _cmd_conversations(args: argparse.Namespace, ctx: CommandContext):
+    """Extract conversations"""
+    logger.info("Starting conversations extraction...")
+    modified_after, modified_before = _date_range(args.start_date, args.end_date)
+    
+    if modified_after or modified_before:
+        logger.debug("Date range: %s to %s", modified_after, modified_before)
+    if args.conversation_id:
+        logger.debug("Specific conversation ID: %s", args.conversation_id)
+    
+    if args.parallel:
+        logger.info(f"Using parallel processing with {args.max_workers} workers and batch size {args.batch_size}")
+        ctx.extractor.download_conversations_parallel(
+            modified_after=modified_after,
+            modified_before=modified_before,
+            conversation_id=args.conversation_id,
+            max_workers=args.max_workers,
+            batch_size=args.batch_size,
+            skip_unchanged=args.skip_unchanged,
+            use_list_data=args.use_list_data
+        )
+    else:
+        ctx.extractor.download_conversations(
+            modified_after=modified_after,
+            modified_before=modified_before,
+            conversation_id=args.conversation_id,
+            skip_unchanged=args.skip_unchanged,
+            use_list_data=args.use_list_data
+        )
+    logger.info("Conversations extraction completed successfully")
+
+def _cmd_messages(args: argparse.Namespace, ctx: CommandContext):
+    """Extract messages for a conversation"""
+    logger.info("Starting messages extraction...")
+    logger.debug("Conversation ID: %s", args.conversation_id)
+    
+    ctx.extractor.download_messages(args.conversation_id, return_records=False)
+    logger.info("Messages extraction completed successfully")
+
+def _cmd_all(args: argparse.Namespace, ctx: CommandContext):
+    """Extract all data"""
+    logger.info("Starting full data extraction...")
+    ctx.extractor.download_reference_data(return_records=False)
+    if args.parallel:
+        logger.info(f"Using parallel processing with {args.max_workers} workers and batch size {args.batch_size}")
+        ctx.extractor.download_conversations_parallel(
+            max_workers=args.max_workers,
+            batch_size=args.batch_size,
+            skip_unchanged=args.skip_unchanged,
+            use_list_data=args.use_list_data
+        )
+    else:
+        ctx.extractor.download_conversations(
+            skip_unchanged=args.skip_unchanged,
+            use_list_data=args.use_list_data
+        )
+    logger.info("Full data extraction completed successfully")
+
+def _cmd_update(args: argparse.Namespace, ctx: CommandContext):
+    """Update conversations with classifications from database"""
+    logger.info("Starting update process...")
+    from .updater import UnthreadUpdater
+    updater = UnthreadUpdater(ctx.api, ctx.storage, batch_size=args.batch_size, max_workers=args.max_workers)
     try:
-        config = Config.from_env()
-        logger.debug("Configuration loaded from environment")
-        
-        api = UnthreadAPI(config.api_key, config.base_url)
-        storage = DuckDBStorage(config.db_path)
-        extractor = UnthreadExtractor(api, storage)
-        logger.debug("Extractor initialized")
-
-        if args.command == 'users':
-            logger.info("Starting users extraction...")
-            extractor.download_users()
-            logger.info("Users extraction completed successfully")
-
-        elif args.command == 'customers':
-            logger.info("Starting customers extraction...")
-            extractor.download_customers()
-            logger.info("Customers extraction completed successfully")
-
-        elif args.command == 'conversations':
-            logger.info("Starting conversations extraction...")
-            modified_after = parse_date(args.start_date) if args.start_date else None
-            modified_before = parse_date(args.end_date) if args.end_date else None
-            
-            if modified_after or modified_before:
-                logger.debug(f"Date range: {modified_after} to {modified_before}")
-            if args.conversation_id:
-                logger.debug(f"Specific conversation ID: {args.conversation_id}")
-            
-            if args.parallel:
-                logger.info(f"Using parallel processing with {args.max_workers} workers and batch size {args.batch_size}")
-                extractor.download_conversations_parallel(
-                    modified_after=modified_after,
-                    modified_before=modified_before,
-                    conversation_id=args.conversation_id,
-                    max_workers=args.max_workers,
-                    batch_size=args.batch_size
-                )
-            else:
-                extractor.download_conversations(
-                    modified_after=modified_after,
-                    modified_before=modified_before,
-                    conversation_id=args.conversation_id
-                )
-            logger.info("Conversations extraction completed successfully")
+        results = updater.update_all_conversations()
+        logger.info(f"Update process completed. Results: {results}")
+    finally:
+        updater.close()
+    logger.info("Update process completed successfully")
+
+def _cmd_reclassify(args: argparse.Namespace, ctx: CommandContext):
+    """Reclassify conversations using LLM"""
+    logger.info("Starting reclassification process...")
+    from .reclassify import process_conversations_batch
+    conversations = ctx.storage.get_conversations()
+    try:
+        process_conversations_batch(
+            conversations,
+            batch_size=args.batch_size,
+            max_conversations=args.max_conversations,
+            use_batch_api=args.use_batch_api,
+            storage=ctx.storage
+        )
+        logger.info("Reclassification process completed successfully")
+    except Exception as e:
+        logger.error(f"Error during reclassification: {str(e)}", exc_info=True)
+        sys.exit(1)
 
-        elif args.command == 'messages':
-            logger.info("Starting messages extraction...")
-            logger.debug(f"Conversation ID: {args.conversation_id}")
+def _cmd_migrate_categories(args: argparse.Namespace, ctx: CommandContext):
+    """Migrate ticket categories"""
+    logger.info("Starting category migration process...")
+    from .migrate_categories import CategoryMigrator
+    try:
+        # Dry runs only read from the database
+        migrator = CategoryMigrator(ctx.storage, None if args.dry_run else ctx.api, max_workers=args.max_workers)
+        
+        if args.ticket_ids:
+            # Migrate specific tickets
+            logger.info(f"Migrating specific tickets: {args.ticket_ids}")
             
-            extractor.download_messages(args.conversation_id)
-            logger.info("Messages extraction completed successfully")
-
-        elif args.command == 'all':
-            logger.info("Starting full data extraction...")
-            extractor.download_users()
-            if args.parallel:
-                logger.info(f"Using parallel processing with {args.max_workers} workers and batch size {args.batch_size}")
-                extractor.download_conversations_parallel(
-                    max_workers=args.max_workers,
-                    batch_size=args.batch_size
-                )
+            if args.dry_run:
+                logger.info("DRY RUN MODE - No API calls will be made")
+                tickets = migrator.get_tickets_by_ids(args.ticket_ids)
+                logger.info(f"Would process {len(tickets)} specific tickets")
+                for ticket in tickets:
+                    logger.info(f"Ticket {ticket['conversation_id']}: {ticket['category']} + {ticket['sub_category']} -> {ticket['migration_category']}")
             else:
-                extractor.download_conversations()
-            logger.info("Full data extraction completed successfully")
-
-        elif args.command == 'update':
-            logger.info("Starting update process...")
-            updater = UnthreadUpdater(api, storage, batch_size=args.batch_size)
-            try:
-                results = updater.update_all_conversations()
-                logger.info(f"Update process completed. Results: {results}")
-            finally:
-                updater.close()
-            logger.info("Update process completed successfully")
-
-        elif args.command == 'reclassify':
-            logger.info("Starting reclassification process...")
-            conversations = storage.get_conversations()
-            try:
-                process_conversations_batch(conversations, batch_size=args.batch_size, max_conversations=args.max_conversations)
-                logger.info("Reclassification process completed successfully")
-            except Exception as e:
-                logger.error(f"Error during reclassification: {str(e)}", exc_info=True)
-                sys.exit(1)
-
-        elif args.command == 'migrate-categories':
-            logger.info("Starting category migration process...")
-            try:
-                migrator = CategoryMigrator(storage, api)
-                
-                if args.ticket_ids:
-                    # Migrate specific tickets
-                    logger.info(f"Migrating specific tickets: {args.ticket_ids}")
-                    
-                    if args.dry_run:
-                        logger.info("DRY RUN MODE - No API calls will be made")
-                        tickets = migrator.get_tickets_by_ids(args.ticket_ids)
-                        logger.info(f"Would process {len(tickets)} specific tickets")
-                        for ticket in tickets:
-                            migration_category = migrator.create_migration_category(
-                                ticket['category'], 
-                                ticket['sub_category']
-                            )
-                            logger.info(f"Ticket {ticket['conversation_id']}: {ticket['category']} + {ticket['sub_category']} -> {migration_category}")
-                    else:
-                        results = migrator.migrate_specific_tickets(args.ticket_ids)
-                        
-                        logger.info("Migration Summary:")
-                        logger.info(f"  Total processed: {results['total_processed']}")
-                        logger.info(f"  Successful: {results['total_successful']}")
-                        logger.info(f"  Failed: {results['total_failed']}")
-                        
-                        if results['all_errors']:
-                            logger.warning(f"  Errors: {len(results['all_errors'])}")
-                            for error in results['all_errors'][:5]:  # Show first 5 errors
-                                logger.warning(f"    {error['conversation_id']}: {error['error']}")
-                else:
-                    # Migrate all tickets with pagination
-                    if args.dry_run:
-                        logger.info("DRY RUN MODE - No API calls will be made")
-                        # For dry run, just show what would be migrated
-                        tickets = migrator.get_tickets_with_pagination(args.batch_size, 0)
-                        logger.info(f"Would process {len(tickets)} tickets in first batch")
-                        for ticket in tickets[:5]:  # Show first 5 as examples
-                            migration_category = migrator.create_migration_category(
-                                ticket['category'], 
-                                ticket['sub_category']
-                            )
-                            logger.info(f"Ticket {ticket['conversation_id']}: {ticket['category']} + {ticket['sub_category']} -> {migration_category}")
-                    else:
-                        # Perform actual migration
-                        results = migrator.migrate_all_tickets(
-                            batch_size=args.batch_size,
-                            max_tickets=args.max_tickets
-                        )
-                        
-                        logger.info("Migration Summary:")
-                        logger.info(f"  Total processed: {results['total_processed']}")
-                        logger.info(f"  Successful: {results['total_successful']}")
-                        logger.info(f"  Failed: {results['total_failed']}")
-                        logger.info(f"  Batches processed: {results['batches_processed']}")
-                        
-                        if results['all_errors']:
-                            logger.warning(f"  Errors: {len(results['all_errors'])}")
-                            for error in results['all_errors'][:5]:  # Show first 5 errors
-                                logger.warning(f"    {error['conversation_id']}: {error['error']}")
+                results = migrator.migrate_specific_tickets(args.ticket_ids)
                 
-                logger.info("Category migration process completed successfully")
-            except Exception as e:
-                logger.error(f"Error during category migration: {str(e)}", exc_info=True)
-                sys.exit(1)
-
-        elif args.command == 'fix-missing-categories':
-            logger.debug("Starting missing categories fix process...")
-            try:
-                # Initialize fixer (uses data/bq_connect.json for BigQuery auth)
-                fixer = MissingCategoryFixer(storage, api)
+                logger.info("Migration Summary:")
+                logger.info(f"  Total processed: {results['total_processed']}")
+                logger.info(f"  Successful: {results['total_successful']}")
+                logger.info(f"  Failed: {results['total_failed']}")
                 
-                if args.conversation_id:
-                    # Test with specific conversation ID
-                    logger.debug(f"Processing conversation ID: {args.conversation_id}")
-                    conversation_ids = [args.conversation_id]
-                else:
-                    # Extract conversation IDs from log
-                    conversation_ids = fixer.extract_conversation_ids_from_log(args.log_file)
-                    
-                    if not conversation_ids:
-                        logger.warning("No conversations with missing categories found")
-                        return
-                
-                # Process conversations
-                stats = fixer.process_conversations(conversation_ids, args.batch_size, args.limit)
+                if results['all_errors']:
+                    logger.warning(f"  Errors: {len(results['all_errors'])}")
+                    for error in results['all_errors'][:5]:  # Show first 5 errors
+                        logger.warning(f"    {error['conversation_id']}: {error['error']}")
+        else:
+            # Migrate all tickets with pagination
+            if args.dry_run:
+                logger.info("DRY RUN MODE - No API calls will be made")
+                # For dry run, just show what would be migrated
+                tickets = migrator.preview_migration(args.batch_size)
+                logger.info(f"Would process {len(tickets)} tickets in first batch")
+                for ticket in tickets[:5]:  # Show first 5 as examples
+                    logger.info(f"Ticket {ticket['conversation_id']}: {ticket['category']} + {ticket['sub_category']} -> {ticket['migration_category']}")
+            else:
+                # Perform actual migration
+                results = migrator.migrate_all_tickets(
+                    batch_size=args.batch_size,
+                    max_tickets=args.max_tickets
+                )
                 
-                # Print summary
-                logger.info("PROCESSING SUMMARY")
-                logger.info("="*50)
-                logger.info(f"Total conversations processed: {stats['total_conversations']}")
-                logger.info(f"Found in BigQuery: {stats['bigquery_found']}")
-                logger.info(f"Found in Unthread API: {stats['unthread_api_found']}")
-                logger.info(f"Classified with AI: {stats['ai_classified']}")
-                logger.info(f"Successfully updated: {stats['updated_successfully']}")
-                logger.info(f"Failed to update: {stats['failed']}")
-                logger.info(f"No data found: {stats['no_data_found']}")
-                logger.info("="*50)
+                logger.info("Migration Summary:")
+                logger.info(f"  Total processed: {results['total_processed']}")
+                logger.info(f"  Successful: {results['total_successful']}")
+                logger.info(f"  Failed: {results['total_failed']}")
+                logger.info(f"  Batches processed: {results['batches_processed']}")
                 
-                logger.debug("Missing categories fix process completed successfully")
-            except Exception as e:
-                logger.error(f"Error during missing categories fix: {str(e)}", exc_info=True)
-                sys.exit(1)
+                if results['all_errors']:
+                    logger.warning(f"  Errors: {len(results['all_errors'])}")
+                    for error in results['all_errors'][:5]:  # Show first 5 errors
+                        logger.warning(f"    {error['conversation_id']}: {error['error']}")
+        
+        logger.info("Category migration process completed successfully")
+    except Exception as e:
+        logger.error(f"Error during category migration: {str(e)}", exc_info=True)
+        sys.exit(1)
 
+def _cmd_fix_missing_categories(args: argparse.Namespace, ctx: CommandContext):
+    """Fix missing categories for conversations"""
+    logger.debug("Starting missing categories fix process...")
+    from .fix_missing_categories import MissingCategoryFixer
+    try:
+        if args.conversation_id:
+            # Test with specific conversation ID
+            logger.debug("Processing conversation ID: %s", args.conversation_id)
+            conversation_ids = [args.conversation_id]
         else:
+            # Extract conversation IDs from log
+            conversation_ids = MissingCategoryFixer.extract_conversation_ids_from_log(args.log_file)
+            
+            if not conversation_ids:
+                logger.warning("No conversations with missing categories found")
+                return
+        
+        # Initialize fixer (uses data/bq_connect.json for BigQuery auth)
+        fixer = MissingCategoryFixer(
+            ctx.storage,
+            ctx.api,
+            max_input_tokens=args.max_input_tokens,
+            min_content_chars=args.min_content_chars
+        )
+        
+        # Process conversations
+        stats = fixer.process_conversations(
+            conversation_ids,
+            args.batch_size,
+            args.limit,
+            args.max_workers,
+            use_batch_api=args.use_batch_api,
+            refresh_cache=args.refresh_cache,
+            ignore_ai_cache=args.ignore_ai_cache,
+            resume=args.resume
+        )
+        
+        # Print summary
+        logger.info("PROCESSING SUMMARY")
+        logger.info("="*50)
+        logger.info(f"Total conversations processed: {stats['total_conversations']}")
+        logger.info(f"Duplicate IDs skipped: {stats['duplicates_removed']}")
+        logger.info(f"Already fixed by a previous run: {stats['already_fixed']}")
+        logger.info(f"Found in BigQuery: {stats['bigquery_found']}")
+        logger.info(f"Found in Unthread API: {stats['unthread_api_found']}")
+        logger.info(f"Classified with AI: {stats['ai_classified']}")
+        logger.info(f"Successfully updated: {stats['updated_successfully']}")
+        logger.info(f"Failed to update: {stats['failed']}")
+        logger.info(f"No data found: {stats['no_data_found']}")
+        logger.info("="*50)
+        
+        logger.debug("Missing categories fix process completed successfully")
+    except Exception as e:
+        logger.error(f"Error during missing categories fix: {str(e)}", exc_info=True)
+        sys.exit(1)
+
+# Subcommand name -> handler
+COMMAND_HANDLERS = {
+    'users': _cmd_users,
+    'customers': _cmd_customers,
+    'conversations': _cmd_conversations,
+    'messages': _cmd_messages,
+    'all': _cmd_all,
+    'update': _cmd_update,
+    'reclassify': _cmd_reclassify,
+    'migrate-categories': _cmd_migrate_categories,
+    'fix-missing-categories': _cmd_fix_missing_categories,
+}
+
+def apply_config_defaults(args: argparse.Namespace, config: Config):
+    """Fill in --batch-size and --max-workers that weren't given on the command line
+    
+    Args:
+        args: Parsed command line arguments
+        config: Configuration loaded from the environment
+    """
+    if getattr(args, 'batch_size', False) is None:
+        args.batch_size = config.batch_size if config.batch_size is not None else DEFAULT_BATCH_SIZES[args.command]
+    if getattr(args, 'max_workers', False) is None:
+        args.max_workers = config.max_workers if config.max_workers is not None else DEFAULT_MAX_WORKERS
+
+def start_profiler():
+    """Profile the rest of the run when UNTHREAD_PROFILE is set
+    
+    The stats are written at interpreter exit (so runs ending in sys.exit are
+    covered too) to the path in UNTHREAD_PROFILE, or to profile.out if it is
+    just set to 1. Inspect them with ``python -m pstats profile.out``.
+    """
+    output = os.environ.get('UNTHREAD_PROFILE')
+    if not output:
+        return
+    if output == '1':
+        output = 'profile.out'
+    
+    import cProfile
+    
+    profiler = cProfile.Profile()
+    
+    def dump_stats():
+        profiler.disable()
+        profiler.dump_stats(output)
+        sys.stderr.write(f"Profile written to {output}\n")
+    
+    atexit.register(dump_stats)
+    profiler.enable()
+
+def main():
+    """Main entry point for the CLI"""
+    start_profiler()
+    parser = build_parser()
+    args = parser.parse_args()
+
+    try:
+        setup_logging(args.log_level or ('WARNING' if os.environ.get('CI') else 'INFO'))
+    except ValueError as e:
+        parser.error(str(e))
+    logger.debug("Starting Unthread Data Extractor")
+
+    ctx = None
+    try:
+        config = Config.from_env()
+        logger.debug("Configuration loaded from environment")
+        apply_config_defaults(args, config)
+        ctx = CommandContext(config)
+
+        handler = COMMAND_HANDLERS.get(args.command)
+        if handler is None:
             logger.warning("No command specified")
             parser.print_help()
             sys.exit(1)
+        else:
+            handler(args, ctx)
 
     except Exception as e:
         logger.error(f"Error during extraction: {str(e)}", exc_info=True)
         sys.exit(1)
     finally:
         logger.debug("Closing storage connection")
-        if storage is not None:
-            storage.close()
+        if ctx is not None:
+            ctx.close()
         logger.info("Extraction process completed")
 
 if __name__ == '__main__':
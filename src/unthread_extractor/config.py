@@ -4,7 +4,38 @@ Configuration settings for the Unthread Data Extractor
 
 import os
 from dataclasses import dataclass
+from functools import lru_cache
 from typing import Optional
+from dotenv import load_dotenv
+
+@lru_cache(maxsize=None)
+def _load_env_file() -> bool:
+    """Load variables from a .env file into the environment, once per process
+    
+    Returns:
+        Whether a .env file was found and loaded
+    """
+    return load_dotenv()
+
+def _getenv_int(name: str) -> Optional[int]:
+    """Read an optional integer environment variable
+    
+    Args:
+        name: Name of the environment variable
+        
+    Returns:
+        The integer value, or None if the variable is not set
+        
+    Raises:
+        ValueError: If the variable is set but not an integer
+    """
+    value = os.getenv(name)
+    if not value:
+        return None
+    try:
+        return int(value)
+    except ValueError:
+        raise ValueError(f"{name} must be an integer, got {value!r}")
 
 @dataclass
 class Config:
@@ -13,10 +44,22 @@ class Config:
     base_url: str = "https://api.unthread.io/api"
     db_path: str = "data/unthread_data.duckdb"
     log_level: str = "INFO"
+    # Override the per-command default batch size / worker count of the CLI
+    batch_size: Optional[int] = None
+    max_workers: Optional[int] = None
+    # Records per page requested from the user, customer and message list endpoints
+    page_size: int = 200
+    # Maximum Unthread API requests per second across all workers (None: unlimited)
+    rate_limit: Optional[int] = None
 
     @classmethod
     def from_env(cls) -> 'Config':
-        """Create a Config instance from environment variables"""
+        """Create a Config instance from environment variables
+        
+        Variables from a .env file are loaded first; variables already set in
+        the environment take precedence over the file.
+        """
+        _load_env_file()
         api_key = os.getenv('UNTHREAD_API_KEY')
         if not api_key:
             raise ValueError("UNTHREAD_API_KEY environment variable not set")
@@ -25,5 +68,9 @@ class Config:
             api_key=api_key,
             base_url=os.getenv('UNTHREAD_API_URL', cls.base_url),
             db_path=os.getenv('UNTHREAD_DB_PATH', cls.db_path),
-            log_level=os.getenv('UNTHREAD_LOG_LEVEL', cls.log_level)
+            log_level=os.getenv('UNTHREAD_LOG_LEVEL', cls.log_level),
+            batch_size=_getenv_int('UNTHREAD_BATCH_SIZE'),
+            max_workers=_getenv_int('UNTHREAD_MAX_WORKERS'),
+            page_size=_getenv_int('UNTHREAD_PAGE_SIZE') or cls.page_size,
+            rate_limit=_getenv_int('UNTHREAD_RATE_LIMIT')
         ) 
\ No newline at end of file
@@ -4,18 +4,33 @@ Data extractor for Unthread
 
 import os
 import logging
-from typing import Optional, Dict, Any, List
-from datetime import datetime, timezone
-from concurrent.futures import ThreadPoolExecutor, as_completed
+import queue
 import threading
+from typing import Optional, Callable, Dict, Any, Iterator, List, Tuple, Union
+from datetime import datetime, timezone
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, as_completed, wait
 
 from unthread_extractor.api import UnthreadAPI
+from unthread_extractor.ratelimit import AdaptiveConcurrencyLimit
 from unthread_extractor.storage import DuckDBStorage
 
 logger = logging.getLogger(__name__)
 
-# Thread-local storage for API clients
-thread_local = threading.local()
+# Records requested per page from the list endpoints
+DEFAULT_PAGE_SIZE = 200
+
+# Conversation fields read by the reports and tools; a listed conversation
+# lacking any of them is fetched in full even when list data is used
+CONVERSATION_DETAIL_FIELDS = frozenset([
+    "id", "sourceType", "status", "createdAt", "updatedAt", "title",
+    "customer", "ticketType", "channelId", "initialMessage"
+])
+
+# Number of downloaded rows buffered before they are written to storage
+STORE_BATCH_SIZE = 1000
+
+# Maximum number of batches waiting for the background storage writer
+WRITE_QUEUE_SIZE = 4
 
 class UnthreadExtractor:
     """Data extractor for Unthread"""
@@ -24,7 +39,8 @@ class UnthreadExtractor:
         self,
         api: Optional[UnthreadAPI] = None,
         storage: Optional[DuckDBStorage] = None,
-        db_path: Optional[str] = None
+        db_path: Optional[str] = None,
+        page_size: int = DEFAULT_PAGE_SIZE
     ):
         """Initialize extractor
         
@@ -32,7 +48,9 @@ class UnthreadExtractor:
             api: Optional UnthreadAPI instance
             storage: Optional DuckDBStorage instance
             db_path: Optional path to database file
+            page_size: Number of records requested per page of user, customer and message listings
         """
+        self.page_size = page_size
         # Get API key from environment
         api_key = os.environ.get("UNTHREAD_API_KEY")
         if not api_key:
@@ -51,112 +69,208 @@ class UnthreadExtractor:
             self.storage = DuckDBStorage("data/unthread_data.duckdb")
         logger.debug("Initialized storage")
     
-    def _get_thread_local_api(self) -> UnthreadAPI:
-        """Get thread-local API client to avoid sharing across threads"""
-        if not hasattr(thread_local, 'api'):
-            api_key = os.environ.get("UNTHREAD_API_KEY")
-            if not api_key:
-                raise ValueError("UNTHREAD_API_KEY environment variable not set")
-            thread_local.api = UnthreadAPI(api_key, "https://api.unthread.io/api")
-        return thread_local.api
-    
-    def download_users(self) -> List[Dict[str, Any]]:
+    def download_users(self, return_records: bool = True) -> Union[List[Dict[str, Any]], int]:
         """Download users from the API
         
+        Args:
+            return_records: Return the users; when False only their number is returned,
+                so no more than a few pages are held in memory
+        
         Returns:
-            List of user data dictionaries
+            List of user data dictionaries, or the number of users
         """
         logger.debug("[Extract] Downloading users...")
-        all_users = []
+        pages = self._iter_pages("/users/list", {"limit": self.page_size}, "users")
+        users = self._store_pages_in_background(pages, lambda storage, users: storage.store_users(users), return_records)
+        logger.info(f"Successfully downloaded {len(users) if return_records else users} users")
+        return users
+
+    def download_customers(self, return_records: bool = True) -> Union[List[Dict[str, Any]], int]:
+        """Download customers from the API
+        
+        Args:
+            return_records: Return the customers; when False only their number is returned,
+                so no more than a few pages are held in memory
+        
+        Returns:
+            List of customer data dictionaries, or the number of customers
+        """
+        logger.debug("[Extract] Downloading customers...")
+        pages = self._iter_pages("/customers/list", {"limit": self.page_size}, "customers")
+        customers = self._store_pages_in_background(pages, lambda storage, customers: storage.store_customers(customers), return_records)
+        logger.info(f"Successfully downloaded {len(customers) if return_records else customers} customers")
+        return customers
+    
+    def download_reference_data(self, return_records: bool = True) -> Tuple[Union[List[Dict[str, Any]], int], Union[List[Dict[str, Any]], int]]:
+        """Download users and customers concurrently
+        
+        The two listings use different endpoints and tables, so they run on two
+        threads (each storing through its own cursor) instead of one after the other.
+        
+        Args:
+            return_records: Return the records; when False only their numbers are returned
+        
+        Returns:
+            Tuple of user and customer data dictionary lists, or of their numbers
+        """
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            users = executor.submit(self.download_users, return_records)
+            customers = executor.submit(self.download_customers, return_records)
+            return users.result(), customers.result()
+    
+    def _iter_pages(self, endpoint: str, data: Dict[str, Any], name: str) -> Iterator[List[Dict[str, Any]]]:
+        """Yield the pages of a cursor-paginated list endpoint
+        
+        Args:
+            endpoint: List endpoint to request
+            data: Request body sent with every page
+            name: What is being listed, for log messages
+            
+        Yields:
+            Non-empty lists of records
+        """
         cursor = None
         page_count = 0
         
         while True:
             page_count += 1
-            logger.debug(f"Downloading users page {page_count}")
-            
-            data = {
-                "limit": 200
-            }
+            logger.debug("Downloading %s page %s", name, page_count)
             
             try:
-                users, cursor, has_next = self.api.make_api_request(
-                    endpoint="/users/list",
+                records, cursor, has_next = self.api.make_api_request(
+                    endpoint=endpoint,
                     method="POST",
                     data=data,
                     cursor=cursor
                 )
-                
-                if not users:
-                    logger.debug("No more users to download")
-                    break
-                
-                all_users.extend(users)
-                self.storage.store_users(users)
-                logger.debug(f"Downloaded and stored {len(users)} users")
-                
-                if not cursor or not has_next:
-                    logger.debug("Reached end of user pagination")
-                    break
-                    
             except Exception as e:
-                logger.error(f"Error downloading users page {page_count}: {str(e)}")
+                logger.error(f"Error downloading {name} page {page_count}: {str(e)}")
                 raise
+            
+            if not records:
+                logger.debug("No more %s to download", name)
+                return
+            
+            logger.debug("Downloaded %s %s", len(records), name)
+            yield records
+            
+            if not cursor or not has_next:
+                logger.debug("Reached end of %s pagination", name)
+                return
+    
+    def _store_pages(
+        self,
+        pages: Iterator[List[Dict[str, Any]]],
+        storage: DuckDBStorage,
+        store: Callable[[DuckDBStorage, List[Dict[str, Any]]], None],
+        return_records: bool = True
+    ) -> Union[List[Dict[str, Any]], int]:
+        """Consume pages and store them on the calling thread
         
-        logger.info(f"Successfully downloaded {len(all_users)} users")
-        return all_users
-
-    def download_customers(self) -> List[Dict[str, Any]]:
-        """Download customers from the API
+        Pages are written in batches of STORE_BATCH_SIZE rows. Batches already
+        fetched are stored even if a later page fails.
         
+        Args:
+            pages: Iterator of record pages
+            storage: Storage of the calling thread
+            store: Called as store(storage, batch)
+            return_records: Keep and return the records instead of only counting them
+            
         Returns:
-            List of customer data dictionaries
+            All records, or their number
         """
-        logger.debug("[Extract] Downloading customers...")
-        all_customers = []
-        cursor = None
-        page_count = 0
+        all_records = []
+        count = 0
+        batch = []
+        try:
+            for page in pages:
+                count += len(page)
+                if return_records:
+                    all_records.extend(page)
+                batch.extend(page)
+                if len(batch) >= STORE_BATCH_SIZE:
+                    store(storage, batch)
+                    batch = []
+        finally:
+            if batch:
+                store(storage, batch)
+        return all_records if return_records else count
+    
+    def _store_pages_in_background(
+        self,
+        pages: Iterator[List[Dict[str, Any]]],
+        store: Callable[[DuckDBStorage, List[Dict[str, Any]]], None],
+        return_records: bool = True
+    ) -> Union[List[Dict[str, Any]], int]:
+        """Consume pages while a writer thread stores them
         
-        while True:
-            page_count += 1
-            logger.debug(f"Downloading customers page {page_count}")
-            
-            data = {
-                "limit": 200
-            }
+        Pages are grouped into batches of STORE_BATCH_SIZE rows and handed to the
+        writer through a bounded queue, so fetching the next pages overlaps with
+        the database write. Batches already fetched are stored even if a later
+        page fails.
+        
+        Args:
+            pages: Iterator of record pages
+            store: Called as store(storage, batch) on the writer thread
+            return_records: Keep and return the records; when False only the queued
+                batches are in memory
             
+        Returns:
+            All records, or their number
+        """
+        all_records = []
+        count = 0
+        write_queue = queue.Queue(maxsize=WRITE_QUEUE_SIZE)
+        write_errors = []
+        
+        def writer():
+            storage = self.storage.for_thread()
             try:
-                customers, cursor, has_next = self.api.make_api_request(
-                    endpoint="/customers/list",
-                    method="POST",
-                    data=data,
-                    cursor=cursor
-                )
-                
-                if not customers:
-                    logger.debug("No more customers to download")
-                    break
-                
-                all_customers.extend(customers)
-                self.storage.store_customers(customers)
-                logger.debug(f"Downloaded and stored {len(customers)} customers")
-                
-                if not cursor or not has_next:
-                    logger.debug("Reached end of customer pagination")
+                while True:
+                    batch = write_queue.get()
+                    if batch is None:
+                        return
+                    # After a failure keep draining, so the producer never blocks on a full queue
+                    if not write_errors:
+                        try:
+                            store(storage, batch)
+                        except Exception as e:
+                            write_errors.append(e)
+            finally:
+                # A new writer runs per call, so don't keep its cursor
+                self.storage.release_thread()
+        
+        writer_thread = threading.Thread(target=writer, name="storage-writer", daemon=True)
+        writer_thread.start()
+        batch = []
+        try:
+            for page in pages:
+                if write_errors:
                     break
-                    
-            except Exception as e:
-                logger.error(f"Error downloading users page {page_count}: {str(e)}")
-                raise
+                count += len(page)
+                if return_records:
+                    all_records.extend(page)
+                batch.extend(page)
+                if len(batch) >= STORE_BATCH_SIZE:
+                    write_queue.put(batch)
+                    batch = []
+        finally:
+            if batch:
+                write_queue.put(batch)
+            write_queue.put(None)
+            writer_thread.join()
         
-        logger.info(f"Successfully downloaded {len(all_customers)} customers")
-        return all_customers
+        if write_errors:
+            raise write_errors[0]
+        return all_records if return_records else count
     
     def download_conversations(
         self,
         modified_after: Optional[str] = None,
         modified_before: Optional[str] = None,
-        conversation_id: Optional[str] = None
+        conversation_id: Optional[str] = None,
+        skip_unchanged: bool = False,
+        use_list_data: bool = False
     ) -> List[Dict[str, Any]]:
         """Download conversations from the API
         
@@ -164,65 +278,35 @@ class UnthreadExtractor:
             modified_after: Filter conversations modified after this date
             modified_before: Filter conversations modified before this date
             conversation_id: Download a specific conversation
+            skip_unchanged: Skip conversations already stored with the same updatedAt
+            use_list_data: Store listed conversations as returned by the list endpoint
+                instead of fetching each one (unless CONVERSATION_DETAIL_FIELDS are missing)
             
         Returns:
             List of conversation data dictionaries
         """
         logger.debug("[Extract] Downloading conversations...")
         all_convs = []
-        cursor = None
-        page_count = 0
-        date_str_after = modified_after.split('T')[0] if modified_after else None
-        date_str_before = modified_before.split('T')[0] if modified_before else None
+        data = self._conversations_list_query(modified_after, modified_before, conversation_id)
         
-        while True:
-            page_count += 1
-            logger.debug(f"Downloading conversations page {page_count}")
-            
-            data = {
-                "order": ["updatedAt", "id"],
-                "descending": True
-            }
+        for conversations in self._iter_conversation_pages(data):
+            if skip_unchanged:
+                conversations = self._skip_unchanged(conversations)
             
-            if conversation_id:
-                data["where"] = [{"field": "id", "operator": "==", "value": conversation_id}]
-                logger.debug(f"Filtering for conversation ID: {conversation_id}")
-            elif date_str_after or date_str_before:
-                data["where"] = []
-                if date_str_after:
-                    data["where"].append({"field": "updatedAt", "operator": ">=", "value": date_str_after})
-                if date_str_before:
-                    data["where"].append({"field": "updatedAt", "operator": "<=", "value": date_str_before})
-                logger.debug(f"Filtering conversations modified between {date_str_after} and {date_str_before}")
+            # Buffer the page's conversations and store them in one bulk write
+            page_convs = []
+            for conversation in conversations:
+                try:
+                    if not (use_list_data and self._has_detail_fields(conversation)):
+                        conversation = self.download_conversation(conversation["id"], store=False)
+                    self.download_messages(conversation["id"], return_records=False)
+                    page_convs.append(conversation)
+                except Exception as e:
+                    logger.error(f"Error processing conversation {conversation['id']}: {str(e)}")
+                    continue
             
-            try:
-                conversations, cursor, has_next = self.api.make_api_request(
-                    endpoint="/conversations/list",
-                    method="POST",
-                    data=data,
-                    cursor=cursor
-                )
-                
-                if not conversations:
-                    logger.debug("No more conversations to download")
-                    break
-                
-                for conversation in conversations:
-                    try:
-                        conversation = self.download_conversation(conversation["id"])
-                        self.download_messages(conversation["id"])
-                        all_convs.append(conversation)
-                    except Exception as e:
-                        logger.error(f"Error processing conversation {conversation['id']}: {str(e)}")
-                        continue
-                
-                if not cursor or not has_next:
-                    logger.debug("Reached end of conversation pagination")
-                    break
-                    
-            except Exception as e:
-                logger.error(f"Error downloading conversations page {page_count}: {str(e)}")
-                raise
+            self.storage.store_conversations(page_convs)
+            all_convs.extend(page_convs)
         
         logger.info(f"Successfully downloaded {len(all_convs)} conversations")
         return all_convs
@@ -233,7 +317,9 @@ class UnthreadExtractor:
         modified_before: Optional[str] = None,
         conversation_id: Optional[str] = None,
         max_workers: int = 5,
-        batch_size: int = 10
+        batch_size: int = 10,
+        skip_unchanged: bool = False,
+        use_list_data: bool = False
     ) -> List[Dict[str, Any]]:
         """Download conversations from the API using parallel processing
         
@@ -243,171 +329,290 @@ class UnthreadExtractor:
             conversation_id: Download a specific conversation
             max_workers: Maximum number of parallel workers
             batch_size: Number of conversations to process in each batch
+            skip_unchanged: Skip conversations already stored with the same updatedAt
+            use_list_data: Store listed conversations as returned by the list endpoint
+                instead of fetching each one (unless CONVERSATION_DETAIL_FIELDS are missing)
             
         Returns:
             List of conversation data dictionaries
         """
-        logger.debug(f"[Extract] Downloading conversations with {max_workers} parallel workers...")
+        logger.debug("[Extract] Downloading conversations with %s parallel workers...", max_workers)
         all_convs = []
-        cursor = None
-        page_count = 0
+        data = self._conversations_list_query(modified_after, modified_before, conversation_id)
+        
+        # One pool for the whole run: conversations are submitted as pages arrive,
+        # so workers keep going while the next page is fetched. Submission blocks
+        # once max_in_flight conversations are queued or running.
+        max_in_flight = max_workers * 2
+        in_flight = {}
+        completed = []
+        # Workers back off below max_workers while the API is throttling
+        concurrency = AdaptiveConcurrencyLimit(max_workers)
+        
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            try:
+                for conversations in self._iter_conversation_pages(data):
+                    if skip_unchanged:
+                        conversations = self._skip_unchanged(conversations)
+                    for conv in conversations:
+                        while len(in_flight) >= max_in_flight:
+                            done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                            self._collect_conversations(done, in_flight, completed)
+                        listed = conv if use_list_data and self._has_detail_fields(conv) else None
+                        future = executor.submit(self._process_conversation_limited, concurrency, conv["id"], listed)
+                        in_flight[future] = conv["id"]
+                        
+                        # Store finished conversations in bulk writes of batch_size
+                        if len(completed) >= batch_size:
+                            logger.debug("Storing batch of %s conversations", len(completed))
+                            self.storage.store_conversations(completed)
+                            all_convs.extend(completed)
+                            completed = []
+            finally:
+                # Also on errors: keep what the workers already downloaded
+                self._collect_conversations(as_completed(list(in_flight)), in_flight, completed)
+                self.storage.store_conversations(completed)
+                all_convs.extend(completed)
+        
+        logger.info(f"Successfully downloaded {len(all_convs)} conversations using parallel processing")
+        return all_convs
+    
+    def _conversations_list_query(
+        self,
+        modified_after: Optional[str] = None,
+        modified_before: Optional[str] = None,
+        conversation_id: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """Build the /conversations/list request body
+        
+        Args:
+            modified_after: Filter conversations modified after this date
+            modified_before: Filter conversations modified before this date
+            conversation_id: Only list a specific conversation
+            
+        Returns:
+            Request body dictionary
+        """
         date_str_after = modified_after.split('T')[0] if modified_after else None
         date_str_before = modified_before.split('T')[0] if modified_before else None
+        data = {
+            "order": ["updatedAt", "id"],
+            "descending": True
+        }
         
-        while True:
-            page_count += 1
-            logger.debug(f"Downloading conversations page {page_count}")
-            
-            data = {
-                "order": ["updatedAt", "id"],
-                "descending": True
-            }
-            
-            if conversation_id:
-                data["where"] = [{"field": "id", "operator": "==", "value": conversation_id}]
-                logger.debug(f"Filtering for conversation ID: {conversation_id}")
-            elif date_str_after or date_str_before:
-                data["where"] = []
-                if date_str_after:
-                    data["where"].append({"field": "updatedAt", "operator": ">=", "value": date_str_after})
-                if date_str_before:
-                    data["where"].append({"field": "updatedAt", "operator": "<=", "value": date_str_before})
-                logger.debug(f"Filtering conversations modified between {date_str_after} and {date_str_before}")
+        if conversation_id:
+            data["where"] = [{"field": "id", "operator": "==", "value": conversation_id}]
+            logger.debug("Filtering for conversation ID: %s", conversation_id)
+        elif date_str_after or date_str_before:
+            data["where"] = []
+            if date_str_after:
+                data["where"].append({"field": "updatedAt", "operator": ">=", "value": date_str_after})
+            if date_str_before:
+                data["where"].append({"field": "updatedAt", "operator": "<=", "value": date_str_before})
+            logger.debug("Filtering conversations modified between %s and %s", date_str_after, date_str_before)
+        return data
+    
+    def _iter_conversation_pages(self, data: Dict[str, Any]) -> Iterator[List[Dict[str, Any]]]:
+        """Yield pages of /conversations/list, prefetching the next page
+        
+        The request for page N+1 is sent before page N is handed to the caller,
+        so listing overlaps with processing the conversations.
+        
+        Args:
+            data: Request body from _conversations_list_query
             
-            try:
-                conversations, cursor, has_next = self.api.make_api_request(
-                    endpoint="/conversations/list",
-                    method="POST",
-                    data=data,
-                    cursor=cursor
-                )
+        Yields:
+            Lists of conversation summaries
+        """
+        page_count = 1
+        with ThreadPoolExecutor(max_workers=1) as page_fetcher:
+            logger.debug("Downloading conversations page %s", page_count)
+            next_page = page_fetcher.submit(
+                self.api.make_api_request,
+                endpoint="/conversations/list",
+                method="POST",
+                data=data,
+                cursor=None
+            )
+            while True:
+                try:
+                    conversations, cursor, has_next = next_page.result()
+                except Exception as e:
+                    logger.error(f"Error downloading conversations page {page_count}: {str(e)}")
+                    raise
                 
                 if not conversations:
                     logger.debug("No more conversations to download")
-                    break
+                    return
                 
-                # Process conversations in parallel batches
-                conversation_batches = [conversations[i:i + batch_size] for i in range(0, len(conversations), batch_size)]
+                more = bool(cursor and has_next)
+                if more:
+                    page_count += 1
+                    logger.debug("Downloading conversations page %s", page_count)
+                    next_page = page_fetcher.submit(
+                        self.api.make_api_request,
+                        endpoint="/conversations/list",
+                        method="POST",
+                        data=data,
+                        cursor=cursor
+                    )
                 
-                for batch_idx, batch in enumerate(conversation_batches):
-                    logger.debug(f"Processing batch {batch_idx + 1}/{len(conversation_batches)} with {len(batch)} conversations")
-                    
-                    with ThreadPoolExecutor(max_workers=max_workers) as executor:
-                        # Submit tasks for parallel execution
-                        future_to_conv = {
-                            executor.submit(self._process_conversation_parallel, conv["id"]): conv["id"] 
-                            for conv in batch
-                        }
-                        
-                        # Collect results as they complete
-                        for future in as_completed(future_to_conv):
-                            conv_id = future_to_conv[future]
-                            try:
-                                conversation = future.result()
-                                if conversation:
-                                    all_convs.append(conversation)
-                                    logger.debug(f"Successfully processed conversation {conv_id}")
-                            except Exception as e:
-                                logger.error(f"Error processing conversation {conv_id}: {str(e)}")
-                                continue
+                yield conversations
                 
-                if not cursor or not has_next:
+                if not more:
                     logger.debug("Reached end of conversation pagination")
-                    break
-                    
+                    return
+    
+    def _has_detail_fields(self, conversation: Dict[str, Any]) -> bool:
+        """Check whether a listed conversation carries every field in CONVERSATION_DETAIL_FIELDS
+        
+        Args:
+            conversation: Conversation from /conversations/list
+            
+        Returns:
+            Whether the listed data can be stored without fetching the conversation
+        """
+        return CONVERSATION_DETAIL_FIELDS.issubset(conversation)
+    
+    def _skip_unchanged(self, conversations: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Drop listed conversations whose stored copy is up to date
+        
+        A conversation is only stored after its messages were downloaded, so a
+        stored copy with the listing's updatedAt needs no further requests.
+        
+        Args:
+            conversations: Conversation summaries from /conversations/list
+            
+        Returns:
+            Conversations that still need to be downloaded
+        """
+        stored_updated_at = self.storage.get_conversation_updated_at([conv["id"] for conv in conversations])
+        changed = [
+            conv for conv in conversations
+            if not conv.get("updatedAt") or stored_updated_at.get(conv["id"]) != conv["updatedAt"]
+        ]
+        if len(changed) < len(conversations):
+            logger.debug("Skipping %s unchanged conversations", len(conversations) - len(changed))
+        return changed
+    
+    def _collect_conversations(self, done, in_flight: Dict[Future, str], completed: List[Dict[str, Any]]):
+        """Move finished conversation downloads from in_flight to completed
+        
+        Args:
+            done: Iterable of finished futures
+            in_flight: Mapping of pending futures to conversation IDs
+            completed: List the downloaded conversations are appended to
+        """
+        for future in done:
+            conv_id = in_flight.pop(future)
+            try:
+                conversation = future.result()
             except Exception as e:
-                logger.error(f"Error downloading conversations page {page_count}: {str(e)}")
-                raise
+                logger.error(f"Error processing conversation {conv_id}: {str(e)}")
+                continue
+            if conversation:
+                completed.append(conversation)
+                logger.debug("Successfully processed conversation %s", conv_id)
+    
+    def _process_conversation_limited(
+        self,
+        concurrency: AdaptiveConcurrencyLimit,
+        conversation_id: str,
+        listed: Optional[Dict[str, Any]] = None
+    ) -> Optional[Dict[str, Any]]:
+        """Process a conversation for the caller's bulk store, within the adaptive concurrency limit
         
-        logger.info(f"Successfully downloaded {len(all_convs)} conversations using parallel processing")
-        return all_convs
+        Args:
+            concurrency: Limit shared by the workers of the download
+            conversation_id: ID of the conversation to process
+            listed: Conversation from the list endpoint to use instead of fetching it
+            
+        Returns:
+            Conversation data dictionary or None if failed
+        """
+        concurrency.acquire()
+        throttled_before = self.api.throttled_requests
+        try:
+            return self._process_conversation_parallel(conversation_id, False, listed)
+        finally:
+            # Throttling seen by any worker meanwhile counts: the limit is shared
+            concurrency.release(throttled=self.api.throttled_requests > throttled_before)
     
-    def _process_conversation_parallel(self, conversation_id: str) -> Optional[Dict[str, Any]]:
+    def _process_conversation_parallel(
+        self,
+        conversation_id: str,
+        store: bool = True,
+        listed: Optional[Dict[str, Any]] = None
+    ) -> Optional[Dict[str, Any]]:
         """Process a single conversation with its messages in parallel (thread-safe)
         
         Args:
             conversation_id: ID of the conversation to process
+            store: Whether to store the conversation (False when the caller stores in bulk)
+            listed: Conversation from the list endpoint to use instead of fetching it
             
         Returns:
             Conversation data dictionary or None if failed
         """
         try:
-            # Get thread-local API client
-            api = self._get_thread_local_api()
-            
-            # Download conversation
-            conversation, _, _ = api.make_api_request(
-                endpoint=f"/conversations/{conversation_id}",
-                method="GET"
-            )
+            # Download conversation; the client's session pools connections and
+            # is shared by all workers, so keep-alive connections are reused
+            if listed is not None:
+                conversation = listed
+            else:
+                conversation, _, _ = self.api.make_api_request(
+                    endpoint=f"/conversations/{conversation_id}",
+                    method="GET"
+                )
             if not conversation:
                 logger.error(f"No data returned for conversation {conversation_id}")
                 return None
             
             # Store conversation
-            self.storage.store_conversations([conversation])
+            if store:
+                self.storage.for_thread().store_conversations([conversation])
             
             # Download messages in parallel
-            self._download_messages_parallel(conversation_id, api)
+            self._download_messages_parallel(conversation_id)
             
-            logger.debug(f"Successfully processed conversation {conversation_id}")
+            logger.debug("Successfully processed conversation %s", conversation_id)
             return conversation
             
         except Exception as e:
             logger.error(f"Error processing conversation {conversation_id}: {str(e)}")
             return None
     
-    def _download_messages_parallel(self, conversation_id: str, api: UnthreadAPI) -> List[Dict[str, Any]]:
+    def _download_messages_parallel(self, conversation_id: str) -> List[Dict[str, Any]]:
         """Download messages for a conversation (thread-safe version)
         
         Args:
             conversation_id: ID of the conversation to download messages for
-            api: Thread-local API client
             
         Returns:
             List of message data dictionaries
         """
-        all_messages = []
-        cursor = None
-        page_count = 0
-        
-        while True:
-            page_count += 1
-            logger.debug(f"Downloading messages page {page_count} for conversation {conversation_id}")
-            
-            try:
-                messages, cursor, has_next = api.make_api_request(
-                    endpoint=f"/conversations/{conversation_id}/messages/list",
-                    method="POST",
-                    data={},
-                    cursor=cursor
-                )
-                
-                if not messages:
-                    logger.debug(f"No more messages to download for conversation {conversation_id}")
-                    break
-                
-                all_messages.extend(messages)
-                self.storage.store_messages(messages)
-                logger.debug(f"Downloaded and stored {len(messages)} messages for conversation {conversation_id}")
-                                    
-            except Exception as e:
-                logger.error(f"Error downloading messages page {page_count} for conversation {conversation_id}: {str(e)}")
-                raise
+        # Already on a worker thread: store through its own cursor, without another writer thread
+        pages = self._iter_pages(
+            f"/conversations/{conversation_id}/messages/list",
+            {"limit": self.page_size},
+            f"messages of conversation {conversation_id}"
+        )
+        all_messages = self._store_pages(pages, self.storage.for_thread(), lambda storage, messages: storage.store_messages(messages))
         
-        logger.debug(f"Successfully downloaded {len(all_messages)} messages for conversation {conversation_id}")
+        logger.debug("Successfully downloaded %s messages for conversation %s", len(all_messages), conversation_id)
         return all_messages
     
-    def download_conversation(self, conversation_id: str) -> Dict[str, Any]:
+    def download_conversation(self, conversation_id: str, store: bool = True) -> Dict[str, Any]:
         """Download a single conversation
         
         Args:
             conversation_id: ID of the conversation to download
+            store: Whether to store the conversation (False when the caller stores in bulk)
             
         Returns:
             Conversation data dictionary
         """
-        logger.debug(f"[Extract] Downloading conversation {conversation_id}...")
+        logger.debug("[Extract] Downloading conversation %s...", conversation_id)
         try:
             conversation, _, _ = self.api.make_api_request(
                 endpoint=f"/conversations/{conversation_id}",
@@ -415,50 +620,33 @@ class UnthreadExtractor:
             )
             if not conversation:
                 raise ValueError(f"No data returned for conversation {conversation_id}")
-            self.storage.store_conversations([conversation])
-            logger.debug(f"Successfully downloaded and stored conversation {conversation_id}")
+            if store:
+                self.storage.store_conversations([conversation])
+            logger.debug("Successfully downloaded conversation %s", conversation_id)
             return conversation
         except Exception as e:
             logger.error(f"Error downloading conversation {conversation_id}: {str(e)}")
             raise
     
-    def download_messages(self, conversation_id: str) -> List[Dict[str, Any]]:
+    def download_messages(self, conversation_id: str, return_records: bool = True) -> Union[List[Dict[str, Any]], int]:
         """Download messages for a conversation
         
+        A conversation's messages are few pages, so they are stored on the
+        calling thread rather than through a writer thread.
+        
         Args:
             conversation_id: ID of the conversation to download messages for
+            return_records: Return the messages; when False only their number is returned
             
         Returns:
-            List of message data dictionaries
+            List of message data dictionaries, or the number of messages
         """
-        logger.debug(f"[Extract] Downloading messages for conversation {conversation_id}...")
-        all_messages = []
-        cursor = None
-        page_count = 0
-        
-        while True:
-            page_count += 1
-            logger.debug(f"Downloading messages page {page_count} for conversation {conversation_id}")
-            
-            try:
-                messages, cursor, has_next = self.api.make_api_request(
-                    endpoint=f"/conversations/{conversation_id}/messages/list",
-                    method="POST",
-                    data={},
-                    cursor=cursor
-                )
-                
-                if not messages:
-                    logger.debug(f"No more messages to download for conversation {conversation_id}")
-                    break
-                
-                all_messages.extend(messages)
-                self.storage.store_messages(messages)
-                logger.debug(f"Downloaded and stored {len(messages)} messages")
-                                    
-            except Exception as e:
-                logger.error(f"Error downloading messages page {page_count} for conversation {conversation_id}: {str(e)}")
-                raise
-        
-        logger.info(f"Successfully downloaded {len(all_messages)} messages for conversation {conversation_id}")
-        return all_messages 
\ No newline at end of file
+        logger.debug("[Extract] Downloading messages for conversation %s...", conversation_id)
+        pages = self._iter_pages(
+            f"/conversations/{conversation_id}/messages/list",
+            {"limit": self.page_size},
+            f"messages of conversation {conversation_id}"
+        )
+        messages = self._store_pages(pages, self.storage, lambda storage, messages: storage.store_messages(messages), return_records)
+        logger.info(f"Successfully downloaded {len(messages) if return_records else messages} messages for conversation {conversation_id}")
+        return messages 
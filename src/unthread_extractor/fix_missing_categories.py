@@ -5,10 +5,14 @@ This script addresses cases where the original migration didn't find category/su
 
 import os
 import re
+import mmap
+import hashlib
 import json
 import logging
 import argparse
-from typing import List, Dict, Any, Optional, Tuple
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import List, Dict, Any, Optional, Tuple, Iterator
 from dotenv import load_dotenv
 from google.cloud import bigquery
 from google.oauth2 import service_account
@@ -16,7 +20,10 @@ from .storage import DuckDBStorage
 from .api import UnthreadAPI
 from .config import Config
 from .reclassify import get_system_prompt
-from openai import OpenAI
+from .ratelimit import TokenBucket
+from .openai_batch import json_schema_format, batched_json_schema_format, run_batch_job
+from openai import OpenAI, RateLimitError
+import tiktoken
 
 # Load environment variables
 load_dotenv()
@@ -29,15 +36,67 @@ SUB_CATEGORY_FIELD_ID = "05492140-551c-49ea-a8a2-4caeec8cda4d"
 MIGRATION_CATEGORY_FIELD_ID = "0598cba1-31d1-466e-bfd1-812548c73c51"
 RESOLUTION_FIELD_ID = "5ccb3d90-fbaf-4eea-ac88-ef3a82705ab2" 
 
+# Migration log lines ending in an empty category: "Migrated <id>: 'None' + 'None' -> ''"
+EMPTY_MIGRATION_PATTERN = re.compile(rb"Migrated ([a-f0-9-]+):[^\n]*'None' \+ 'None' -> ''")
+
+# IDs bound per BigQuery job, and rows fetched per result page
+BIGQUERY_BATCH_SIZE = 10000
+BIGQUERY_PAGE_SIZE = 10000
+# How long BigQuery lookups cached in DuckDB are reused
+BIGQUERY_CACHE_MAX_AGE_HOURS = 24
+
+CLASSIFICATION_MODEL = os.getenv("OPENAI_CLASSIFICATION_MODEL", "gpt-4o")
+# Completion tokens reserved against the TPM limit per classification; an estimate, not sent as max_tokens
+# since cutting off the free-text reasoning would leave unparseable JSON
+CLASSIFICATION_RESPONSE_TOKENS = 256
+# Conversation content tokens sent per classification; longer ones keep their first and last messages
+DEFAULT_MAX_INPUT_TOKENS = 6000
+MESSAGE_SEPARATOR = "\n<Next_Message>\n"
+# Finished updates buffered before their progress is written to DuckDB
+PROGRESS_FLUSH_SIZE = 100
+# Conversations with less text than this are too thin to classify and are not sent to AI
+DEFAULT_MIN_CONTENT_CHARS = 50
+# Attempts per classification when OpenAI answers 429 despite the local limits
+CLASSIFICATION_ATTEMPTS = 3
+# Conversations classified per OpenAI request, bounded by the prompt tokens of their content
+AI_BATCH_SIZE = 10
+AI_BATCH_MAX_TOKENS = 30000
+
+BATCH_PROMPT_ADDENDUM = """
+
+* Batched Input: Cases are wrapped in <Case id="N"> tags. Respond with a JSON object whose "classifications" array contains one object per case, in order, each with an "id" field set to the case id in addition to the fields above.
+"""
+
+# Structured outputs, so replies always parse into the fields we read
+_CLASSIFICATION_PROPERTIES = {
+    "category": {"type": "string"},
+    "sub_category": {"type": "string"},
+    "reasoning": {"type": "string"}
+}
+CLASSIFICATION_RESPONSE_FORMAT = json_schema_format("classification", _CLASSIFICATION_PROPERTIES)
+BATCH_CLASSIFICATION_RESPONSE_FORMAT = batched_json_schema_format("classifications", _CLASSIFICATION_PROPERTIES)
+
 class MissingCategoryFixer:
     """Handles fixing missing categories for conversations"""
     
-    def __init__(self, storage: DuckDBStorage, api: UnthreadAPI):
+    def __init__(
+        self,
+        storage: DuckDBStorage,
+        api: UnthreadAPI,
+        requests_per_minute: Optional[int] = None,
+        tokens_per_minute: Optional[int] = None,
+        max_input_tokens: Optional[int] = DEFAULT_MAX_INPUT_TOKENS,
+        min_content_chars: int = DEFAULT_MIN_CONTENT_CHARS
+    ):
         """Initialize the fixer
         
         Args:
             storage: DuckDB storage instance
             api: Unthread API instance
+            requests_per_minute: OpenAI request limit to stay under (default: OPENAI_MAX_RPM, None: unlimited)
+            tokens_per_minute: OpenAI token limit to stay under (default: OPENAI_MAX_TPM, None: unlimited)
+            max_input_tokens: Conversation content tokens sent per classification (None: unlimited)
+            min_content_chars: Minimum conversation content length worth classifying with AI
         """
         self.storage = storage
         self.api = api
@@ -48,9 +107,21 @@ class MissingCategoryFixer:
         if openai_api_key:
             self.openai_client = OpenAI(api_key=openai_api_key)
         
+        # Shared across worker threads so the whole run stays under the account limits
+        requests_per_minute = requests_per_minute or int(os.getenv("OPENAI_MAX_RPM", 0))
+        tokens_per_minute = tokens_per_minute or int(os.getenv("OPENAI_MAX_TPM", 0))
+        self.request_limiter = TokenBucket(requests_per_minute / 60, requests_per_minute) if requests_per_minute else None
+        self.token_limiter = TokenBucket(tokens_per_minute / 60, tokens_per_minute) if tokens_per_minute else None
+        self.max_input_tokens = max_input_tokens
+        self.min_content_chars = min_content_chars
+        
+        # Loaded on first use by _count_tokens
+        self._encoding = None
+        
         logger.debug("MissingCategoryFixer initialized")
     
-    def extract_conversation_ids_from_log(self, log_file_path: str) -> List[str]:
+    @staticmethod
+    def extract_conversation_ids_from_log(log_file_path: str) -> List[str]:
         """Extract conversation IDs from migration log that resulted in empty categories
         
         Args:
@@ -62,16 +133,15 @@ class MissingCategoryFixer:
         conversation_ids = []
         
         try:
-            with open(log_file_path, 'r') as f:
-                for line in f:
-                    # Look for lines with 'None' + 'None' -> '' pattern
-                    if "'None' + 'None' -> ''" in line:
-                        # Extract conversation ID using regex
-                        match = re.search(r'Migrated ([a-f0-9-]+):', line)
-                        if match:
-                            conversation_id = match.group(1)
+            with open(log_file_path, 'rb') as f:
+                # mmap can't map an empty file
+                if os.fstat(f.fileno()).st_size:
+                    with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                        # One pass of the compiled pattern over the whole file
+                        for match in EMPTY_MIGRATION_PATTERN.finditer(mm):
+                            conversation_id = match.group(1).decode()
                             conversation_ids.append(conversation_id)
-                            logger.debug(f"Found conversation ID: {conversation_id}")
+                            logger.debug("Found conversation ID: %s", conversation_id)
             
             logger.info(f"Extracted {len(conversation_ids)} conversation IDs with missing categories")
             return conversation_ids
@@ -80,17 +150,36 @@ class MissingCategoryFixer:
             logger.error(f"Error extracting conversation IDs from log: {str(e)}")
             raise
     
-    def query_bigquery_for_categories(self, conversation_ids: List[str], batch_size: int = 100) -> Dict[str, Dict[str, Any]]:
+    def query_bigquery_for_categories(
+        self,
+        conversation_ids: List[str],
+        batch_size: int = BIGQUERY_BATCH_SIZE,
+        refresh_cache: bool = False
+    ) -> Dict[str, Dict[str, Any]]:
         """Query BigQuery for category information for given conversation IDs
         
+        The IDs are bound as an array parameter, so each batch is a single
+        query job regardless of its size. Results are cached in the local
+        bq_category_cache table for BIGQUERY_CACHE_MAX_AGE_HOURS, and only
+        IDs without a fresh cache entry are sent to BigQuery.
+        
         Args:
             conversation_ids: List of conversation IDs to query
-            batch_size: Number of IDs to query in each batch
+            batch_size: Number of IDs to query in each job
+            refresh_cache: Ignore cached results and query BigQuery for every ID
             
         Returns:
             Dictionary mapping conversation_id to category data
         """
+        # Sorted so each job covers a contiguous ID range of the table
+        conversation_ids = sorted(conversation_ids)
         results = {}
+        if not refresh_cache:
+            results = self.storage.get_cached_bq_categories(conversation_ids, BIGQUERY_CACHE_MAX_AGE_HOURS)
+            conversation_ids = [conversation_id for conversation_id in conversation_ids if conversation_id not in results]
+            logger.info(f"Found {len(results)} conversations in the BigQuery cache, querying {len(conversation_ids)}")
+            if not conversation_ids:
+                return results
         
         try:
             # Load BigQuery credentials from data/bq_connect.json
@@ -98,25 +187,26 @@ class MissingCategoryFixer:
             credentials = service_account.Credentials.from_service_account_file(credentials_path)
             client = bigquery.Client(credentials=credentials, project=credentials.project_id)
             
-            # Process in batches to avoid SQL IN clause limits
+            query = """
+            SELECT 
+                conversation_id,
+                ticket_category,
+                ticket_sub_category,
+                ticket_resolution
+            FROM dbt.stg_unthread__conversations uc
+            WHERE conversation_id IN UNNEST(@conversation_ids)
+            """
+            
+            # Batches only bound the request size; one job covers typical runs
             for i in range(0, len(conversation_ids), batch_size):
                 batch_ids = conversation_ids[i:i + batch_size]
-                id_list = "', '".join(batch_ids)
+                job_config = bigquery.QueryJobConfig(
+                    query_parameters=[bigquery.ArrayQueryParameter("conversation_ids", "STRING", batch_ids)]
+                )
                 
-                query = f"""
-                SELECT 
-                    conversation_id,
-                    ticket_category,
-                    ticket_sub_category,
-                    ticket_resolution
-                FROM dbt.stg_unthread__conversations uc
-                WHERE conversation_id IN ('{id_list}')
-                ORDER BY conversation_id DESC
-                """
-                
-                logger.debug(f"Querying BigQuery for batch {i//batch_size + 1} ({len(batch_ids)} IDs)")
-                query_job = client.query(query)
-                batch_results = query_job.result()
+                logger.debug("Querying BigQuery for batch %s (%s IDs)", i // batch_size + 1, len(batch_ids))
+                query_job = client.query(query, job_config=job_config)
+                batch_results = query_job.result(page_size=BIGQUERY_PAGE_SIZE)
                 
                 for row in batch_results:
                     conversation_id = row.conversation_id
@@ -125,9 +215,14 @@ class MissingCategoryFixer:
                         'ticket_sub_category': row.ticket_sub_category,
                         'ticket_resolution': row.ticket_resolution
                     }
-                    logger.debug(f"BigQuery result for {conversation_id}: {results[conversation_id]}")
-            
-            logger.debug(f"Retrieved category data for {len(results)} conversations from BigQuery")
+                    logger.debug("BigQuery result for %s: %s", conversation_id, results[conversation_id])
+            
+            self.storage.store_bq_categories({
+                conversation_id: results[conversation_id]
+                for conversation_id in conversation_ids
+                if conversation_id in results
+            })
+            logger.debug("Retrieved category data for %s conversations from BigQuery", len(results))
             return results
             
         except Exception as e:
@@ -148,7 +243,7 @@ class MissingCategoryFixer:
             response_data, _, _ = self.api.make_api_request(endpoint, method="GET")
             
             if response_data:
-                logger.debug(f"Retrieved conversation {conversation_id} from Unthread API")
+                logger.debug("Retrieved conversation %s from Unthread API", conversation_id)
                 return response_data
             else:
                 logger.warning(f"Conversation {conversation_id} not found in Unthread API")
@@ -167,31 +262,40 @@ class MissingCategoryFixer:
         Returns:
             Conversation content as string or None if not found
         """
+        return self.get_conversation_contents_from_storage([conversation_id]).get(conversation_id)
+    
+    def get_conversation_contents_from_storage(self, conversation_ids: List[str]) -> Dict[str, Optional[str]]:
+        """Get the content of several conversations from local storage in one query
+        
+        Args:
+            conversation_ids: Conversation IDs to fetch
+            
+        Returns:
+            Dictionary mapping conversation_id to its content, or None if not found
+        """
+        contents = dict.fromkeys(conversation_ids)
         try:
+            # Pull only the message contents out of the JSON blobs, inside DuckDB
             query = """
-                SELECT data FROM conversations 
-                WHERE id = ?
+                SELECT id, array_to_string(
+                    list_filter(json_extract_string(data, '$.messages[*].content'), content -> content <> ''),
+                    ?
+                )
+                FROM conversations 
+                WHERE id IN (SELECT unnest(?::VARCHAR[]))
             """
-            result = self.storage.conn.execute(query, [conversation_id]).fetchone()
-            
-            if result and result[0]:
-                conversation_data = json.loads(result[0])
-                messages = conversation_data.get('messages', [])
-                
-                # Extract message content
-                content_parts = []
-                for message in messages:
-                    if message.get('content'):
-                        content_parts.append(message['content'])
-                
-                return "\n<Next_Message>\n".join(content_parts)
-            else:
-                logger.warning(f"Conversation {conversation_id} not found in local storage")
-                return None
+            # May be called from worker threads: use the thread's own cursor
+            rows = self.storage.for_thread().conn.execute(query, [MESSAGE_SEPARATOR, list(conversation_ids)]).fetchall()
+            contents.update(rows)
                 
         except Exception as e:
-            logger.error(f"Error fetching conversation {conversation_id} from storage: {str(e)}")
-            return None
+            logger.error(f"Error fetching {len(conversation_ids)} conversations from storage: {str(e)}")
+            return contents
+        
+        for conversation_id, content in contents.items():
+            if content is None:
+                logger.warning(f"Conversation {conversation_id} not found in local storage")
+        return contents
     
     def classify_conversation_with_ai(self, conversation_content: str) -> Optional[Dict[str, str]]:
         """Use AI to classify conversation content
@@ -211,20 +315,12 @@ class MissingCategoryFixer:
             
             user_prompt = f"Please classify this support case:\n\n<Conversation>{conversation_content}</Conversation>"
             
-            response = self.openai_client.chat.completions.create(
-                model="gpt-4o",
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": user_prompt}
-                ]
-            )
-            
-            result_text = response.choices[0].message.content
+            result_text = self._create_completion(system_prompt, user_prompt, cases=1)
             
             # Parse JSON response
             try:
                 classification = json.loads(result_text)
-                logger.debug(f"AI classification result: {classification}")
+                logger.debug("AI classification result: %s", classification)
                 return classification
             except json.JSONDecodeError as e:
                 logger.error(f"Failed to parse AI classification response: {result_text}")
@@ -234,6 +330,163 @@ class MissingCategoryFixer:
             logger.error(f"Error in AI classification: {str(e)}")
             return None
     
+    def classify_conversations_batch(self, contents: List[str]) -> List[Optional[Dict[str, str]]]:
+        """Use AI to classify several conversations in a single request
+        
+        Cases missing from the response, or a response that can't be parsed,
+        fall back to classify_conversation_with_ai.
+        
+        Args:
+            contents: Conversation contents to classify
+            
+        Returns:
+            List with one classification (or None if it failed) per content, in order
+        """
+        if len(contents) <= 1 or not self.openai_client:
+            return [self.classify_conversation_with_ai(content) for content in contents]
+        
+        results: Dict[str, Any] = {}
+        try:
+            system_prompt = get_system_prompt("category") + BATCH_PROMPT_ADDENDUM
+            
+            cases = "".join(f'<Case id="{i}">{content}</Case>' for i, content in enumerate(contents))
+            user_prompt = f"Please classify each of these support cases:\n\n{cases}"
+            
+            result_text = self._create_completion(system_prompt, user_prompt, cases=len(contents))
+            
+            try:
+                classifications = json.loads(result_text).get('classifications', [])
+                results = {str(item.get('id')): item for item in classifications if isinstance(item, dict)}
+                logger.debug("AI batch classification returned %d of %d cases", len(results), len(contents))
+            except json.JSONDecodeError:
+                logger.error(f"Failed to parse AI batch classification response, classifying individually: {result_text}")
+                
+        except Exception as e:
+            logger.error(f"Error in AI batch classification, classifying individually: {str(e)}")
+        
+        return [
+            results[str(i)] if str(i) in results else self.classify_conversation_with_ai(content)
+            for i, content in enumerate(contents)
+        ]
+    
+    def _create_completion(self, system_prompt: str, user_prompt: str, cases: int) -> str:
+        """Send a classification request within the OpenAI limits, retrying on 429
+        
+        Args:
+            system_prompt: System prompt
+            user_prompt: User prompt containing the case(s)
+            cases: Number of cases in the prompt, used to reserve completion tokens
+            
+        Returns:
+            Response message content, following CLASSIFICATION_RESPONSE_FORMAT
+            (or BATCH_CLASSIFICATION_RESPONSE_FORMAT for several cases)
+        """
+        messages = [
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": user_prompt}
+        ]
+        tokens = 0
+        if self.token_limiter:
+            tokens = self._count_tokens(system_prompt + user_prompt) + CLASSIFICATION_RESPONSE_TOKENS * cases
+        
+        for attempt in range(1, CLASSIFICATION_ATTEMPTS + 1):
+            self._acquire_openai_capacity(tokens)
+            try:
+                response = self.openai_client.chat.completions.create(
+                    model=CLASSIFICATION_MODEL,
+                    messages=messages,
+                    response_format=CLASSIFICATION_RESPONSE_FORMAT if cases == 1 else BATCH_CLASSIFICATION_RESPONSE_FORMAT
+                )
+                return response.choices[0].message.content
+            except RateLimitError as e:
+                if attempt == CLASSIFICATION_ATTEMPTS:
+                    raise
+                retry_after = float(e.response.headers.get("retry-after", 1))
+                logger.warning(f"OpenAI rate limit hit, retrying in {retry_after}s (attempt {attempt}/{CLASSIFICATION_ATTEMPTS})")
+                self._pause_openai_requests(retry_after)
+    
+    def truncate_content(self, content: Optional[str]) -> Optional[str]:
+        """Fit conversation content into max_input_tokens
+        
+        Whole messages are kept alternately from the start and the end (the
+        opening request and the resolution matter most for classification)
+        until the budget is used; the messages in between are replaced by a
+        marker.
+        
+        Args:
+            content: Conversation content from get_conversation_content_from_storage
+            
+        Returns:
+            Content within the token budget (unchanged if it already fits)
+        """
+        if not content or not self.max_input_tokens or self._count_tokens(content) <= self.max_input_tokens:
+            return content
+        
+        messages = content.split(MESSAGE_SEPARATOR)
+        head, tail = [], []
+        budget = self.max_input_tokens
+        start, end = 0, len(messages) - 1
+        take_start = True
+        while start <= end:
+            index = start if take_start else end
+            tokens = self._count_tokens(messages[index]) + 1
+            if tokens > budget:
+                break
+            budget -= tokens
+            if take_start:
+                head.append(messages[start])
+                start += 1
+            else:
+                tail.insert(0, messages[end])
+                end -= 1
+            take_start = not take_start
+        
+        if not head:
+            # The opening message alone is over budget: keep its first tokens
+            head = [self._encoding.decode(self._encoding.encode(messages[0])[:self.max_input_tokens])]
+            start = 1
+        
+        omitted = end - start + 1
+        logger.debug("Truncated conversation content: omitted %s of %s messages", omitted, len(messages))
+        marker = [f"[{omitted} messages omitted]"] if omitted > 0 else []
+        return MESSAGE_SEPARATOR.join(head + marker + tail)
+    
+    def _count_tokens(self, text: str) -> int:
+        """Count prompt tokens for the classification model
+        
+        Args:
+            text: Text to count
+            
+        Returns:
+            Number of tokens
+        """
+        if self._encoding is None:
+            self._encoding = tiktoken.encoding_for_model(CLASSIFICATION_MODEL)
+        return len(self._encoding.encode(text))
+    
+    def _acquire_openai_capacity(self, tokens: int):
+        """Wait until a request of the given size fits under the OpenAI limits
+        
+        Args:
+            tokens: Estimated prompt plus completion tokens of the request
+        """
+        if self.request_limiter:
+            self.request_limiter.acquire()
+        if self.token_limiter:
+            self.token_limiter.acquire(tokens)
+    
+    def _pause_openai_requests(self, seconds: float):
+        """Hold back all OpenAI requests after a 429, or sleep if no limiter is configured
+        
+        Args:
+            seconds: Cooldown from the Retry-After header
+        """
+        limiters = [limiter for limiter in (self.request_limiter, self.token_limiter) if limiter]
+        if not limiters:
+            time.sleep(seconds)
+        for limiter in limiters:
+            limiter.block(seconds)
+    
     def create_migration_category(self, category: str, sub_category: str) -> str:
         """Create migration category string from category and sub_category
         
@@ -299,19 +552,278 @@ class MissingCategoryFixer:
             logger.error(f"Error updating conversation {conversation_id}: {str(e)}")
             return False
     
-    def process_conversations(self, conversation_ids: List[str], batch_size: int = 100, limit: Optional[int] = None) -> Dict[str, Any]:
+    def find_category_data(
+        self,
+        conversation_id: str,
+        bigquery_data: Dict[str, Dict[str, Any]],
+        listed: Optional[Dict[str, Dict[str, Any]]] = None
+    ) -> Tuple[str, Dict[str, Any]]:
+        """Look up existing category data for a conversation
+        
+        Args:
+            conversation_id: Conversation ID to look up
+            bigquery_data: Category data from query_bigquery_for_categories
+            listed: Conversations prefetched with UnthreadAPI.get_conversations_bulk;
+                others (or ones listed without ticketTypeFields) are fetched individually
+            
+        Returns:
+            Tuple of the data source ("bigquery", "unthread_api" or "none") and the category data
+        """
+        # Try BigQuery data first
+        if conversation_id in bigquery_data:
+            bq_data = bigquery_data[conversation_id]
+            if bq_data.get('ticket_category') and bq_data['ticket_category'] != 'None':
+                return "bigquery", {
+                    'category': bq_data['ticket_category'],
+                    'sub_category': bq_data['ticket_sub_category'],
+                    'resolution': bq_data['ticket_resolution'],
+                    'migration_category': self.create_migration_category(
+                        bq_data['ticket_category'], 
+                        bq_data['ticket_sub_category']
+                    )
+                }
+        
+        # Try Unthread API if no BigQuery data
+        unthread_data = (listed or {}).get(conversation_id)
+        if not unthread_data or 'ticketTypeFields' not in unthread_data:
+            unthread_data = self.get_conversation_from_unthread(conversation_id)
+        if unthread_data:
+            # Extract category fields from Unthread response
+            ticket_type_fields = unthread_data.get('ticketTypeFields', {})
+            category = ticket_type_fields.get(CATEGORY_FIELD_ID)
+            sub_category = ticket_type_fields.get(SUB_CATEGORY_FIELD_ID)
+            
+            if category and category != 'None':
+                return "unthread_api", {
+                    'category': category,
+                    'sub_category': sub_category,
+                    'resolution': ticket_type_fields.get(RESOLUTION_FIELD_ID),
+                    'migration_category': self.create_migration_category(category, sub_category)
+                }
+        
+        return "none", {}
+    
+    def _list_from_unthread(self, conversation_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Prefetch conversations from the Unthread list endpoint
+        
+        Args:
+            conversation_ids: IDs of the conversations to fetch
+            
+        Returns:
+            Dictionary mapping conversation ID to its listed data (empty if listing failed)
+        """
+        if not conversation_ids:
+            return {}
+        try:
+            return self.api.get_conversations_bulk(conversation_ids)
+        except Exception as e:
+            logger.warning(f"Bulk conversation lookup failed, fetching individually: {str(e)}")
+            return {}
+    
+    def classify_missing_with_ai(
+        self,
+        conversation_ids: List[str],
+        executor: ThreadPoolExecutor,
+        use_batch_api: bool = False,
+        ignore_ai_cache: bool = False
+    ) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        """Classify conversations without category data using batched AI requests
+        
+        Classifications are cached in the local ai_classification_cache table
+        by content hash, so unchanged conversations are only sent once.
+        
+        Args:
+            conversation_ids: Conversation IDs to classify from local storage
+            executor: Executor used to load content and run the batches concurrently
+            use_batch_api: Submit the classifications as an OpenAI Batch API job instead
+            ignore_ai_cache: Classify every conversation again instead of using cached results
+            
+        Yields:
+            Tuples of (conversation_id, category data) for every classified
+            conversation, as soon as its batch completes
+        """
+        if not self.openai_client:
+            logger.warning("OpenAI client not available, skipping AI classification")
+            return
+        
+        stored = self.get_conversation_contents_from_storage(conversation_ids)
+        contents = executor.map(self.truncate_content, (stored[conversation_id] for conversation_id in conversation_ids))
+        cases = [
+            (conversation_id, content)
+            for conversation_id, content in zip(conversation_ids, contents)
+            if content and len(content.strip()) >= self.min_content_chars
+        ]
+        if len(cases) < len(conversation_ids):
+            logger.info(f"Skipping AI classification for {len(conversation_ids) - len(cases)} conversations with no or too little content")
+        hashes = {conversation_id: self._content_hash(content) for conversation_id, content in cases}
+        
+        cached = {}
+        if not ignore_ai_cache:
+            cached = self.storage.get_cached_ai_classifications(list(set(hashes.values())), CLASSIFICATION_MODEL)
+            logger.info(f"Found {sum(1 for h in hashes.values() if h in cached)} AI classifications in the cache")
+        
+        for conversation_id, content_hash in hashes.items():
+            if content_hash in cached:
+                yield conversation_id, self._ai_category_data(cached[content_hash])
+        cases = [(conversation_id, content) for conversation_id, content in cases if hashes[conversation_id] not in cached]
+        if not cases:
+            return
+        
+        if use_batch_api:
+            classified = self.classify_with_batch_api(cases).items()
+        else:
+            futures = {
+                executor.submit(self.classify_conversations_batch, [content for _, content in batch]): batch
+                for batch in self._ai_batches(cases)
+            }
+            classified = (
+                (conversation_id, classification)
+                for future in as_completed(futures)
+                for (conversation_id, _), classification in zip(futures[future], future.result())
+            )
+        
+        for conversation_id, classification in classified:
+            if classification:
+                self.storage.store_ai_classifications({hashes[conversation_id]: classification}, CLASSIFICATION_MODEL)
+                yield conversation_id, self._ai_category_data(classification)
+    
+    def _ai_category_data(self, classification: Dict[str, Any]) -> Dict[str, Any]:
+        """Build category data from an AI classification
+        
+        Args:
+            classification: Classification with category and sub_category
+            
+        Returns:
+            Category data for update_conversation_in_unthread
+        """
+        return {
+            'category': classification.get('category'),
+            'sub_category': classification.get('sub_category'),
+            'migration_category': self.create_migration_category(
+                classification.get('category'),
+                classification.get('sub_category')
+            )
+        }
+    
+    @staticmethod
+    def _content_hash(content: str) -> str:
+        """Hash conversation content as the AI classification cache key
+        
+        Args:
+            content: Conversation content
+            
+        Returns:
+            Hex digest of the content
+        """
+        return hashlib.blake2b(content.encode(), digest_size=16).hexdigest()
+    
+    def classify_with_batch_api(self, cases: List[Tuple[str, str]]) -> Dict[str, Dict[str, str]]:
+        """Classify conversations through the OpenAI Batch API
+        
+        The call blocks until the batch jobs finish (up to their 24h completion
+        window); jobs cost half of inline requests and don't count against the
+        interactive rate limits.
+        
+        Args:
+            cases: List of (conversation_id, content) tuples
+            
+        Returns:
+            Dictionary mapping conversation_id to classification for every case that succeeded
+        """
+        system_prompt = get_system_prompt("category")
+        classifications = run_batch_job(self.openai_client, {
+            conversation_id: {
+                "model": CLASSIFICATION_MODEL,
+                "response_format": CLASSIFICATION_RESPONSE_FORMAT,
+                "messages": [
+                    {"role": "system", "content": system_prompt},
+                    {"role": "user", "content": f"Please classify this support case:\n\n<Conversation>{content}</Conversation>"}
+                ]
+            }
+            for conversation_id, content in cases
+        })
+        logger.info(f"OpenAI Batch API classified {len(classifications)} of {len(cases)} conversations")
+        return classifications
+    
+    def _ai_batches(self, cases: List[Tuple[str, str]]) -> List[List[Tuple[str, str]]]:
+        """Split cases into batches that fit AI_BATCH_SIZE and AI_BATCH_MAX_TOKENS
+        
+        Args:
+            cases: List of (conversation_id, content) tuples
+            
+        Returns:
+            List of batches, each a list of (conversation_id, content) tuples
+        """
+        batches = []
+        batch = []
+        batch_tokens = 0
+        for case in cases:
+            tokens = self._count_tokens(case[1])
+            if batch and (len(batch) >= AI_BATCH_SIZE or batch_tokens + tokens > AI_BATCH_MAX_TOKENS):
+                batches.append(batch)
+                batch = []
+                batch_tokens = 0
+            batch.append(case)
+            batch_tokens += tokens
+        if batch:
+            batches.append(batch)
+        return batches
+    
+    def update_category(self, conversation_id: str, data_source: str, category_data: Dict[str, Any]) -> bool:
+        """Write category data to Unthread and log the outcome
+        
+        Args:
+            conversation_id: Conversation ID to update
+            data_source: Where the category data came from
+            category_data: Category data to write
+            
+        Returns:
+            True if update was successful, False otherwise
+        """
+        success = self.update_conversation_in_unthread(conversation_id, category_data)
+        if success:
+            logger.info(f"Processed {conversation_id}: updated using {data_source}")
+        else:
+            logger.error(f"Processed {conversation_id}: failed to update")
+        return success
+    
+    def process_conversations(
+        self,
+        conversation_ids: List[str],
+        batch_size: int = BIGQUERY_BATCH_SIZE,
+        limit: Optional[int] = None,
+        max_workers: int = 5,
+        use_batch_api: bool = False,
+        refresh_cache: bool = False,
+        ignore_ai_cache: bool = False,
+        resume: bool = True
+    ) -> Dict[str, Any]:
         """Process conversations to fix missing categories
         
+        Lookups and updates run concurrently since they mostly wait on the
+        network; conversations that need AI classification are sent to OpenAI
+        several at a time. Each update is queued as soon as its category data
+        is known, so writes overlap with the remaining lookups and classification.
+        
         Args:
             conversation_ids: List of conversation IDs to process
             batch_size: Batch size for BigQuery queries
             limit: Maximum number of conversations to process (None for all)
+            max_workers: Maximum number of conversations processed in parallel
+            use_batch_api: Classify through the OpenAI Batch API (cheaper, but may take hours)
+            refresh_cache: Query BigQuery for every ID instead of using cached results
+            ignore_ai_cache: Classify with AI again instead of using cached classifications
+            resume: Skip conversations a previous run already updated successfully
             
         Returns:
             Dictionary with processing statistics
         """
+        # Retried migrations log the same conversation more than once
+        unique_ids = list(dict.fromkeys(conversation_ids))
         stats = {
-            'total_conversations': len(conversation_ids),
+            'total_conversations': len(unique_ids),
+            'duplicates_removed': len(conversation_ids) - len(unique_ids),
+            'already_fixed': 0,
             'bigquery_found': 0,
             'unthread_api_found': 0,
             'ai_classified': 0,
@@ -319,6 +831,15 @@ class MissingCategoryFixer:
             'failed': 0,
             'no_data_found': 0
         }
+        conversation_ids = unique_ids
+        
+        # Progress is recorded as updates finish, so an interrupted run picks up where it stopped
+        if resume:
+            fixed = self.storage.get_fixed_conversation_ids(conversation_ids)
+            if fixed:
+                conversation_ids = [conversation_id for conversation_id in conversation_ids if conversation_id not in fixed]
+                stats['already_fixed'] = len(fixed)
+                logger.info(f"Skipping {len(fixed)} conversations already fixed by a previous run")
         
         # Apply limit if specified
         if limit and limit > 0:
@@ -328,77 +849,59 @@ class MissingCategoryFixer:
         logger.info(f"Starting to process {len(conversation_ids)} conversations")
         
         # Step 1: Query BigQuery for category data
-        bigquery_data = self.query_bigquery_for_categories(conversation_ids, batch_size)
+        bigquery_data = self.query_bigquery_for_categories(conversation_ids, batch_size, refresh_cache)
         stats['bigquery_found'] = len(bigquery_data)
         
-        # Step 2: Process each conversation
-        for conversation_id in conversation_ids:
-            category_data = {}
-            data_source = "none"
-            
-            # Try BigQuery data first
-            if conversation_id in bigquery_data:
-                bq_data = bigquery_data[conversation_id]
-                if bq_data.get('ticket_category') and bq_data['ticket_category'] != 'None':
-                    category_data = {
-                        'category': bq_data['ticket_category'],
-                        'sub_category': bq_data['ticket_sub_category'],
-                        'resolution': bq_data['ticket_resolution'],
-                        'migration_category': self.create_migration_category(
-                            bq_data['ticket_category'], 
-                            bq_data['ticket_sub_category']
-                        )
-                    }
-                    data_source = "bigquery"
-            
-            # Try Unthread API if no BigQuery data
-            if not category_data:
-                unthread_data = self.get_conversation_from_unthread(conversation_id)
-                if unthread_data:
-                    # Extract category fields from Unthread response
-                    ticket_type_fields = unthread_data.get('ticketTypeFields', {})
-                    category = ticket_type_fields.get(CATEGORY_FIELD_ID)
-                    sub_category = ticket_type_fields.get(SUB_CATEGORY_FIELD_ID)
-                    
-                    if category and category != 'None':
-                        category_data = {
-                            'category': category,
-                            'sub_category': sub_category,
-                            'resolution': ticket_type_fields.get(RESOLUTION_FIELD_ID),
-                            'migration_category': self.create_migration_category(category, sub_category)
-                        }
-                        data_source = "unthread_api"
-                        stats['unthread_api_found'] += 1
-            
-            # Try AI classification if no data found
-            if not category_data:
-                conversation_content = self.get_conversation_content_from_storage(conversation_id)
-                if conversation_content:
-                    ai_classification = self.classify_conversation_with_ai(conversation_content)
-                    if ai_classification:
-                        category_data = {
-                            'category': ai_classification.get('category'),
-                            'sub_category': ai_classification.get('sub_category'),
-                            'migration_category': self.create_migration_category(
-                                ai_classification.get('category'),
-                                ai_classification.get('sub_category')
-                            )
-                        }
-                        data_source = "ai"
-                        stats['ai_classified'] += 1
-            
-            # Update conversation if we have data
-            if category_data:
-                success = self.update_conversation_in_unthread(conversation_id, category_data)
-                if success:
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            updates = {}
+            
+            # Step 2: Fall back to the Unthread API for conversations BigQuery doesn't cover,
+            # listing them in bulk where possible
+            listed = self._list_from_unthread([
+                conversation_id for conversation_id in conversation_ids
+                if bigquery_data.get(conversation_id, {}).get('ticket_category') in (None, '', 'None')
+            ])
+            lookups = {
+                executor.submit(self.find_category_data, conversation_id, bigquery_data, listed): conversation_id
+                for conversation_id in conversation_ids
+            }
+            missing = []
+            for future in as_completed(lookups):
+                data_source, category_data = future.result()
+                if not category_data:
+                    missing.append(lookups[future])
+                    continue
+                if data_source == "unthread_api":
+                    stats['unthread_api_found'] += 1
+                updates[executor.submit(self.update_category, lookups[future], data_source, category_data)] = (lookups[future], data_source)
+            
+            # Step 3: Classify whatever is still missing with AI
+            classified = set()
+            if missing:
+                for conversation_id, category_data in self.classify_missing_with_ai(missing, executor, use_batch_api, ignore_ai_cache):
+                    classified.add(conversation_id)
+                    stats['ai_classified'] += 1
+                    updates[executor.submit(self.update_category, conversation_id, "ai", category_data)] = (conversation_id, "ai")
+            
+            for conversation_id in missing:
+                if conversation_id not in classified:
+                    logger.warning(f"Processed {conversation_id}: no category data found")
+                    stats['no_data_found'] += 1
+            
+            # Step 4: Wait for the updates to Unthread
+            progress = []
+            for future in as_completed(updates):
+                conversation_id, data_source = updates[future]
+                if future.result():
                     stats['updated_successfully'] += 1
-                    logger.info(f"Processed {conversation_id}: updated using {data_source}")
+                    progress.append((conversation_id, "updated", data_source))
                 else:
                     stats['failed'] += 1
-                    logger.error(f"Processed {conversation_id}: failed to update")
-            else:
-                stats['no_data_found'] += 1
-                logger.warning(f"Processed {conversation_id}: no category data found")
+                    progress.append((conversation_id, "failed", data_source))
+                if len(progress) >= PROGRESS_FLUSH_SIZE:
+                    self.storage.store_category_fix_progress(progress)
+                    progress = []
+            self.storage.store_category_fix_progress(progress)
         
         logger.info(f"Processing complete. Stats: {stats}")
         return stats
@@ -414,8 +917,22 @@ def main():
                        help='Path to migration log file (default: logs/migrate_categories.log)')
     parser.add_argument('--limit', '-n', type=int,
                        help='Limit number of conversations to process')
-    parser.add_argument('--batch-size', '-b', type=int, default=100,
-                       help='Batch size for BigQuery queries (default: 100)')
+    parser.add_argument('--batch-size', '-b', type=int, default=BIGQUERY_BATCH_SIZE,
+                       help=f'Conversation IDs per BigQuery query (default: {BIGQUERY_BATCH_SIZE})')
+    parser.add_argument('--max-workers', '-w', type=int, default=5,
+                       help='Maximum number of conversations processed in parallel (default: 5)')
+    parser.add_argument('--use-batch-api', action='store_true',
+                       help='Classify through the OpenAI Batch API (half the cost, results within 24h)')
+    parser.add_argument('--refresh-cache', action='store_true',
+                       help='Query BigQuery for every conversation instead of using cached results')
+    parser.add_argument('--max-input-tokens', type=int, default=DEFAULT_MAX_INPUT_TOKENS,
+                       help=f'Conversation tokens sent per AI classification (default: {DEFAULT_MAX_INPUT_TOKENS})')
+    parser.add_argument('--min-content-chars', type=int, default=DEFAULT_MIN_CONTENT_CHARS,
+                       help=f'Minimum conversation text length sent to AI classification (default: {DEFAULT_MIN_CONTENT_CHARS})')
+    parser.add_argument('--no-resume', dest='resume', action='store_false',
+                       help='Process conversations a previous run already fixed again')
+    parser.add_argument('--ignore-ai-cache', action='store_true',
+                       help='Classify with AI again instead of using cached classifications')
     
     args = parser.parse_args()
     
@@ -433,7 +950,12 @@ def main():
     api = UnthreadAPI(config.api_key, config.api_base_url)
     
     # Initialize fixer
-    fixer = MissingCategoryFixer(storage, api)
+    fixer = MissingCategoryFixer(
+        storage,
+        api,
+        max_input_tokens=args.max_input_tokens,
+        min_content_chars=args.min_content_chars
+    )
     
     if args.conversation_id:
         # Test with specific conversation ID
@@ -451,7 +973,12 @@ def main():
     stats = fixer.process_conversations(
         conversation_ids, 
         batch_size=args.batch_size,
-        limit=args.limit
+        limit=args.limit,
+        max_workers=args.max_workers,
+        use_batch_api=args.use_batch_api,
+        refresh_cache=args.refresh_cache,
+        ignore_ai_cache=args.ignore_ai_cache,
+        resume=args.resume
     )
     
     # Log summary
@@ -459,6 +986,8 @@ def main():
     logger.info("PROCESSING SUMMARY")
     logger.info("="*50)
     logger.info(f"Total conversations processed: {stats['total_conversations']}")
+    logger.info(f"Duplicate IDs skipped: {stats['duplicates_removed']}")
+    logger.info(f"Already fixed by a previous run: {stats['already_fixed']}")
     logger.info(f"Found in BigQuery: {stats['bigquery_found']}")
     logger.info(f"Found in Unthread API: {stats['unthread_api_found']}")
     logger.info(f"Classified with AI: {stats['ai_classified']}")
@@ -5,7 +5,8 @@ Migration tool for ticket categories
 import os
 import json
 import logging
-from typing import List, Dict, Any, Optional
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import List, Dict, Any, Optional, Tuple, Iterator
 from dotenv import load_dotenv
 from .storage import DuckDBStorage
 from .api import UnthreadAPI
@@ -21,75 +22,114 @@ CATEGORY_FIELD_ID = "1a6900f6-36d2-4380-ad06-790b0b05c4b3"
 SUB_CATEGORY_FIELD_ID = "05492140-551c-49ea-a8a2-4caeec8cda4d"
 MIGRATION_CATEGORY_FIELD_ID = "0598cba1-31d1-466e-bfd1-812548c73c51"
 
+# Category fields extracted from the conversation JSON inside DuckDB
+CATEGORY_SQL = f"""json_extract_string(c.data, '$.ticketTypeFields."{CATEGORY_FIELD_ID}"')"""
+SUB_CATEGORY_SQL = f"""json_extract_string(c.data, '$.ticketTypeFields."{SUB_CATEGORY_FIELD_ID}"')"""
+
+# Same rule as CategoryMigrator.create_migration_category, evaluated in the projection
+MIGRATION_CATEGORY_SQL = f"""
+    CASE WHEN {CATEGORY_SQL} <> '' AND {SUB_CATEGORY_SQL} <> ''
+        THEN {CATEGORY_SQL} || ' - ' || {SUB_CATEGORY_SQL}
+        ELSE COALESCE(NULLIF({CATEGORY_SQL}, ''), {SUB_CATEGORY_SQL}, '')
+    END
+"""
+
+# Ticket columns extracted from the conversation JSON inside DuckDB
+TICKET_COLUMNS = f"""
+    c.id AS conversation_id,
+    json_extract(c.data, '$.ticketTypeFields') AS ticket_type_fields,
+    {CATEGORY_SQL} AS category,
+    {SUB_CATEGORY_SQL} AS sub_category,
+    {MIGRATION_CATEGORY_SQL} AS migration_category
+"""
+
+# Tickets updated in parallel within a batch
+DEFAULT_MAX_WORKERS = 5
+
 class CategoryMigrator:
     """Handles migration of ticket categories"""
     
-    def __init__(self, storage: DuckDBStorage, api: UnthreadAPI):
+    def __init__(self, storage: DuckDBStorage, api: UnthreadAPI, max_workers: int = DEFAULT_MAX_WORKERS):
         """Initialize the migrator
         
         Args:
             storage: DuckDB storage instance
             api: Unthread API instance
+            max_workers: Number of tickets updated in parallel
         """
         self.storage = storage
         self.api = api
+        self.max_workers = max_workers
         logger.info("CategoryMigrator initialized with storage and API instances")
-        logger.debug(f"Using field IDs - Category: {CATEGORY_FIELD_ID}, Sub-category: {SUB_CATEGORY_FIELD_ID}, Migration: {MIGRATION_CATEGORY_FIELD_ID}")
+        logger.debug("Using field IDs - Category: %s, Sub-category: %s, Migration: %s", CATEGORY_FIELD_ID, SUB_CATEGORY_FIELD_ID, MIGRATION_CATEGORY_FIELD_ID)
     
-    def get_tickets_with_pagination(self, page_size: int = 50, offset: int = 0) -> List[Dict[str, Any]]:
-        """Get tickets from DuckDB with pagination
+    def preview_migration(self, limit: int = 50) -> List[Dict[str, Any]]:
+        """Compute migration categories for the first tickets without decoding any JSON
+        
+        Only the category, sub-category and migration category strings are
+        selected, so a dry run never parses the ticket type fields in Python.
         
         Args:
-            page_size: Number of tickets to fetch per page
-            offset: Number of tickets to skip
+            limit: Number of tickets to preview
             
         Returns:
-            List of ticket data dictionaries
+            List of dictionaries with conversation_id, category, sub_category and migration_category
         """
-        logger.debug(f"Fetching tickets with pagination - page_size: {page_size}, offset: {offset}")
-        
-        query = """
-            SELECT 
-                c.id as conversation_id,
-                c.data as conversation_data
+        query = f"""
+            SELECT c.id, {CATEGORY_SQL}, {SUB_CATEGORY_SQL}, {MIGRATION_CATEGORY_SQL}
             FROM conversations c
             WHERE c.data IS NOT NULL
             ORDER BY c.id
-            LIMIT ? OFFSET ?
+            LIMIT ?
         """
         
         try:
-            logger.debug(f"Executing query with parameters: page_size={page_size}, offset={offset}")
-            results = self.storage.conn.execute(query, [page_size, offset]).fetchall()
-            tickets = []
-            
-            logger.debug(f"Raw query returned {len(results)} rows")
-            
-            for row in results:
-                conversation_id = row[0]
-                conversation_data = json.loads(row[1]) if row[1] else {}
-                
-                # Extract ticket type fields
-                ticket_type_fields = conversation_data.get('ticketTypeFields', {})
-                
-                ticket = {
+            rows = self.storage.conn.execute(query, [limit]).fetchall()
+            logger.debug("Previewing migration for %s tickets", len(rows))
+            return [
+                {
                     'conversation_id': conversation_id,
-                    'conversation_data': conversation_data,
-                    'ticket_type_fields': ticket_type_fields,
-                    'category': ticket_type_fields.get(CATEGORY_FIELD_ID),
-                    'sub_category': ticket_type_fields.get(SUB_CATEGORY_FIELD_ID),
+                    'category': category,
+                    'sub_category': sub_category,
+                    'migration_category': migration_category,
                 }
-                tickets.append(ticket)
-                
-                logger.debug(f"Processed ticket {conversation_id}: category='{ticket['category']}', sub_category='{ticket['sub_category']}'")
-            
-            logger.debug(f"Retrieved {len(tickets)} tickets (offset: {offset}, limit: {page_size})")
-            return tickets
+                for conversation_id, category, sub_category, migration_category in rows
+            ]
             
         except Exception as e:
-            logger.error(f"Error retrieving tickets with pagination: {str(e)}")
+            logger.error(f"Error previewing migration: {str(e)}")
             raise
     
+    def iter_ticket_batches(self, batch_size: int = 50) -> Iterator[List[Dict[str, Any]]]:
+        """Stream all tickets from DuckDB in batches, ordered by conversation ID
+        
+        A single query is scanned once and read batch_size rows at a time
+        through a dedicated cursor, instead of issuing one query per page.
+        
+        Args:
+            batch_size: Number of tickets per batch
+            
+        Yields:
+            Lists of ticket data dictionaries
+        """
+        query = f"""
+            SELECT {TICKET_COLUMNS}
+            FROM conversations c
+            WHERE c.data IS NOT NULL
+            ORDER BY c.id
+        """
+        cursor = self.storage.conn.cursor()
+        try:
+            cursor.execute(query)
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                logger.debug("Fetched %s tickets from the stream", len(rows))
+                yield self._tickets_from_rows(rows)
+        finally:
+            cursor.close()
+    
     def get_tickets_by_ids(self, conversation_ids: List[str]) -> List[Dict[str, Any]]:
         """Get specific tickets by their conversation IDs
         
@@ -103,48 +143,27 @@ class CategoryMigrator:
             logger.debug("No conversation IDs provided, returning empty list")
             return []
         
-        logger.debug(f"Fetching {len(conversation_ids)} specific tickets by IDs")
-        logger.debug(f"Conversation IDs: {conversation_ids}")
+        logger.debug("Fetching %s specific tickets by IDs", len(conversation_ids))
+        logger.debug("Conversation IDs: %s", conversation_ids)
         
-        # Create placeholders for the IN clause
-        placeholders = ','.join(['?' for _ in conversation_ids])
         query = f"""
-            SELECT 
-                c.id as conversation_id,
-                c.data as conversation_data
+            SELECT {TICKET_COLUMNS}
             FROM conversations c
-            WHERE c.id IN ({placeholders})
-            AND c.data IS NOT NULL
+            -- Hash join against the ID list rather than an IN list
+            JOIN (SELECT DISTINCT unnest($ids::VARCHAR[]) AS id) ids ON ids.id = c.id
+            WHERE c.data IS NOT NULL
         """
         
         try:
-            logger.debug(f"Executing query for specific tickets with {len(conversation_ids)} IDs")
-            results = self.storage.conn.execute(query, conversation_ids).fetchall()
-            tickets = []
+            logger.debug("Executing query for specific tickets with %s IDs", len(conversation_ids))
+            results = self.storage.conn.execute(query, {"ids": list(conversation_ids)}).fetchall()
             
-            logger.debug(f"Query returned {len(results)} results for {len(conversation_ids)} requested IDs")
+            logger.debug("Query returned %s results for %s requested IDs", len(results), len(conversation_ids))
+            tickets = self._tickets_from_rows(results)
             
-            for row in results:
-                conversation_id = row[0]
-                conversation_data = json.loads(row[1]) if row[1] else {}
-                
-                # Extract ticket type fields
-                ticket_type_fields = conversation_data.get('ticketTypeFields', {})
-                
-                ticket = {
-                    'conversation_id': conversation_id,
-                    'conversation_data': conversation_data,
-                    'ticket_type_fields': ticket_type_fields,
-                    'category': ticket_type_fields.get(CATEGORY_FIELD_ID),
-                    'sub_category': ticket_type_fields.get(SUB_CATEGORY_FIELD_ID),
-                }
-                tickets.append(ticket)
-                
-                logger.debug(f"Processed specific ticket {conversation_id}: category='{ticket['category']}', sub_category='{ticket['sub_category']}'")
-            
-            logger.debug(f"Retrieved {len(tickets)} tickets for {len(conversation_ids)} requested IDs")
-            if len(tickets) != len(conversation_ids):
-                missing_ids = set(conversation_ids) - {t['conversation_id'] for t in tickets}
+            logger.debug("Retrieved %s tickets for %s requested IDs", len(tickets), len(conversation_ids))
+            missing_ids = set(conversation_ids) - {t['conversation_id'] for t in tickets}
+            if missing_ids:
                 logger.warning(f"Missing {len(missing_ids)} tickets: {missing_ids}")
             
             return tickets
@@ -153,6 +172,30 @@ class CategoryMigrator:
             logger.error(f"Error retrieving tickets by IDs: {str(e)}")
             raise
     
+    def _tickets_from_rows(self, rows: List[Tuple[str, Optional[str], Optional[str], Optional[str], str]]) -> List[Dict[str, Any]]:
+        """Build ticket dictionaries from rows selected with TICKET_COLUMNS
+        
+        Args:
+            rows: (conversation_id, ticket_type_fields JSON, category, sub_category, migration_category) rows
+            
+        Returns:
+            List of ticket data dictionaries
+        """
+        tickets = []
+        for conversation_id, ticket_type_fields, category, sub_category, migration_category in rows:
+            ticket = {
+                'conversation_id': conversation_id,
+                # Only the ticket type fields are decoded; they are sent back on update
+                'ticket_type_fields': (json.loads(ticket_type_fields) if ticket_type_fields else None) or {},
+                'category': category,
+                'sub_category': sub_category,
+                'migration_category': migration_category,
+            }
+            tickets.append(ticket)
+            
+            logger.debug("Processed ticket %s: category='%s', sub_category='%s'", conversation_id, category, sub_category)
+        return tickets
+    
     def create_migration_category(self, category: Optional[str], sub_category: Optional[str]) -> str:
         """Create migration category based on category and sub-category
         
@@ -163,26 +206,7 @@ class CategoryMigrator:
         Returns:
             Migration category string (empty if both fields are blank)
         """
-        logger.debug(f"Creating migration category from category='{category}', sub_category='{sub_category}'")
-        
-        # If both fields are blank, return empty string
-        if not category and not sub_category:
-            logger.debug("Both category and sub_category are empty, returning empty string")
-            return ""
-        
-        # If both fields have values, combine them
-        if category and sub_category:
-            migration_category = f"{category} - {sub_category}"
-            logger.debug(f"Combined category and sub_category: '{migration_category}'")
-            return migration_category
-        # If only category has value, return just category
-        elif category:
-            logger.debug(f"Using category only: '{category}'")
-            return category
-        # If only sub_category has value, return just sub_category
-        else:
-            logger.debug(f"Using sub_category only: '{sub_category}'")
-            return sub_category
+        return f"{category} - {sub_category}" if category and sub_category else (category or sub_category or "")
     
     def update_ticket_fields(self, conversation_id: str, migration_category: str, existing_fields: Dict[str, Any]) -> bool:
         """Update ticket fields in Unthread via API
@@ -190,28 +214,27 @@ class CategoryMigrator:
         Args:
             conversation_id: The conversation ID to update
             migration_category: The migration category value to set
-            existing_fields: Existing ticketTypeFields to preserve
+            existing_fields: Existing ticketTypeFields to preserve (updated in place)
             
         Returns:
             True if successful, False otherwise
         """
-        logger.debug(f"Updating ticket fields for conversation {conversation_id}")
-        logger.debug(f"Migration category: '{migration_category}'")
-        logger.debug(f"Existing fields count: {len(existing_fields)}")
+        logger.debug("Updating ticket fields for conversation %s", conversation_id)
+        logger.debug("Migration category: '%s'", migration_category)
+        logger.debug("Existing fields count: %s", len(existing_fields))
         
         try:
-            # Create a copy of existing fields and add/update the migration category
-            updated_fields = existing_fields.copy()
-            updated_fields[MIGRATION_CATEGORY_FIELD_ID] = migration_category
+            # Add/update the migration category; the caller hands over the fields
+            existing_fields[MIGRATION_CATEGORY_FIELD_ID] = migration_category
             
-            logger.debug(f"Updated fields count: {len(updated_fields)}")
+            logger.debug("Updated fields count: %s", len(existing_fields))
             
             # Prepare the update data
             update_data = {
-                "ticketTypeFields": updated_fields
+                "ticketTypeFields": existing_fields
             }
             
-            logger.debug(f"Making API request to update conversation {conversation_id}")
+            logger.debug("Making API request to update conversation %s", conversation_id)
             
             # Make API call to update the conversation
             endpoint = f"/conversations/{conversation_id}"
@@ -221,7 +244,7 @@ class CategoryMigrator:
                 data=update_data
             )
             
-            logger.debug(f"API response received for conversation {conversation_id}")
+            logger.debug("API response received for conversation %s", conversation_id)
             return True
             
         except Exception as e:
@@ -244,47 +267,69 @@ class CategoryMigrator:
             'errors': []
         }
         
-        for i, ticket in enumerate(tickets, 1):
-            try:
-                conversation_id = ticket['conversation_id']
-                category = ticket['category']
-                sub_category = ticket['sub_category']
-                
-                logger.debug(f"Processing ticket {i}/{len(tickets)}: {conversation_id}")
-                
-                # Create migration category
-                migration_category = self.create_migration_category(category, sub_category)
-                
-                # Get existing ticket type fields to preserve them
-                existing_fields = ticket['ticket_type_fields']
-                
-                logger.debug(f"Ticket {conversation_id}: category='{category}' + sub_category='{sub_category}' -> migration_category='{migration_category}'")
-                
-                # Update via API
-                success = self.update_ticket_fields(conversation_id, migration_category, existing_fields)
-                
-                if success:
-                    results['successful'] += 1
-                    # One INFO line per conversation showing migration details
-                    logger.info(f"Migrated {conversation_id}: '{category}' + '{sub_category}' -> '{migration_category}'")
-                else:
+        # Updates only wait on the API, so the batch's PATCHes run concurrently
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            futures = [
+                executor.submit(self._migrate_ticket, ticket, i, len(tickets))
+                for i, ticket in enumerate(tickets, 1)
+            ]
+            for future in as_completed(futures):
+                error = future.result()
+                if error:
                     results['failed'] += 1
-                    results['errors'].append({
-                        'conversation_id': conversation_id,
-                        'error': 'API update failed'
-                    })
-                    logger.warning(f"Failed to migrate ticket {conversation_id}: API update failed")
-                    
-            except Exception as e:
-                results['failed'] += 1
-                results['errors'].append({
-                    'conversation_id': ticket.get('conversation_id', 'unknown'),
-                    'error': str(e)
-                })
-                logger.error(f"Error processing ticket {ticket.get('conversation_id', 'unknown')}: {str(e)}")
+                    results['errors'].append(error)
+                else:
+                    results['successful'] += 1
         
         return results
     
+    def _migrate_ticket(self, ticket: Dict[str, Any], position: int, total: int) -> Optional[Dict[str, str]]:
+        """Migrate a single ticket
+        
+        Args:
+            ticket: Ticket data dictionary
+            position: Position of the ticket in its batch (for logging)
+            total: Size of the batch (for logging)
+            
+        Returns:
+            Error dictionary with conversation_id and error, or None on success
+        """
+        try:
+            conversation_id = ticket['conversation_id']
+            category = ticket['category']
+            sub_category = ticket['sub_category']
+            
+            logger.debug("Processing ticket %s/%s: %s", position, total, conversation_id)
+            
+            # Migration category computed in SQL when the ticket was read
+            migration_category = ticket['migration_category']
+            
+            # Take the decoded ticket type fields; update_ticket_fields extends them in place
+            existing_fields = ticket.pop('ticket_type_fields')
+            
+            logger.debug("Ticket %s: category='%s' + sub_category='%s' -> migration_category='%s'", conversation_id, category, sub_category, migration_category)
+            
+            # Update via API
+            success = self.update_ticket_fields(conversation_id, migration_category, existing_fields)
+            
+            if success:
+                # One INFO line per conversation showing migration details
+                logger.info(f"Migrated {conversation_id}: '{category}' + '{sub_category}' -> '{migration_category}'")
+                return None
+            
+            logger.warning(f"Failed to migrate ticket {conversation_id}: API update failed")
+            return {
+                'conversation_id': conversation_id,
+                'error': 'API update failed'
+            }
+                
+        except Exception as e:
+            logger.error(f"Error processing ticket {ticket.get('conversation_id', 'unknown')}: {str(e)}")
+            return {
+                'conversation_id': ticket.get('conversation_id', 'unknown'),
+                'error': str(e)
+            }
+    
     def migrate_all_tickets(self, batch_size: int = 50, max_tickets: Optional[int] = None) -> Dict[str, Any]:
         """Migrate all tickets with pagination
         
@@ -305,18 +350,8 @@ class CategoryMigrator:
             'all_errors': []
         }
         
-        offset = 0
-        batch_num = 1
-        
-        while True:
-            logger.debug(f"Fetching batch {batch_num} with offset={offset}, batch_size={batch_size}")
-            
-            # Get batch of tickets
-            tickets = self.get_tickets_with_pagination(batch_size, offset)
-            
-            if not tickets:
-                logger.info("No more tickets to process")
-                break
+        for batch_num, tickets in enumerate(self.iter_ticket_batches(batch_size), 1):
+            logger.debug("Processing batch %s (%s tickets)", batch_num, len(tickets))
             
             # Check if we've reached the maximum
             if max_tickets and overall_results['total_processed'] >= max_tickets:
@@ -333,15 +368,13 @@ class CategoryMigrator:
             overall_results['batches_processed'] += 1
             overall_results['all_errors'].extend(batch_results['errors'])
             
-            logger.debug(f"Overall progress: {overall_results['total_processed']} processed, {overall_results['total_successful']} successful, {overall_results['total_failed']} failed")
-            
-            # Move to next batch
-            offset += batch_size
-            batch_num += 1
+            logger.debug("Overall progress: %s processed, %s successful, %s failed", overall_results['total_processed'], overall_results['total_successful'], overall_results['total_failed'])
             
             # Check if we've reached the maximum
             if max_tickets and overall_results['total_processed'] >= max_tickets:
                 break
+        else:
+            logger.info("No more tickets to process")
         
         logger.info(f"Migration completed: {overall_results['total_successful']} successful, {overall_results['total_failed']} failed")
         return overall_results
@@ -356,7 +389,7 @@ class CategoryMigrator:
             Dictionary with migration results
         """
         logger.info(f"Starting migration for {len(conversation_ids)} specific tickets")
-        logger.debug(f"Target conversation IDs: {conversation_ids}")
+        logger.debug("Target conversation IDs: %s", conversation_ids)
         
         # Get the specific tickets
         tickets = self.get_tickets_by_ids(conversation_ids)
@@ -387,6 +420,7 @@ def main():
     parser = argparse.ArgumentParser(description='Migrate ticket categories')
     parser.add_argument('--batch-size', type=int, default=50, help='Number of tickets to process per batch (default: 50)')
     parser.add_argument('--max-tickets', type=int, help='Maximum number of tickets to process (default: all)')
+    parser.add_argument('--max-workers', type=int, default=DEFAULT_MAX_WORKERS, help=f'Number of tickets updated in parallel (default: {DEFAULT_MAX_WORKERS})')
     parser.add_argument('--ticket-ids', nargs='+', help='Specific conversation IDs to migrate (space-separated)')
     parser.add_argument('--log-level', default='INFO', help='Set the logging level')
     parser.add_argument('--dry-run', action='store_true', help='Show what would be migrated without making API calls')
@@ -400,7 +434,7 @@ def main():
     )
     
     logger.info("Category migration tool started")
-    logger.debug(f"Command line arguments: {vars(args)}")
+    logger.debug("Command line arguments: %s", vars(args))
     
     try:
         # Initialize components
@@ -409,10 +443,10 @@ def main():
         storage = DuckDBStorage(config.db_path)
         api = UnthreadAPI(config.api_key, config.base_url)
         
-        logger.debug(f"Database path: {config.db_path}")
-        logger.debug(f"API base URL: {config.base_url}")
+        logger.debug("Database path: %s", config.db_path)
+        logger.debug("API base URL: %s", config.base_url)
         
-        migrator = CategoryMigrator(storage, api)
+        migrator = CategoryMigrator(storage, api, max_workers=args.max_workers)
         
         if args.ticket_ids:
             # Migrate specific tickets
@@ -423,11 +457,7 @@ def main():
                 tickets = migrator.get_tickets_by_ids(args.ticket_ids)
                 logger.info(f"Would process {len(tickets)} specific tickets")
                 for ticket in tickets:
-                    migration_category = migrator.create_migration_category(
-                        ticket['category'], 
-                        ticket['sub_category']
-                    )
-                    logger.info(f"Ticket {ticket['conversation_id']}: {ticket['category']} + {ticket['sub_category']} -> {migration_category}")
+                    logger.info(f"Ticket {ticket['conversation_id']}: {ticket['category']} + {ticket['sub_category']} -> {ticket['migration_category']}")
             else:
                 results = migrator.migrate_specific_tickets(args.ticket_ids)
                 
@@ -443,14 +473,10 @@ def main():
             if args.dry_run:
                 logger.info("DRY RUN MODE - No API calls will be made")
                 # For dry run, just show what would be migrated
-                tickets = migrator.get_tickets_with_pagination(args.batch_size, 0)
+                tickets = migrator.preview_migration(args.batch_size)
                 logger.info(f"Would process {len(tickets)} tickets in first batch")
                 for ticket in tickets[:5]:  # Show first 5 as examples
-                    migration_category = migrator.create_migration_category(
-                        ticket['category'], 
-                        ticket['sub_category']
-                    )
-                    logger.info(f"Ticket {ticket['conversation_id']}: {ticket['category']} + {ticket['sub_category']} -> {migration_category}")
+                    logger.info(f"Ticket {ticket['conversation_id']}: {ticket['category']} + {ticket['sub_category']} -> {ticket['migration_category']}")
             else:
                 # Perform actual migration
                 logger.info("Starting full migration process")
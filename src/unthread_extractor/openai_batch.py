@@ -0,0 +1,178 @@
+"""
+Helpers for OpenAI structured outputs and Batch API jobs
+"""
+
+import os
+import json
+import time
+import logging
+import tempfile
+from typing import Any, Dict, List, Tuple
+
+from openai import OpenAI
+
+logger = logging.getLogger(__name__)
+
+# Requests per Batch API input file, and seconds between status checks
+BATCH_MAX_REQUESTS = 50000
+BATCH_POLL_INTERVAL = 60
+BATCH_TERMINAL_STATUSES = {"completed", "failed", "expired", "cancelled"}
+
+
+def _object_schema(properties: Dict[str, Any]) -> Dict[str, Any]:
+    """JSON schema of an object with exactly the given (required) properties"""
+    return {
+        "type": "object",
+        "properties": properties,
+        "required": list(properties),
+        "additionalProperties": False
+    }
+
+
+def json_schema_format(name: str, properties: Dict[str, Any]) -> Dict[str, Any]:
+    """Build a strict structured-output response format for one JSON object
+
+    Args:
+        name: Schema name
+        properties: JSON schema properties of the object, all required
+
+    Returns:
+        Value for the response_format parameter
+    """
+    return {
+        "type": "json_schema",
+        "json_schema": {
+            "name": name,
+            "strict": True,
+            "schema": _object_schema(properties)
+        }
+    }
+
+
+def batched_json_schema_format(name: str, properties: Dict[str, Any]) -> Dict[str, Any]:
+    """Build a strict response format for a "classifications" array of objects
+
+    Each object carries an "id" field next to the given properties, so
+    replies can be matched back to the cases of a batched prompt.
+
+    Args:
+        name: Schema name
+        properties: JSON schema properties of each object, all required
+
+    Returns:
+        Value for the response_format parameter
+    """
+    return json_schema_format(name, {
+        "classifications": {
+            "type": "array",
+            "items": _object_schema({"id": {"type": "string"}, **properties})
+        }
+    })
+
+
+def run_batch_job(
+    client: OpenAI,
+    bodies: Dict[str, Dict[str, Any]],
+    poll_interval: float = BATCH_POLL_INTERVAL
+) -> Dict[str, Any]:
+    """Run chat completions through the OpenAI Batch API
+
+    Requests are split into input files of BATCH_MAX_REQUESTS, all of which
+    are submitted before polling, so the jobs run side by side. Blocks until
+    every job finishes (up to its 24h completion window).
+
+    Args:
+        client: OpenAI client
+        bodies: Chat completion request bodies keyed by custom_id
+        poll_interval: Seconds between status checks
+
+    Returns:
+        Parsed JSON reply content keyed by custom_id, for every request that succeeded
+    """
+    items = list(bodies.items())
+    pending = [
+        _submit_batch(client, items[start:start + BATCH_MAX_REQUESTS])
+        for start in range(0, len(items), BATCH_MAX_REQUESTS)
+    ]
+
+    results = {}
+    while pending:
+        running = []
+        for batch in pending:
+            if batch.status in BATCH_TERMINAL_STATUSES:
+                results.update(_read_batch_output(client, batch))
+            else:
+                running.append(batch)
+        if running:
+            time.sleep(poll_interval)
+            running = [client.batches.retrieve(batch.id) for batch in running]
+            logger.debug("OpenAI batch statuses: %s", {batch.id: batch.status for batch in running})
+        pending = running
+
+    return results
+
+
+def _submit_batch(client: OpenAI, items: List[Tuple[str, Dict[str, Any]]]):
+    """Upload one JSONL input file and create its batch job
+
+    Args:
+        client: OpenAI client
+        items: (custom_id, request body) tuples
+
+    Returns:
+        The created batch
+    """
+    with tempfile.NamedTemporaryFile('w', suffix='.jsonl', delete=False) as f:
+        input_path = f.name
+        for custom_id, body in items:
+            f.write(json.dumps({
+                "custom_id": custom_id,
+                "method": "POST",
+                "url": "/v1/chat/completions",
+                "body": body
+            }) + "\n")
+
+    try:
+        with open(input_path, 'rb') as f:
+            input_file = client.files.create(file=f, purpose="batch")
+    finally:
+        os.remove(input_path)
+
+    batch = client.batches.create(
+        input_file_id=input_file.id,
+        endpoint="/v1/chat/completions",
+        completion_window="24h"
+    )
+    logger.info(f"Submitted OpenAI batch {batch.id} with {len(items)} requests")
+    return batch
+
+
+def _read_batch_output(client: OpenAI, batch) -> Dict[str, Any]:
+    """Parse the replies of a finished batch job
+
+    Args:
+        client: OpenAI client
+        batch: Batch in a terminal status
+
+    Returns:
+        Parsed JSON reply content keyed by custom_id
+    """
+    if batch.status != "completed" or not batch.output_file_id:
+        logger.error(f"OpenAI batch {batch.id} finished with status {batch.status}")
+        return {}
+
+    results = {}
+    output = client.files.content(batch.output_file_id).text
+    for line in output.splitlines():
+        if not line.strip():
+            continue
+        record = json.loads(line)
+        custom_id = record.get("custom_id")
+        try:
+            result_text = record["response"]["body"]["choices"][0]["message"]["content"]
+            results[custom_id] = json.loads(result_text)
+        except (KeyError, IndexError, TypeError, ValueError):
+            logger.error(f"Failed to parse batch response {custom_id}: {record.get('error') or record.get('response')}")
+
+    logger.info(f"OpenAI batch {batch.id} returned {len(results)} results")
+    return results
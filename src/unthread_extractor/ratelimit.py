@@ -0,0 +1,102 @@
+"""
+Rate limiting helpers for external API calls
+"""
+
+import time
+import threading
+
+
+class TokenBucket:
+    """Thread-safe token bucket rate limiter"""
+
+    def __init__(self, rate: float, burst: int):
+        """Initialize the token bucket
+
+        Args:
+            rate: Number of tokens refilled per second
+            burst: Maximum number of tokens that can accumulate
+        """
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._blocked_until = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self, tokens: float = 1):
+        """Block until enough tokens are available and consume them
+
+        Args:
+            tokens: Number of tokens to consume (capped at the burst size)
+        """
+        tokens = min(tokens, self.burst)
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+
+                if now >= self._blocked_until and self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return
+
+                wait = max(self._blocked_until - now, (tokens - self._tokens) / self.rate)
+            time.sleep(wait)
+
+    def block(self, seconds: float):
+        """Stop handing out tokens for a cooldown period (e.g. a Retry-After)
+
+        Args:
+            seconds: Number of seconds to wait before the next token is available
+        """
+        with self._lock:
+            self._blocked_until = max(self._blocked_until, time.monotonic() + seconds)
+            self._tokens = 0.0
+
+
+class AdaptiveConcurrencyLimit:
+    """Thread-safe concurrency limit with additive increase / multiplicative decrease
+
+    The limit is halved whenever a finished task reports throttling and raised
+    by one after each full limit's worth of unthrottled tasks, so it settles
+    just below the point where the server starts answering 429.
+    """
+
+    def __init__(self, maximum: int, minimum: int = 1):
+        """Initialize the limit
+
+        Args:
+            maximum: Upper bound (and starting value) of the limit
+            minimum: Lower bound of the limit
+        """
+        self.maximum = maximum
+        self.minimum = minimum
+        self.limit = maximum
+        self._active = 0
+        self._successes = 0
+        self._condition = threading.Condition()
+
+    def acquire(self):
+        """Block until fewer than limit tasks are running and start one"""
+        with self._condition:
+            while self._active >= self.limit:
+                self._condition.wait()
+            self._active += 1
+
+    def release(self, throttled: bool = False):
+        """Finish a task and adjust the limit
+
+        Args:
+            throttled: Whether the task ran into server throttling
+        """
+        with self._condition:
+            self._active -= 1
+            if throttled:
+                self.limit = max(self.minimum, self.limit // 2)
+                self._successes = 0
+            else:
+                self._successes += 1
+                if self._successes >= self.limit and self.limit < self.maximum:
+                    self.limit += 1
+                    self._successes = 0
+            self._condition.notify_all()
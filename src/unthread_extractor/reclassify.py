@@ -1,116 +1,309 @@
 import os
+import logging
 from openai import OpenAI
 from dotenv import load_dotenv
 from typing import List, Dict, Any, Optional
 import duckdb   
 import json
+import hashlib
 import tiktoken
 from functools import lru_cache
+from concurrent.futures import ThreadPoolExecutor
 from unthread_extractor.storage import DuckDBStorage
+from unthread_extractor.openai_batch import json_schema_format, batched_json_schema_format, run_batch_job
 
 # Load environment variables from .env file
 load_dotenv()
 
-# Global cache for the system prompt
-_RESOLUTION_PROMPT_CACHE: Optional[str] = None
-_CATEGORY_PROMPT_CACHE: Optional[str] = None
+logger = logging.getLogger(__name__)
+
+# Prompt file for each system prompt type
+_PROMPT_FILES: Dict[str, str] = {
+    "category": "reclassify.md",
+    "resolution": "resolution.md",
+}
 _MODEL: str = "gpt-4o"
-_STORAGE = DuckDBStorage("data/unthread_data.duckdb")
+# Batches sent to OpenAI at the same time
+_MAX_WORKERS: int = 8
+# Conversation tokens per batched request, leaving room in the context for the system prompt and replies
+_BATCH_MAX_TOKENS: int = 60000
+# Conversation tokens sent per case; longer conversations keep their start and end
+_MAX_CONTENT_TOKENS: int = 4000
+# Context window of _MODEL and the part of it kept free for the JSON reply
+_CONTEXT_TOKENS: int = 128000
+_REPLY_TOKENS: int = 16000
+_DB_PATH: str = "data/unthread_data.duckdb"
+
+# Structured outputs, so replies always parse and map back to their case by id
+_RESOLUTION_PROPERTIES: Dict[str, Any] = {
+    "resolution": {
+        "type": "string",
+        "enum": [
+            "Referred with public resource",
+            "Referred with internal knowledge",
+            "No public resource available",
+            "Bug fix",
+            "Feature Request",
+            "No Action"
+        ]
+    }
+}
+_RESPONSE_FORMAT: Dict[str, Any] = json_schema_format("resolution", _RESOLUTION_PROPERTIES)
+_BATCH_RESPONSE_FORMAT: Dict[str, Any] = batched_json_schema_format("resolutions", _RESOLUTION_PROPERTIES)
+
+@lru_cache(maxsize=None)
+def _get_storage() -> DuckDBStorage:
+    """Open the default database on first use instead of at import time."""
+    return DuckDBStorage(_DB_PATH)
 
+@lru_cache(maxsize=None)
+def _get_client() -> OpenAI:
+    """Create the OpenAI client on first use and share it (and its connection pool) afterwards."""
+    api_key = os.getenv("OPENAI_API_KEY")
+    if not api_key:
+        raise ValueError("OPENAI_API_KEY environment variable not set")
+    return OpenAI(api_key=api_key)
+
+@lru_cache(maxsize=None)
 def get_system_prompt(type: str = "category") -> str:
-    """Get the system prompt, cached for efficiency."""
-    global _RESOLUTION_PROMPT_CACHE, _CATEGORY_PROMPT_CACHE
-    
-    if type == "category":
-        if _CATEGORY_PROMPT_CACHE is None:
-            prompt_path = os.path.join(os.path.dirname(__file__), "..", "..", "prompts", "reclassify.md")
-            with open(prompt_path, "r") as file:
-                _CATEGORY_PROMPT_CACHE = file.read()
-        return _CATEGORY_PROMPT_CACHE
-    elif type == "resolution":
-        if _RESOLUTION_PROMPT_CACHE is None:
-            prompt_path = os.path.join(os.path.dirname(__file__), "..", "..", "prompts", "resolution.md")
-            with open(prompt_path, "r") as file:
-                _RESOLUTION_PROMPT_CACHE = file.read()
-        return _RESOLUTION_PROMPT_CACHE
-    else:
+    """Get the system prompt, read once per type and cached for efficiency."""
+    if type not in _PROMPT_FILES:
         raise ValueError(f"Invalid type: {type}")
+    prompt_path = os.path.join(os.path.dirname(__file__), "..", "..", "prompts", _PROMPT_FILES[type])
+    with open(prompt_path, "r") as file:
+        return file.read()
+
+@lru_cache(maxsize=None)
+def _get_encoding() -> tiktoken.Encoding:
+    """Get the tokenizer for _MODEL, loaded once."""
+    return tiktoken.encoding_for_model(_MODEL)
+
+def _truncate_content(content: Optional[str], max_tokens: int = _MAX_CONTENT_TOKENS) -> str:
+    """
+    Fit conversation content into max_tokens by keeping its first and last halves,
+    where the opening request and the resolution are. Missing content becomes an empty string.
+    """
+    if not content:
+        return ""
+    encoding = _get_encoding()
+    tokens = encoding.encode(content)
+    if len(tokens) <= max_tokens:
+        return content
+    keep = max_tokens // 2
+    omitted = len(tokens) - 2 * keep
+    logger.debug("Truncated conversation content: omitted %s of %s tokens", omitted, len(tokens))
+    return f"{encoding.decode(tokens[:keep])}\n[... {omitted} tokens omitted ...]\n{encoding.decode(tokens[-keep:])}"
+
+def _token_batches(conversations: List[Dict[str, Any]], batch_size: int, max_tokens: int = _BATCH_MAX_TOKENS) -> List[List[Dict[str, Any]]]:
+    """
+    Pack conversations into batches of at most batch_size conversations and max_tokens content tokens,
+    so each request repeats the system prompt for as many conversations as fit.
+    """
+    encoding = _get_encoding()
+    batches = []
+    batch = []
+    batch_tokens = 0
+    for conv in conversations:
+        tokens = len(encoding.encode(conv['message_content'] or ""))
+        if batch and (len(batch) >= batch_size or batch_tokens + tokens > max_tokens):
+            batches.append(batch)
+            batch = []
+            batch_tokens = 0
+        batch.append(conv)
+        batch_tokens += tokens
+    if batch:
+        batches.append(batch)
+    return batches
+
+def _has_content(conv: Dict[str, Any]) -> bool:
+    """Whether a conversation has message text; allMessages is NULL for conversations without messages."""
+    return bool(conv['message_content'] and conv['message_content'].strip())
 
-def generate_llm_response_batch(conversations: List[Dict[str, Any]], batch_size: int = 5) -> List[Dict[str, Any]]:
+def generate_llm_response_batch(
+    conversations: List[Dict[str, Any]],
+    batch_size: int = 25,
+    max_workers: int = _MAX_WORKERS,
+    use_batch_api: bool = False,
+    storage: Optional[DuckDBStorage] = None
+) -> List[Dict[str, Any]]:
     """
     Generate responses for multiple conversations in batches to reduce API calls.
+    Batches are sent to OpenAI concurrently from a thread pool; results keep the input order.
+    Conversations with identical message content are classified once and share the result,
+    and responses are cached in the database so reruns only pay for new content.
+    Conversations without message content get an error result instead of being sent.
+    With use_batch_api, uncached conversations are classified by one OpenAI Batch API job instead.
+    The response cache lives in storage (the default database if not given).
     """
-    api_key = os.getenv("OPENAI_API_KEY")
-    if not api_key:
-        raise ValueError("OPENAI_API_KEY environment variable not set")
-    
-    client = OpenAI(api_key=api_key)
+    storage = storage or _get_storage()
+    client = _get_client()
     system_prompt = get_system_prompt("resolution")
     
-    results = []
+    # One representative per distinct message content; conversations without messages have nothing to classify
+    unique_index: Dict[str, int] = {}
+    unique_conversations = []
+    for conv in conversations:
+        if _has_content(conv) and conv['message_content'] not in unique_index:
+            unique_index[conv['message_content']] = len(unique_conversations)
+            unique_conversations.append(conv)
     
-    # Process conversations in batches
-    for i in range(0, len(conversations), batch_size):
-        batch = conversations[i:i + batch_size]
-        
-        # Create a batched prompt
-        batched_prompt = "Please classify each of the following support cases:\n\n"
-        for idx, conv in enumerate(batch, 1):
-            batched_prompt += f"Case {idx}:\n<Conversation>{conv['message_content']}</Conversation>\n\n"
-        
-        batched_prompt += "Please respond with a JSON array containing the classification for each case in order."
+    with_content = sum(1 for conv in conversations if _has_content(conv))
+    if with_content < len(conversations):
+        logger.info(f"Skipping {len(conversations) - with_content} conversations with no message content")
+    if len(unique_conversations) < with_content:
+        logger.info(f"Skipping {with_content - len(unique_conversations)} conversations with duplicate content")
+    
+    # Cached responses are keyed on the prompt as well, so prompt edits invalidate them
+    prompt_key = hashlib.blake2b(system_prompt.encode(), digest_size=16).digest()
+    hashes = [
+        hashlib.blake2b(conv['message_content'].encode(), digest_size=16, key=prompt_key).hexdigest()
+        for conv in unique_conversations
+    ]
+    cached = storage.get_cached_llm_responses(hashes, _MODEL)
+    logger.info(f"Found {len(cached)} cached responses")
+    
+    misses = [i for i, content_hash in enumerate(hashes) if content_hash not in cached]
+    # Only the content sent to OpenAI is truncated; cache keys use the full content
+    pending = [
+        {**unique_conversations[i], 'message_content': _truncate_content(unique_conversations[i]['message_content'])}
+        for i in misses
+    ]
+    
+    miss_results = []
+    if use_batch_api and pending:
+        miss_results = submit_batch_job(client, system_prompt, pending)
+    else:
+        # Never let content plus the system prompt overflow the context window
+        max_tokens = min(_BATCH_MAX_TOKENS, _CONTEXT_TOKENS - _REPLY_TOKENS - len(_get_encoding().encode(system_prompt)))
+        batches = _token_batches(pending, batch_size, max_tokens)
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = [
+                executor.submit(_classify_batch, client, system_prompt, batch_num, batch)
+                for batch_num, batch in enumerate(batches, 1)
+            ]
+            for future in futures:
+                miss_results.extend(future.result())
+    
+    missing = {"error": "No result returned for conversation"}
+    unique_results = [cached.get(content_hash) for content_hash in hashes]
+    for position, i in enumerate(misses):
+        unique_results[i] = miss_results[position] if position < len(miss_results) else missing
+    
+    storage.store_llm_responses({
+        hashes[i]: unique_results[i]
+        for i in misses
+        if isinstance(unique_results[i], dict) and 'error' not in unique_results[i]
+    }, _MODEL)
+    
+    # Fan results back out to every conversation sharing the content
+    return [
+        unique_results[unique_index[conv['message_content']]] if _has_content(conv) else {"error": "No message content"}
+        for conv in conversations
+    ]
+
+def submit_batch_job(client: OpenAI, system_prompt: str, conversations: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Classify conversations through the OpenAI Batch API, one request per conversation.
+    Blocks until every job finishes (up to its 24h completion window); results keep the input order.
+    """
+    replies = run_batch_job(client, {
+        str(idx): {
+            "model": _MODEL,
+            "response_format": _RESPONSE_FORMAT,
+            "messages": [
+                {"role": "system", "content": system_prompt},
+                {"role": "user", "content": f"Please classify this support case:\n\n<Conversation>{conv['message_content']}</Conversation>"}
+            ]
+        }
+        for idx, conv in enumerate(conversations)
+    })
+    return [replies.get(str(idx), {"error": "No result returned for conversation"}) for idx in range(len(conversations))]
+
+def _classify_batch(client: OpenAI, system_prompt: str, batch_num: int, batch: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Classify one batch of conversations with a single request.
+    """
+    # Create a batched prompt
+    parts = ["Please classify each of the following support cases:\n\n"]
+    parts.extend(
+        f"Case {idx}:\n<Conversation>{conv['message_content']}</Conversation>\n\n"
+        for idx, conv in enumerate(batch, 1)
+    )
+    parts.append(
+        'Please respond with a JSON object whose "classifications" array contains the classification '
+        'for each case, each with an "id" field set to the case number.'
+    )
+    batched_prompt = "".join(parts)
+    
+    logger.debug("Batch %s: Processing %s conversations", batch_num, len(batch))
+    
+    try:
+        # The system prompt stays first and unchanged so OpenAI can reuse its cached prefix
+        response = client.chat.completions.create(
+            model=_MODEL,
+            messages=[
+                {"role": "system", "content": system_prompt},
+                {"role": "user", "content": batched_prompt}
+            ],
+            response_format=_BATCH_RESPONSE_FORMAT
+        )
         
-        # Count tokens for monitoring
-        print(f"Batch {i//batch_size + 1}: Processing {len(batch)} conversations")
+        result_text = response.choices[0].message.content
         
+        # Match results to cases by id rather than position
         try:
-            response = client.chat.completions.create(
-                model=_MODEL,
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": batched_prompt}
-                ]
-            )
-            
-            result_text = response.choices[0].message.content
-            
-            # Try to parse as JSON array
-            try:
-                batch_results = json.loads(result_text)
-                if isinstance(batch_results, list):
-                    results.extend(batch_results)
-                else:
-                    # Fallback: treat as single result
-                    results.append(batch_results)
-            except json.JSONDecodeError:
-                print(f"Error parsing batch response: {result_text}")
-                # Add placeholder results for failed batch
-                results.extend([{"error": "Failed to parse response"} for _ in batch])
-                
-        except Exception as e:
-            print(f"Error processing batch: {e}")
+            by_id = {}
+            for item in json.loads(result_text)["classifications"]:
+                case_id = item.pop("id")
+                by_id[case_id] = item
+            return [
+                by_id.get(str(idx), {"error": f"No result returned for case {idx}"})
+                for idx in range(1, len(batch) + 1)
+            ]
+        except (json.JSONDecodeError, KeyError, TypeError, AttributeError):
+            logger.error(f"Error parsing batch response: {result_text}")
             # Add placeholder results for failed batch
-            results.extend([{"error": str(e)} for _ in batch])
-    
-    return results
+            return [{"error": "Failed to parse response"} for _ in batch]
+            
+    except Exception as e:
+        logger.error(f"Error processing batch: {e}")
+        # Add placeholder results for failed batch
+        return [{"error": str(e)} for _ in batch]
 
-def process_conversations_batch(conversations: List[Dict[str, Any]], batch_size: int = 5, max_conversations: Optional[int] = None):
+def process_conversations_batch(
+    conversations: List[Dict[str, Any]],
+    batch_size: int = 25,
+    max_conversations: Optional[int] = None,
+    use_batch_api: bool = False,
+    storage: Optional[DuckDBStorage] = None
+):
     """
     Process conversations in batches for efficiency.
     """
+    storage = storage or _get_storage()
     if max_conversations:
         conversations = conversations[:max_conversations]
     
-    print(f"Processing {len(conversations)} conversations in batches of {batch_size}")
+    with_content = [conv for conv in conversations if _has_content(conv)]
+    if len(with_content) < len(conversations):
+        logger.info(f"Skipping {len(conversations) - len(with_content)} conversations with no message content")
+    conversations = with_content
+    
+    logger.info(f"Processing {len(conversations)} conversations in batches of up to {batch_size}")
     
     # Process in batches
-    results = generate_llm_response_batch(conversations, batch_size)
+    results = generate_llm_response_batch(conversations, batch_size, use_batch_api=use_batch_api, storage=storage)
     
     # Save results to database
-    _STORAGE.save_classifications(conversations, results)
+    storage.save_classifications(conversations, results)
 
 if __name__ == "__main__":
-    conversations = _STORAGE.get_conversations()
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(levelname)s - %(message)s'
+    )
+    
+    conversations = _get_storage().get_conversations()
     
     # Use batch processing for efficiency
-    process_conversations_batch(conversations, batch_size=10, max_conversations=100)
\ No newline at end of file
+    process_conversations_batch(conversations, batch_size=25, max_conversations=100)
\ No newline at end of file
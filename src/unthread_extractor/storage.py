@@ -5,31 +5,95 @@ Storage module for Unthread data
 import os
 import json
 import logging
-from typing import List, Dict, Any
+import tempfile
+import threading
+from functools import lru_cache
+from typing import List, Dict, Any, Optional, Tuple, Iterator
 import duckdb
+import pandas as pd
 
 logger = logging.getLogger(__name__)
 
+# Version of the schema migrations in DuckDBStorage._migrate; bump when adding one
+SCHEMA_VERSION = 2
+
+# Query behind DuckDBStorage.get_conversations
+CONVERSATIONS_SQL_PATH = 'data/extract_for_summary.sql'
+
+
+@lru_cache(maxsize=None)
+def _read_sql(path: str) -> str:
+    """Read a SQL file once per process, without its trailing semicolon
+    
+    Args:
+        path: Path of the SQL file
+        
+    Returns:
+        Query text
+    """
+    with open(path, 'r') as f:
+        return f.read().strip().rstrip(';')
+
 class DuckDBStorage:
     """DuckDB storage implementation"""
     
-    def __init__(self, db_path: str):
+    def __init__(self, db_path: str, connection: Optional[duckdb.DuckDBPyConnection] = None):
         """Initialize storage
         
         Args:
             db_path: Path to the DuckDB database file
+            connection: Existing connection to the database (skips connecting and table creation)
         """
         self.db_path = db_path
+        self._local = threading.local()
+        self._thread_storages = []
+        self._thread_storages_lock = threading.Lock()
+        if connection is not None:
+            self.conn = connection
+            return
         if db_path != ":memory:":
             self._ensure_data_dir()
         self.conn = duckdb.connect(db_path)
         self._create_tables()
         logger.info(f"Initialized DuckDB storage at {db_path}")
     
+    def for_thread(self) -> "DuckDBStorage":
+        """Get a storage object for the calling thread
+        
+        A DuckDB connection must not be used by several threads at once. Each
+        thread gets its own cursor, i.e. a separate connection to the same
+        database, so worker threads can write concurrently. The cursors are
+        closed together with this storage.
+        
+        Returns:
+            Storage bound to the calling thread's cursor
+        """
+        storage = getattr(self._local, "storage", None)
+        if storage is None:
+            with self._thread_storages_lock:
+                storage = DuckDBStorage(self.db_path, connection=self.conn.cursor())
+                self._thread_storages.append(storage)
+            self._local.storage = storage
+        return storage
+    
+    def release_thread(self):
+        """Close the calling thread's cursor, if it has one
+        
+        Short-lived threads call this before exiting, so their cursors don't
+        pile up until this storage is closed.
+        """
+        storage = getattr(self._local, "storage", None)
+        if storage is None:
+            return
+        del self._local.storage
+        with self._thread_storages_lock:
+            self._thread_storages.remove(storage)
+        storage.close()
+    
     def _ensure_data_dir(self):
         """Ensure data directory exists"""
         os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
-        logger.debug(f"Ensured data directory exists at {os.path.dirname(self.db_path)}")
+        logger.debug("Ensured data directory exists at %s", os.path.dirname(self.db_path))
     
     def _create_tables(self):
         """Create database tables if they don't exist"""
@@ -45,7 +109,10 @@ class DuckDBStorage:
         self.conn.execute("""
             CREATE TABLE IF NOT EXISTS conversations (
                 id VARCHAR PRIMARY KEY,
-                data JSON
+                data JSON,
+                source_type VARCHAR,
+                status VARCHAR,
+                created_at VARCHAR
             )
         """)
         
@@ -85,13 +152,109 @@ class DuckDBStorage:
             )
         """)
         
-        # Ensure updated_time column exists (for existing databases)
-        self._ensure_updated_time_column()
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS message_reactions (
+                channel_id VARCHAR,
+                ts VARCHAR,
+                emoji VARCHAR,
+                added_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                PRIMARY KEY (channel_id, ts, emoji)
+            )
+        """)
+        
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS processed_links (
+                run_id VARCHAR,
+                position INTEGER,
+                conversation_id VARCHAR,
+                link VARCHAR,
+                title VARCHAR,
+                success BOOLEAN,
+                processed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        """)
+        
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS bq_category_cache (
+                conversation_id VARCHAR PRIMARY KEY,
+                ticket_category VARCHAR,
+                ticket_sub_category VARCHAR,
+                ticket_resolution VARCHAR,
+                fetched_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        """)
+        
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS ai_classification_cache (
+                content_hash VARCHAR,
+                model VARCHAR,
+                category VARCHAR,
+                sub_category VARCHAR,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                PRIMARY KEY (content_hash, model)
+            )
+        """)
+        
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS llm_response_cache (
+                content_hash VARCHAR,
+                model VARCHAR,
+                response JSON,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                PRIMARY KEY (content_hash, model)
+            )
+        """)
+        
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS category_fix_progress (
+                conversation_id VARCHAR PRIMARY KEY,
+                status VARCHAR,
+                data_source VARCHAR,
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        """)
+        
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS schema_version (
+                version INTEGER
+            )
+        """)
+        
+        self._migrate()
         
         logger.debug("Database tables created successfully")
     
-    def _ensure_updated_time_column(self):
-        """Ensure updated_time column exists in conversation_classifications table"""
+    def _migrate(self):
+        """Bring databases created by older versions up to SCHEMA_VERSION
+        
+        Migrations run once per database; afterwards only the stored version
+        is read, instead of probing the catalog and backfilling on every connect.
+        """
+        row = self.conn.execute("SELECT max(version) FROM schema_version").fetchone()
+        version = row[0] or 0
+        if version >= SCHEMA_VERSION:
+            logger.debug("Schema is at version %s", version)
+            return
+        
+        # Ensure updated_time column exists (for existing databases)
+        migrated = self._ensure_updated_time_column()
+        
+        # Ensure materialized conversation filter columns exist (for existing databases)
+        migrated = self._ensure_conversation_columns() and migrated
+        
+        if not migrated:
+            # Leave the version alone so the next connect retries
+            return
+        self.conn.execute("DELETE FROM schema_version")
+        self.conn.execute("INSERT INTO schema_version VALUES (?)", [SCHEMA_VERSION])
+        logger.info(f"Migrated database schema from version {version} to {SCHEMA_VERSION}")
+    
+    def _ensure_updated_time_column(self) -> bool:
+        """Ensure updated_time column exists in conversation_classifications table
+        
+        Returns:
+            True if the column exists afterwards, False if the check failed
+        """
         try:
             # Check if updated_time column exists
             columns = self.conn.execute("""
@@ -110,9 +273,73 @@ class DuckDBStorage:
                 logger.info("Successfully added updated_time column")
             else:
                 logger.debug("updated_time column already exists")
+            return True
                 
         except Exception as e:
             logger.warning(f"Could not check/add updated_time column: {str(e)}")
+            return False
+    
+    def _ensure_conversation_columns(self) -> bool:
+        """Ensure the source_type, status and created_at columns exist and are populated
+        
+        These columns mirror fields of the conversation JSON so hot filters can
+        use plain column comparisons (and DuckDB's zonemaps) instead of parsing JSON.
+        
+        Returns:
+            True if the columns exist and were backfilled, False if that failed
+        """
+        try:
+            for column in ("source_type", "status", "created_at"):
+                self.conn.execute(f"ALTER TABLE conversations ADD COLUMN IF NOT EXISTS {column} VARCHAR")
+            
+            # Backfill rows stored before the columns existed
+            self.conn.execute("""
+                UPDATE conversations SET
+                    source_type = json_extract_string(data, '$.sourceType'),
+                    status = json_extract_string(data, '$.status'),
+                    created_at = json_extract_string(data, '$.createdAt')
+                WHERE source_type IS NULL AND status IS NULL AND created_at IS NULL
+            """)
+            return True
+        except Exception as e:
+            logger.warning(f"Could not check/add conversation columns: {str(e)}")
+            return False
+    
+    def _write_ndjson(self, records: List[Dict[str, Any]]) -> str:
+        """Write records to a temporary NDJSON file for DuckDB to bulk load
+        
+        A single INSERT OR REPLACE can't contain the same key twice, so only the
+        last record per id is written. The caller removes the file.
+        
+        Args:
+            records: List of data dictionaries with an "id" key
+            
+        Returns:
+            Path of the temporary file
+        """
+        unique_records = {record["id"]: record for record in records}
+        with tempfile.NamedTemporaryFile("w", suffix=".ndjson", encoding="utf-8", delete=False) as f:
+            for record in unique_records.values():
+                f.write(json.dumps(record))
+                f.write("\n")
+        return f.name
+    
+    def _store_json_records(self, table: str, records: List[Dict[str, Any]]):
+        """Bulk upsert records into an (id, data) table with one INSERT
+        
+        Args:
+            table: Name of the table
+            records: List of data dictionaries with an "id" key
+        """
+        ndjson_path = self._write_ndjson(records)
+        try:
+            self.conn.execute(f"""
+                INSERT OR REPLACE INTO {table} (id, data)
+                SELECT json_extract_string(json, '$.id'), json
+                FROM read_ndjson_objects(?)
+            """, [ndjson_path])
+        finally:
+            os.remove(ndjson_path)
     
     def store_users(self, users: List[Dict[str, Any]]):
         """Store users in the database
@@ -120,13 +347,11 @@ class DuckDBStorage:
         Args:
             users: List of user data dictionaries
         """
+        if not users:
+            return
         logger.info(f"Storing {len(users)} users in database")
-        for user in users:
-            self.conn.execute(
-                "INSERT OR REPLACE INTO users (id, data) VALUES (?, ?)",
-                [user["id"], json.dumps(user)]
-            )
-        logger.debug(f"Successfully stored {len(users)} users")
+        self._store_json_records("users", users)
+        logger.debug("Successfully stored %s users", len(users))
     
     def store_customers(self, customers: List[Dict[str, Any]]):
         """Store customers in the database
@@ -134,27 +359,225 @@ class DuckDBStorage:
         Args:
             customers: List of customer data dictionaries
         """
+        if not customers:
+            return
         logger.info(f"Storing {len(customers)} customers in database")
-        for customer in customers:
-            self.conn.execute(
-                "INSERT OR REPLACE INTO customers (id, data) VALUES (?, ?)",
-                [customer["id"], json.dumps(customer)]
-            )
-        logger.debug(f"Successfully stored {len(customers)} customers")    
+        self._store_json_records("customers", customers)
+        logger.debug("Successfully stored %s customers", len(customers))    
 
     def store_conversations(self, conversations: List[Dict[str, Any]]):
         """Store conversations in the database
         
+        The batch is written to a temporary NDJSON file and loaded with a single
+        bulk INSERT, letting DuckDB parse the JSON instead of inserting row by row.
+        
         Args:
             conversations: List of conversation data dictionaries
         """
+        if not conversations:
+            return
         logger.info(f"Storing {len(conversations)} conversations in database")
-        for conversation in conversations:
-            self.conn.execute(
-                "INSERT OR REPLACE INTO conversations (id, data) VALUES (?, ?)",
-                [conversation["id"], json.dumps(conversation)]
-            )
-        logger.debug(f"Successfully stored {len(conversations)} conversations")
+        
+        ndjson_path = self._write_ndjson(conversations)
+        try:
+            self.conn.execute("""
+                INSERT OR REPLACE INTO conversations (id, data, source_type, status, created_at)
+                SELECT f[1], json, f[2], f[3], f[4]
+                FROM (
+                    SELECT
+                        json,
+                        json_extract_string(json, ['$.id', '$.sourceType', '$.status', '$.createdAt']) as f
+                    FROM read_ndjson_objects(?)
+                )
+            """, [ndjson_path])
+        finally:
+            os.remove(ndjson_path)
+        logger.debug("Successfully stored %s conversations", len(conversations))
+    
+    def get_conversation_updated_at(self, conversation_ids: List[str]) -> Dict[str, Optional[str]]:
+        """Get the updatedAt of stored conversations
+        
+        Args:
+            conversation_ids: IDs of the conversations to look up
+            
+        Returns:
+            Mapping of conversation ID to its stored updatedAt (missing IDs are left out)
+        """
+        if not conversation_ids:
+            return {}
+        rows = self.conn.execute("""
+            SELECT id, json_extract_string(data, '$.updatedAt')
+            FROM conversations
+            WHERE id IN (SELECT unnest(?::VARCHAR[]))
+        """, [list(conversation_ids)]).fetchall()
+        return dict(rows)
+    
+    def get_cached_bq_categories(self, conversation_ids: List[str], max_age_hours: Optional[float] = None) -> Dict[str, Dict[str, Any]]:
+        """Get BigQuery category lookups cached by store_bq_categories
+        
+        Args:
+            conversation_ids: IDs of the conversations to look up
+            max_age_hours: Ignore entries fetched longer ago than this (None: no expiry)
+            
+        Returns:
+            Mapping of conversation ID to its cached category data (misses are left out)
+        """
+        if not conversation_ids:
+            return {}
+        query = """
+            SELECT conversation_id, ticket_category, ticket_sub_category, ticket_resolution
+            FROM bq_category_cache
+            WHERE conversation_id IN (SELECT unnest(?::VARCHAR[]))
+        """
+        params: List[Any] = [list(conversation_ids)]
+        if max_age_hours is not None:
+            query += " AND fetched_at >= CAST(now() AS TIMESTAMP) - to_seconds(?)"
+            params.append(max_age_hours * 3600)
+        rows = self.conn.execute(query, params).fetchall()
+        return {
+            conversation_id: {
+                'ticket_category': category,
+                'ticket_sub_category': sub_category,
+                'ticket_resolution': resolution
+            }
+            for conversation_id, category, sub_category, resolution in rows
+        }
+    
+    def store_bq_categories(self, categories: Dict[str, Dict[str, Any]]):
+        """Cache BigQuery category lookups, replacing older entries
+        
+        Args:
+            categories: Mapping of conversation ID to ticket_category, ticket_sub_category and ticket_resolution
+        """
+        if not categories:
+            return
+        logger.debug("Caching BigQuery categories for %s conversations", len(categories))
+        self.conn.executemany(
+            """
+            INSERT OR REPLACE INTO bq_category_cache
+                (conversation_id, ticket_category, ticket_sub_category, ticket_resolution, fetched_at)
+            VALUES (?, ?, ?, ?, CAST(now() AS TIMESTAMP))
+            """,
+            [
+                [conversation_id, data.get('ticket_category'), data.get('ticket_sub_category'), data.get('ticket_resolution')]
+                for conversation_id, data in categories.items()
+            ]
+        )
+    
+    def get_cached_ai_classifications(self, content_hashes: List[str], model: str) -> Dict[str, Dict[str, Any]]:
+        """Get AI classifications cached by store_ai_classifications
+        
+        Args:
+            content_hashes: Hashes of the classified conversation contents
+            model: Model that produced the classifications
+            
+        Returns:
+            Mapping of content hash to its category and sub_category (misses are left out)
+        """
+        if not content_hashes:
+            return {}
+        rows = self.conn.execute("""
+            SELECT content_hash, category, sub_category
+            FROM ai_classification_cache
+            WHERE model = ? AND content_hash IN (SELECT unnest(?::VARCHAR[]))
+        """, [model, list(content_hashes)]).fetchall()
+        return {
+            content_hash: {'category': category, 'sub_category': sub_category}
+            for content_hash, category, sub_category in rows
+        }
+    
+    def store_ai_classifications(self, classifications: Dict[str, Dict[str, Any]], model: str):
+        """Cache AI classifications, replacing older entries
+        
+        Args:
+            classifications: Mapping of content hash to a classification with category and sub_category
+            model: Model that produced the classifications
+        """
+        if not classifications:
+            return
+        logger.debug("Caching %s AI classifications", len(classifications))
+        self.conn.executemany(
+            """
+            INSERT OR REPLACE INTO ai_classification_cache (content_hash, model, category, sub_category, created_at)
+            VALUES (?, ?, ?, ?, CAST(now() AS TIMESTAMP))
+            """,
+            [
+                [content_hash, model, classification.get('category'), classification.get('sub_category')]
+                for content_hash, classification in classifications.items()
+            ]
+        )
+    
+    def get_cached_llm_responses(self, content_hashes: List[str], model: str) -> Dict[str, Dict[str, Any]]:
+        """Get reclassification responses cached by store_llm_responses
+        
+        Args:
+            content_hashes: Hashes of the classified message contents
+            model: Model that produced the responses
+            
+        Returns:
+            Mapping of content hash to its decoded response (misses are left out)
+        """
+        if not content_hashes:
+            return {}
+        rows = self.conn.execute("""
+            SELECT content_hash, response
+            FROM llm_response_cache
+            WHERE model = ? AND content_hash IN (SELECT unnest(?::VARCHAR[]))
+        """, [model, list(content_hashes)]).fetchall()
+        return {content_hash: json.loads(response) for content_hash, response in rows}
+    
+    def store_llm_responses(self, responses: Dict[str, Dict[str, Any]], model: str):
+        """Cache reclassification responses, keeping entries that already exist
+        
+        Args:
+            responses: Mapping of content hash to the response returned for that content
+            model: Model that produced the responses
+        """
+        if not responses:
+            return
+        logger.debug("Caching %s LLM responses", len(responses))
+        self.conn.executemany(
+            """
+            INSERT OR IGNORE INTO llm_response_cache (content_hash, model, response, created_at)
+            VALUES (?, ?, ?, CAST(now() AS TIMESTAMP))
+            """,
+            [[content_hash, model, json.dumps(response)] for content_hash, response in responses.items()]
+        )
+    
+    def get_fixed_conversation_ids(self, conversation_ids: List[str]) -> set:
+        """Get the conversations whose category fix was already written to Unthread
+        
+        Args:
+            conversation_ids: IDs of the conversations to check
+            
+        Returns:
+            Set of IDs recorded with status 'updated' by store_category_fix_progress
+        """
+        if not conversation_ids:
+            return set()
+        rows = self.conn.execute("""
+            SELECT conversation_id
+            FROM category_fix_progress
+            WHERE status = 'updated' AND conversation_id IN (SELECT unnest(?::VARCHAR[]))
+        """, [list(conversation_ids)]).fetchall()
+        return {row[0] for row in rows}
+    
+    def store_category_fix_progress(self, results: List[Tuple[str, str, str]]):
+        """Record category fix outcomes so interrupted runs can resume
+        
+        Args:
+            results: List of (conversation_id, status, data_source) tuples
+        """
+        if not results:
+            return
+        logger.debug("Recording category fix progress for %s conversations", len(results))
+        self.conn.executemany(
+            """
+            INSERT OR REPLACE INTO category_fix_progress (conversation_id, status, data_source, updated_at)
+            VALUES (?, ?, ?, CAST(now() AS TIMESTAMP))
+            """,
+            [list(result) for result in results]
+        )
     
     def store_messages(self, messages: List[Dict[str, Any]]):
         """Store messages in the database
@@ -162,24 +585,103 @@ class DuckDBStorage:
         Args:
             messages: List of message data dictionaries
         """
+        if not messages:
+            return
         logger.info(f"Storing {len(messages)} messages in database")
-        for message in messages:
-            self.conn.execute(
-                """
-                INSERT OR REPLACE INTO messages (id, data)
-                VALUES (?, ?)
-                """,
-                [
-                    message['id'],
-                    json.dumps(message)
-                ]
-            )
-        logger.debug(f"Successfully stored {len(messages)} messages")
+        self._store_json_records("messages", messages)
+        logger.debug("Successfully stored %s messages", len(messages))
+    
+    def store_message_reactions(self, messages: List[Tuple[str, str]], emoji: str):
+        """Record that Slack messages carry a reaction
+        
+        Args:
+            messages: List of (channel_id, ts) tuples identifying Slack messages
+            emoji: Emoji name (without colons) present on the messages
+        """
+        if not messages:
+            return
+        logger.debug("Recording :%s: on %s Slack messages", emoji, len(messages))
+        self.conn.executemany(
+            "INSERT OR IGNORE INTO message_reactions (channel_id, ts, emoji) VALUES (?, ?, ?)",
+            [[channel_id, ts, emoji] for channel_id, ts in messages]
+        )
+    
+    def store_processed_links(self, run_id: str, links: List[Dict[str, Any]]):
+        """Store processed Slack links in bulk
+        
+        Args:
+            run_id: Identifier of the processing run
+            links: List of link dictionaries with position, conversation_id, link, title and success
+        """
+        if not links:
+            return
+        logger.debug("Storing %s processed links for run %s", len(links), run_id)
+        links_df = pd.DataFrame(links, columns=['position', 'conversation_id', 'link', 'title', 'success'])
+        links_df.insert(0, 'run_id', run_id)
+        self.conn.register('processed_links_df', links_df)
+        try:
+            self.conn.execute("""
+                INSERT INTO processed_links (run_id, position, conversation_id, link, title, success)
+                SELECT run_id, position, conversation_id, link, title, success FROM processed_links_df
+            """)
+        finally:
+            self.conn.unregister('processed_links_df')
+    
+    def iter_processed_links(self, run_id: str, chunk_size: int = 1000) -> Iterator[Dict[str, Any]]:
+        """Iterate over the processed Slack links of a run in processing order
+        
+        Args:
+            run_id: Identifier of the processing run
+            chunk_size: Number of rows fetched from the database at a time
+            
+        Yields:
+            Link dictionaries
+        """
+        result = self.conn.execute("""
+            SELECT position, conversation_id, link, title, success
+            FROM processed_links
+            WHERE run_id = ?
+            ORDER BY position
+        """, [run_id])
+        while True:
+            rows = result.fetchmany(chunk_size)
+            if not rows:
+                break
+            for row in rows:
+                yield {
+                    'position': row[0],
+                    'conversation_id': row[1],
+                    'link': row[2],
+                    'title': row[3],
+                    'success': row[4]
+                }
+    
+    def attach(self, path: str, alias: str, read_only: bool = True):
+        """Attach another DuckDB database file so its tables can be queried in place
+        
+        Tables of the attached database are referenced as <alias>.<table>, which
+        avoids copying rows between database files.
+        
+        Args:
+            path: Path to the DuckDB database file to attach
+            alias: Name under which the database is attached
+            read_only: Whether to attach the database read-only
+        """
+        if not alias.isidentifier():
+            raise ValueError(f"Invalid database alias: {alias}")
+        # ATTACH does not accept prepared parameters, so quote the path literal
+        quoted_path = path.replace("'", "''")
+        options = " (READ_ONLY)" if read_only else ""
+        self.conn.execute(f"ATTACH '{quoted_path}' AS {alias}{options}")
+        logger.info(f"Attached DuckDB database {path} as {alias}")
     
     def close(self):
         """Close the database connection"""
         if hasattr(self, 'conn'):
             logger.debug("Closing database connection")
+            for storage in self._thread_storages:
+                storage.close()
+            self._thread_storages.clear()
             self.conn.close()
             logger.debug("Database connection closed")
 
@@ -205,34 +707,46 @@ class DuckDBStorage:
                     str(result) if result else 'Unknown error',
                     'Error'
                 ))
-        for row in classification_data:
+        if not classification_data:
+            return
+        # One set-based UPSERT; a conversation repeated in the batch keeps its
+        # last non-null value per column, as row-by-row upserts would
+        classifications_df = pd.DataFrame(
+            classification_data,
+            columns=['conversation_id', 'category', 'sub_category', 'reasoning', 'resolution']
+        ).groupby('conversation_id', sort=False).last().reset_index()
+        self.conn.register('classifications_df', classifications_df)
+        try:
             self.conn.execute("""
                 INSERT INTO conversation_classifications 
                     (conversation_id, category, sub_category, reasoning, resolution)
-                VALUES (?, ?, ?, ?, ?)
+                SELECT conversation_id, category, sub_category, reasoning, resolution FROM classifications_df
                 ON CONFLICT(conversation_id) DO UPDATE SET
                     category = CASE WHEN excluded.category IS NOT NULL THEN excluded.category ELSE conversation_classifications.category END,
                     sub_category = CASE WHEN excluded.sub_category IS NOT NULL THEN excluded.sub_category ELSE conversation_classifications.sub_category END,
                     reasoning = CASE WHEN excluded.reasoning IS NOT NULL THEN excluded.reasoning ELSE conversation_classifications.reasoning END,
                     resolution = CASE WHEN excluded.resolution IS NOT NULL THEN excluded.resolution ELSE conversation_classifications.resolution END
-            """, row)
+            """)
+        finally:
+            self.conn.unregister('classifications_df')
         logger.info(f"Saved {len(classification_data)} classifications to database (UPSERT)")
 
     def get_conversations(self) -> List[Dict[str, Any]]:
         """Get conversations from the database."""
-        with open('data/extract_for_summary.sql', 'r') as f:
-            query = f.read()
-        results = self.conn.execute(query).fetchall()
-        # Convert to list of dictionaries
-        conversations = []
-        for row in results:
-            conv = {
-                'conversation_id': row[0],
-                'ticket_type': row[13],
-                'message_content': row[20]
+        query = _read_sql(CONVERSATIONS_SQL_PATH)
+        # Select only the needed columns by name; DuckDB prunes the rest of the projection
+        results = self.conn.execute(f"""
+            SELECT id, ticketType, allMessages
+            FROM ({query})
+        """).fetchall()
+        return [
+            {
+                'conversation_id': conversation_id,
+                'ticket_type': ticket_type,
+                'message_content': message_content
             }
-            conversations.append(conv)
-        return conversations 
+            for conversation_id, ticket_type, message_content in results
+        ]
 
     def get_classifications_for_update(self) -> List[Dict[str, Any]]:
         """Get classifications from database that need to be updated
@@ -240,6 +754,24 @@ class DuckDBStorage:
         Returns:
             List of classification data dictionaries
         """
+        return [
+            classification
+            for batch in self.iter_classifications_for_update()
+            for classification in batch
+        ]
+    
+    def iter_classifications_for_update(self, batch_size: int = 100) -> Iterator[List[Dict[str, Any]]]:
+        """Stream classifications that need to be updated, batch_size rows at a time
+        
+        The rows are read through a dedicated cursor, so the caller can mark
+        conversations as updated on the main connection while iterating.
+        
+        Args:
+            batch_size: Number of classifications per batch
+            
+        Yields:
+            Lists of classification data dictionaries
+        """
         query = """
             SELECT 
                 cc.conversation_id,
@@ -257,23 +789,29 @@ class DuckDBStorage:
             ORDER BY created_at DESC
             LIMIT 100
         """
+        cursor = self.conn.cursor()
         try:
-            results = self.conn.execute(query).fetchall()
-            classifications = []
-            for row in results:
-                classification = {
-                    'conversation_id': row[0],
-                    'category': row[1],
-                    'sub_category': row[2],
-                    'resolution': row[3],
-                    'cluster': row[4],
-                    'created_at': row[5]
-                }
-                classifications.append(classification)
-            return classifications
+            cursor.execute(query)
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                yield [
+                    {
+                        'conversation_id': row[0],
+                        'category': row[1],
+                        'sub_category': row[2],
+                        'resolution': row[3],
+                        'cluster': row[4],
+                        'created_at': row[5]
+                    }
+                    for row in rows
+                ]
         except Exception as e:
             logger.error(f"Error fetching classifications: {str(e)}")
             raise
+        finally:
+            cursor.close()
 
     def mark_conversation_updated(self, conversation_id: str):
         """Mark a conversation as successfully updated in the database
@@ -281,12 +819,32 @@ class DuckDBStorage:
         Args:
             conversation_id: The conversation ID to mark as updated
         """
+        self.mark_conversations_updated([conversation_id])
+    
+    def mark_conversations_updated(self, conversation_ids: List[str]) -> List[str]:
+        """Mark conversations as successfully updated in the database with one UPDATE
+        
+        Rows that are already marked are left alone, so the returned IDs are
+        exactly the ones this call transitioned.
+        
+        Args:
+            conversation_ids: The conversation IDs to mark as updated
+            
+        Returns:
+            List of conversation IDs that were marked by this call
+        """
+        if not conversation_ids:
+            return []
         try:
             update_query = """
                 UPDATE conversation_classifications 
                 SET updated_time = CURRENT_TIMESTAMP 
-                WHERE conversation_id = ?
+                WHERE conversation_id IN (SELECT unnest(?::VARCHAR[]))
+                AND updated_time IS NULL
+                RETURNING conversation_id
             """
-            self.conn.execute(update_query, [conversation_id])
+            rows = self.conn.execute(update_query, [list(conversation_ids)]).fetchall()
+            return [row[0] for row in rows]
         except Exception as e:
-            logger.error(f"Error marking conversation {conversation_id} as updated: {str(e)}") 
\ No newline at end of file
+            logger.error(f"Error marking {len(conversation_ids)} conversations as updated: {str(e)}")
+            return []
@@ -4,6 +4,7 @@ Data updater for Unthread conversations
 
 import os
 import logging
+from concurrent.futures import ThreadPoolExecutor, as_completed, wait, FIRST_COMPLETED
 from typing import Optional, Dict, Any, List
 from datetime import datetime, timezone
 
@@ -12,6 +13,17 @@ from unthread_extractor.storage import DuckDBStorage
 
 logger = logging.getLogger(__name__)
 
+# Conversations updated in parallel within a batch
+DEFAULT_MAX_WORKERS = 5
+
+# Custom ticket field IDs for the classification fields
+CUSTOM_FIELD_IDS = {
+    "category": "1a6900f6-36d2-4380-ad06-790b0b05c4b3",
+    "sub_category": "05492140-551c-49ea-a8a2-4caeec8cda4d",
+    "resolution": "5ccb3d90-fbaf-4eea-ac88-ef3a82705ab2",
+    "cluster": "59f823e5-921d-4a4d-81bb-052fb2c8593a",
+}
+
 class UnthreadUpdater:
     """Data updater for Unthread conversations"""
     
@@ -20,7 +32,8 @@ class UnthreadUpdater:
         api: Optional[UnthreadAPI] = None,
         storage: Optional[DuckDBStorage] = None,
         db_path: Optional[str] = None,
-        batch_size: int = 50
+        batch_size: int = 50,
+        max_workers: int = DEFAULT_MAX_WORKERS
     ):
         """Initialize updater
         
@@ -29,14 +42,15 @@ class UnthreadUpdater:
             storage: Optional DuckDBStorage instance
             db_path: Optional path to database file
             batch_size: Number of conversations to update in each batch
+            max_workers: Number of conversations updated in parallel
         """
-        # Get API key from environment
-        api_key = os.environ.get("UNTHREAD_API_KEY")
-        if not api_key:
-            raise ValueError("UNTHREAD_API_KEY environment variable not set")
-        
-        # Initialize API client
-        self.api = api or UnthreadAPI(api_key, "https://api.unthread.io/api")
+        # Initialize API client; the environment is only read when none was given
+        if api is None:
+            api_key = os.environ.get("UNTHREAD_API_KEY")
+            if not api_key:
+                raise ValueError("UNTHREAD_API_KEY environment variable not set")
+            api = UnthreadAPI(api_key, "https://api.unthread.io/api")
+        self.api = api
         logger.debug("Initialized API client")
         
         # Initialize storage
@@ -50,19 +64,11 @@ class UnthreadUpdater:
         
         # Set batch size
         self.batch_size = batch_size
-        logger.debug(f"Batch size set to {batch_size}")
+        self.max_workers = max_workers
+        logger.debug("Batch size set to %s, max workers %s", batch_size, max_workers)
     
     def get_custom_field_id(self, field_name):
-        if field_name == "category":
-            return "1a6900f6-36d2-4380-ad06-790b0b05c4b3"
-        elif field_name == "sub_category":
-            return "05492140-551c-49ea-a8a2-4caeec8cda4d"
-        elif field_name == "resolution":
-            return "5ccb3d90-fbaf-4eea-ac88-ef3a82705ab2"
-        elif field_name == "cluster":
-            return "59f823e5-921d-4a4d-81bb-052fb2c8593a"
-        else:
-            return None
+        return CUSTOM_FIELD_IDS.get(field_name)
         
     def update_conversation(self, conversation_id: str, category: str, sub_category: str, resolution: str, cluster: str) -> bool:
         """Update a single conversation via API
@@ -77,17 +83,18 @@ class UnthreadUpdater:
         """
         try:
             # Prepare the update payload
-            ticketTypeFields = {}
-            ticketTypeFields[self.get_custom_field_id("category")] = category
-            ticketTypeFields[self.get_custom_field_id("resolution")] = resolution
-            ticketTypeFields[self.get_custom_field_id("sub_category")] = sub_category
-            ticketTypeFields[self.get_custom_field_id("cluster")] = cluster
-                
+            ticketTypeFields = {
+                CUSTOM_FIELD_IDS["category"]: category,
+                CUSTOM_FIELD_IDS["resolution"]: resolution,
+                CUSTOM_FIELD_IDS["sub_category"]: sub_category,
+                CUSTOM_FIELD_IDS["cluster"]: cluster,
+            }
+            
             update_data = {
                 "ticketTypeFields": ticketTypeFields
             }
             
-            logger.debug(f"Updating conversation {conversation_id} with category: {category}, resolution: {resolution}, sub_category: {sub_category}, cluster: {cluster}")
+            logger.debug("Updating conversation %s with category: %s, resolution: %s, sub_category: %s, cluster: %s", conversation_id, category, resolution, sub_category, cluster)
             
             # Make the PATCH request
             response_data, _, _ = self.api.make_api_request(
@@ -96,7 +103,7 @@ class UnthreadUpdater:
                 data=update_data
             )
             
-            logger.debug(f"Successfully updated conversation {conversation_id}")
+            logger.debug("Successfully updated conversation %s", conversation_id)
             return True
             
         except Exception as e:
@@ -114,30 +121,27 @@ class UnthreadUpdater:
         """
         success_count = 0
         failure_count = 0
+        updated_ids = []
         
-        logger.debug(f"Processing batch of {len(batch)} conversations")
+        logger.debug("Processing batch of %s conversations", len(batch))
         
-        for classification in batch:
-            conversation_id = classification['conversation_id']
-            category = classification['category']
-            resolution = classification['resolution']
-            sub_category = classification['sub_category']   
-            cluster = classification['cluster']
-            
-            try:
-                success = self.update_conversation(conversation_id, category, sub_category, resolution, cluster)
-                
-                if success:
-                    self.storage.mark_conversation_updated(conversation_id)
+        # Updates only wait on the API, so the batch's PATCHes run concurrently
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            futures = {
+                executor.submit(self._update_classification, classification): classification['conversation_id']
+                for classification in batch
+            }
+            for future in as_completed(futures):
+                conversation_id = futures[future]
+                if future.result():
+                    updated_ids.append(conversation_id)
                     success_count += 1
-                    logger.debug(f"✓ Successfully updated conversation {conversation_id}")
+                    logger.debug("✓ Successfully updated conversation %s", conversation_id)
                 else:
                     failure_count += 1
-                    logger.warning(f"✗ Failed to update conversation {conversation_id}")
-                    
-            except Exception as e:
-                failure_count += 1
-                logger.error(f"✗ Exception updating conversation {conversation_id}: {str(e)}")
+        
+        # Record the whole batch's successes in one statement
+        self._mark_updated(updated_ids)
         
         logger.info(f"Batch completed: {success_count} successful, {failure_count} failed")
         return {
@@ -145,6 +149,44 @@ class UnthreadUpdater:
             'failure': failure_count
         }
     
+    def _mark_updated(self, conversation_ids: List[str]):
+        """Mark updated conversations in one statement and report rows that were already marked
+        
+        Args:
+            conversation_ids: The conversation IDs that were successfully updated
+        """
+        marked_ids = self.storage.mark_conversations_updated(conversation_ids)
+        if len(marked_ids) < len(conversation_ids):
+            logger.warning(
+                f"{len(conversation_ids) - len(marked_ids)} updated conversations were already marked "
+                f"(possibly by a concurrent run)"
+            )
+    
+    def _update_classification(self, classification: Dict[str, Any]) -> bool:
+        """Update one conversation from its classification
+        
+        Args:
+            classification: Classification dictionary from get_classifications_for_update
+            
+        Returns:
+            True if successful, False otherwise
+        """
+        conversation_id = classification['conversation_id']
+        try:
+            success = self.update_conversation(
+                conversation_id,
+                classification['category'],
+                classification['sub_category'],
+                classification['resolution'],
+                classification['cluster']
+            )
+            if not success:
+                logger.warning(f"✗ Failed to update conversation {conversation_id}")
+            return success
+        except Exception as e:
+            logger.error(f"✗ Exception updating conversation {conversation_id}: {str(e)}")
+            return False
+    
     def update_all_conversations(self) -> Dict[str, int]:
         """Update all conversations that need updating
         
@@ -153,31 +195,53 @@ class UnthreadUpdater:
         """
         logger.debug("Starting conversation update process")
         
-        # Get all classifications that need updating
-        classifications = self.storage.get_classifications_for_update()
-        
-        if not classifications:
-            logger.info("No conversations need updating")
-            return {'success': 0, 'failure': 0}
-        
         total_success = 0
         total_failure = 0
         batch_count = 0
-        
-        # Process in batches
-        for i in range(0, len(classifications), self.batch_size):
-            batch_count += 1
-            batch = classifications[i:i + self.batch_size]
-            
-            logger.info(f"Processing batch {batch_count} ({len(batch)} conversations)")
-            
-            batch_results = self.update_conversations_batch(batch)
-            total_success += batch_results['success']
-            total_failure += batch_results['failure']
+        updated_ids = []
+        futures = {}
+        
+        def collect(done):
+            nonlocal total_success, total_failure
+            for future in done:
+                conversation_id = futures.pop(future)
+                if future.result():
+                    updated_ids.append(conversation_id)
+                    total_success += 1
+                    logger.debug("✓ Successfully updated conversation %s", conversation_id)
+                else:
+                    total_failure += 1
+            # Mark finished conversations in batch-sized statements while PATCHes keep running
+            if len(updated_ids) >= self.batch_size:
+                self._mark_updated(updated_ids)
+                updated_ids.clear()
+        
+        # Reading, PATCHing and marking overlap: batches are streamed from the database into
+        # one pool that keeps a bounded number of updates in flight, so a slow PATCH only
+        # holds up its own worker instead of the whole batch
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            for batch in self.storage.iter_classifications_for_update(self.batch_size):
+                batch_count += 1
+                logger.info(f"Processing batch {batch_count} ({len(batch)} conversations)")
+                
+                for classification in batch:
+                    if len(futures) >= 2 * self.max_workers:
+                        done, _ = wait(futures, return_when=FIRST_COMPLETED)
+                        collect(done)
+                    futures[executor.submit(self._update_classification, classification)] = classification['conversation_id']
+                
+                logger.debug("Batch %s queued. Progress: %s conversations processed", batch_count, total_success + total_failure)
             
-            logger.debug(f"Batch {batch_count} completed. Progress: {total_success + total_failure}/{len(classifications)} conversations processed")
+            collect(wait(futures).done)
+        
+        if updated_ids:
+            self._mark_updated(updated_ids)
+        
+        if not batch_count:
+            logger.info("No conversations need updating")
+            return {'success': 0, 'failure': 0}
         
-        logger.debug(f"Update process completed. Total: {total_success} successful, {total_failure} failed")
+        logger.debug("Update process completed. Total: %s successful, %s failed", total_success, total_failure)
         return {
             'success': total_success,
             'failure': total_failure,
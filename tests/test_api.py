@@ -32,7 +32,7 @@ def test_api_initialization(api_client):
     assert api_client.headers["X-Api-Key"] == "test-key"
     assert api_client.headers["Content-Type"] == "application/json"
 
-@patch('requests.get')
+@patch('requests.Session.request')
 def test_make_api_request_get(mock_get, api_client, mock_response):
     """Test GET request"""
     mock_get.return_value = mock_response
@@ -44,9 +44,11 @@ def test_make_api_request_get(mock_get, api_client, mock_response):
     
     # Verify request
     mock_get.assert_called_once_with(
-        url="https://api.test.com/test",
-        headers=api_client.headers,
-        params=None
+        "GET",
+        "https://api.test.com/test",
+        json=None,
+        params=None,
+        timeout=30
     )
     
     # Verify response handling
@@ -56,7 +58,7 @@ def test_make_api_request_get(mock_get, api_client, mock_response):
     assert next_cursor == "next-cursor"
     assert has_next is True
 
-@patch('requests.post')
+@patch('requests.Session.request')
 def test_make_api_request_post(mock_post, api_client, mock_response):
     """Test POST request"""
     mock_post.return_value = mock_response
@@ -69,10 +71,11 @@ def test_make_api_request_post(mock_post, api_client, mock_response):
     
     # Verify request
     mock_post.assert_called_once_with(
-        url="https://api.test.com/test",
-        headers=api_client.headers,
+        "POST",
+        "https://api.test.com/test",
         json={"test": "data"},
-        params=None
+        params=None,
+        timeout=30
     )
     
     # Verify response handling
@@ -80,7 +83,7 @@ def test_make_api_request_post(mock_post, api_client, mock_response):
     assert next_cursor == "next-cursor"
     assert has_next is True
 
-@patch('requests.patch')
+@patch('requests.Session.request')
 def test_make_api_request_patch(mock_patch, api_client, mock_response):
     """Test PATCH request"""
     mock_patch.return_value = mock_response
@@ -93,10 +96,11 @@ def test_make_api_request_patch(mock_patch, api_client, mock_response):
     
     # Verify request
     mock_patch.assert_called_once_with(
-        url="https://api.test.com/test",
-        headers=api_client.headers,
+        "PATCH",
+        "https://api.test.com/test",
         json={"test": "data"},
-        params=None
+        params=None,
+        timeout=30
     )
     
     # Verify response handling
@@ -104,57 +108,94 @@ def test_make_api_request_patch(mock_patch, api_client, mock_response):
     assert next_cursor is None
     assert has_next is False
 
-def test_make_api_request_invalid_method(api_client):
+@patch('requests.Session.request')
+def test_make_api_request_does_not_modify_data(mock_post, api_client, mock_response):
+    """Test that the cursor is sent without being added to the caller's data"""
+    mock_post.return_value = mock_response
+    data = {"test": "data"}
+    
+    api_client.make_api_request(
+        endpoint="/test",
+        method="POST",
+        data=data,
+        cursor="test-cursor"
+    )
+    
+    assert mock_post.call_args.kwargs["json"] == {"test": "data", "cursor": "test-cursor"}
+    assert data == {"test": "data"}
+
+@patch('requests.Session.request')
+def test_get_conversations_bulk(mock_post, api_client, mock_response):
+    """Test fetching conversations through paged "in" filters on the list endpoint"""
+    last_page = MagicMock()
+    last_page.json.return_value = {"data": [{"id": "3"}], "cursors": {"hasNext": False}}
+    mock_post.side_effect = [mock_response, last_page]
+    
+    conversations = api_client.get_conversations_bulk(["1", "2", "3"])
+    
+    assert list(conversations) == ["1", "2", "3"]
+    first_body = mock_post.call_args_list[0].kwargs["json"]
+    assert first_body["where"] == [{"field": "id", "operator": "in", "value": ["1", "2", "3"]}]
+    assert mock_post.call_args_list[1].kwargs["json"]["cursor"] == "next-cursor"
+
+@patch('requests.Session.request')
+def test_make_api_request_invalid_method(mock_request, api_client):
     """Test request with invalid HTTP method"""
     with pytest.raises(ValueError):
         api_client.make_api_request(
             endpoint="/test",
             method="INVALID"
         )
+    mock_request.assert_not_called()
 
-@patch('requests.get')
-def test_make_api_request_retry(mock_get, api_client):
-    """Test request retry behavior"""
-    # First two attempts fail, third succeeds
-    mock_get.side_effect = [
-        requests.exceptions.RequestException("First failure"),
-        requests.exceptions.RequestException("Second failure"),
-        MagicMock(
-            status_code=200,
-            json=lambda: {
-                "data": [{"id": "1"}],
-                "cursors": {"hasNext": False}
-            }
-        )
-    ]
+def test_session_retry_configuration(api_client):
+    """Test that retries with backoff are configured on the session adapter"""
+    adapter = api_client.session.get_adapter("https://api.test.com/test")
+    retry = adapter.max_retries
+    
+    assert retry.total == 3
+    assert retry.backoff_factor == 0.5
+    assert 429 in retry.status_forcelist
+    assert {"GET", "POST", "PATCH"} <= set(retry.allowed_methods)
+    assert api_client.session.headers["X-Api-Key"] == "test-key"
+
+@patch('requests.Session.request')
+def test_make_api_request_rate_limit(mock_post, mock_response):
+    """Test that a rate-limited client acquires a token before each request"""
+    mock_post.return_value = mock_response
+    client = UnthreadAPI(api_key="test-key", base_url="https://api.test.com", rate_limit=10)
+    client.limiter = MagicMock(wraps=client.limiter)
     
-    items, next_cursor, has_next = api_client.make_api_request(
-        endpoint="/test",
-        method="GET",
-        max_retries=3
-    )
+    client.make_api_request(endpoint="/test", method="POST", data={})
+    client.make_api_request(endpoint="/test", method="POST", data={})
     
-    assert mock_get.call_count == 3
-    assert len(items) == 1
-    assert next_cursor is None
-    assert has_next is False
+    assert client.limiter.acquire.call_count == 2
+
+@patch('requests.Session.request')
+def test_make_api_request_counts_throttled(mock_post, api_client, mock_response):
+    """Test that requests retried after a 429 are counted"""
+    mock_response.raw.retries.history = [MagicMock(status=429)]
+    mock_post.return_value = mock_response
+    
+    api_client.make_api_request(endpoint="/test", method="POST", data={})
+    
+    assert api_client.throttled_requests == 1
 
-@patch('requests.get')
-def test_make_api_request_max_retries_exceeded(mock_get, api_client):
-    """Test behavior when max retries are exceeded"""
+@patch('requests.Session.request')
+def test_make_api_request_failure(mock_get, api_client):
+    """Test behavior when the request fails after adapter retries"""
     mock_get.side_effect = requests.exceptions.RequestException("API Error")
     
     with pytest.raises(Exception) as exc_info:
         api_client.make_api_request(
             endpoint="/test",
-            method="GET",
-            max_retries=3
+            method="GET"
         )
     
-    assert "API request failed after 3 attempts" in str(exc_info.value)
-    assert mock_get.call_count == 3
+    assert "API request failed after 3 retries" in str(exc_info.value)
+    assert mock_get.call_count == 1
 
-@patch('requests.get')
+@patch('requests.Session.request')
 def test_make_api_request_with_cursor(mock_get, api_client, mock_response):
     """Test request with cursor-based pagination"""
     mock_get.return_value = mock_response
@@ -167,9 +208,11 @@ def test_make_api_request_with_cursor(mock_get, api_client, mock_response):
     
     # Verify request
     mock_get.assert_called_once_with(
-        url="https://api.test.com/test",
-        headers=api_client.headers,
-        params=None
+        "GET",
+        "https://api.test.com/test",
+        json=None,
+        params=None,
+        timeout=30
     )
     
     # Verify response handling
@@ -1,7 +1,7 @@
 import pytest
 from unittest.mock import patch, MagicMock
 from datetime import datetime
-from src.unthread_extractor.cli import parse_date, setup_logging, main
+from src.unthread_extractor.cli import parse_date, setup_logging, main, build_parser, SUBCOMMAND_BUILDERS, CommandContext, apply_config_defaults, _date_range
 
 def test_parse_date_valid():
     """Test parsing valid date string"""
@@ -9,10 +9,67 @@ def test_parse_date_valid():
     expected = datetime(2024, 3, 20).isoformat()
     assert parse_date(date_str) == expected
 
+def test_parse_date_single_digit_fields():
+    """Test that single-digit months and days are accepted, as with strptime"""
+    assert parse_date("2024-3-1") == datetime(2024, 3, 1).isoformat()
+
 def test_parse_date_invalid():
     """Test parsing invalid date string"""
     with pytest.raises(ValueError):
         parse_date("invalid-date")
+    with pytest.raises(ValueError):
+        parse_date("2024-02-30")
+
+def test_date_range():
+    """Test parsing and validation of a start/end date pair"""
+    assert _date_range(None, None) == (None, None)
+    assert _date_range("2024-01-01", None) == ("2024-01-01T00:00:00", None)
+    assert _date_range("2024-01-01", "2024-01-01") == ("2024-01-01T00:00:00", "2024-01-01T00:00:00")
+    with pytest.raises(ValueError):
+        _date_range("2024-02-01", "2024-01-01")
+
+def test_build_parser_only_requested_subcommand():
+    """Test that only the requested subcommand parser is built"""
+    parser = build_parser(['--log-level', 'DEBUG', 'update', '--batch-size', '5'])
+    subparsers = parser._subparsers._group_actions[0]
+    assert list(subparsers.choices) == ['update']
+    
+    args = parser.parse_args(['--log-level', 'DEBUG', 'update', '--batch-size', '5'])
+    assert args.command == 'update'
+    assert args.batch_size == 5
+
+def test_build_parser_all_subcommands_without_command():
+    """Test that every subcommand parser is built when no command is given"""
+    parser = build_parser(['--help'])
+    subparsers = parser._subparsers._group_actions[0]
+    assert list(subparsers.choices) == list(SUBCOMMAND_BUILDERS)
+
+def test_build_parser_is_cached():
+    """Test that the parser for a command is only built once"""
+    assert build_parser(['users']) is build_parser(['users', '--log-level', 'DEBUG'])
+    assert build_parser(['users']) is not build_parser(['customers'])
+
+def test_setup_logging_invalid_level():
+    """Test that an unknown log level is rejected"""
+    with pytest.raises(ValueError):
+        setup_logging("LOUD")
+
+def test_apply_config_defaults():
+    """Test batch size resolution: flag, then environment, then per-command default"""
+    config = MagicMock(batch_size=None, max_workers=None)
+    args = build_parser(['update']).parse_args(['update'])
+    apply_config_defaults(args, config)
+    assert args.batch_size == 50
+    
+    config.batch_size = 25
+    args = build_parser(['update']).parse_args(['update'])
+    apply_config_defaults(args, config)
+    assert args.batch_size == 25
+    
+    args = build_parser(['conversations']).parse_args(['conversations', '--batch-size', '7'])
+    apply_config_defaults(args, config)
+    assert args.batch_size == 7
+    assert args.max_workers == 5
 
 @pytest.fixture
 def mock_config():
@@ -28,42 +85,42 @@ def mock_config():
 @pytest.fixture
 def mock_extractor():
     """Mock extractor fixture"""
-    with patch('src.unthread_extractor.cli.UnthreadExtractor') as mock:
+    with patch('src.unthread_extractor.extractor.UnthreadExtractor') as mock:
         extractor = MagicMock()
         mock.return_value = extractor
         yield extractor
 
-def test_cli_users_command(mock_extractor):
+def test_cli_users_command(mock_extractor, tmp_path):
     """Test users command"""
     with patch('src.unthread_extractor.cli.Config.from_env') as mock_from_env:
         config = MagicMock()
         config.api_key = "test-api-key"
         config.base_url = "https://api.test.com"
-        config.db_path = "data/test.db"
+        config.db_path = str(tmp_path / "test.db")
         mock_from_env.return_value = config
         with patch('sys.argv', ['script', 'users']):
             main()
             mock_extractor.download_users.assert_called_once()
 
-def test_cli_customers_command(mock_extractor):
+def test_cli_customers_command(mock_extractor, tmp_path):
     """Test customers command"""
     with patch('src.unthread_extractor.cli.Config.from_env') as mock_from_env:
         config = MagicMock()
         config.api_key = "test-api-key"
         config.base_url = "https://api.test.com"
-        config.db_path = "data/test.db"
+        config.db_path = str(tmp_path / "test.db")
         mock_from_env.return_value = config
         with patch('sys.argv', ['script', 'customers']):
             main()
             mock_extractor.download_customers.assert_called_once()
 
-def test_cli_conversations_command(mock_extractor):
+def test_cli_conversations_command(mock_extractor, tmp_path):
     """Test conversations command with date filters"""
     with patch('src.unthread_extractor.cli.Config.from_env') as mock_from_env:
         config = MagicMock()
         config.api_key = "test-api-key"
         config.base_url = "https://api.test.com"
-        config.db_path = "data/test.db"
+        config.db_path = str(tmp_path / "test.db")
         mock_from_env.return_value = config
         with patch('sys.argv', [
             'script', 'conversations',
@@ -74,60 +131,88 @@ def test_cli_conversations_command(mock_extractor):
             mock_extractor.download_conversations.assert_called_once_with(
                 modified_after=datetime(2024, 3, 1).isoformat(),
                 modified_before=datetime(2024, 3, 20).isoformat(),
-                conversation_id=None
+                conversation_id=None,
+                skip_unchanged=False,
+                use_list_data=False
             )
 
-def test_cli_messages_command(mock_extractor):
+def test_cli_messages_command(mock_extractor, tmp_path):
     """Test messages command"""
     with patch('src.unthread_extractor.cli.Config.from_env') as mock_from_env:
         config = MagicMock()
         config.api_key = "test-api-key"
         config.base_url = "https://api.test.com"
-        config.db_path = "data/test.db"
+        config.db_path = str(tmp_path / "test.db")
         mock_from_env.return_value = config
         with patch('sys.argv', [
             'script', 'messages',
             '--conversation-id', 'test-conv-id'
         ]):
             main()
-            mock_extractor.download_messages.assert_called_once_with('test-conv-id')
+            mock_extractor.download_messages.assert_called_once_with('test-conv-id', return_records=False)
 
-def test_cli_all_command(mock_extractor):
+def test_cli_all_command(mock_extractor, tmp_path):
     """Test all command"""
     with patch('src.unthread_extractor.cli.Config.from_env') as mock_from_env:
         config = MagicMock()
         config.api_key = "test-api-key"
         config.base_url = "https://api.test.com"
-        config.db_path = "data/test.db"
+        config.db_path = str(tmp_path / "test.db")
         mock_from_env.return_value = config
         with patch('sys.argv', ['script', 'all']):
             main()
-            mock_extractor.download_users.assert_called_once()
+            mock_extractor.download_reference_data.assert_called_once()
             mock_extractor.download_conversations.assert_called_once()
 
-def test_cli_no_command(mock_extractor):
+def test_cli_no_command(mock_extractor, tmp_path):
     """Test behavior when no command is provided"""
     with patch('src.unthread_extractor.cli.Config.from_env') as mock_from_env:
         config = MagicMock()
         config.api_key = "test-api-key"
         config.base_url = "https://api.test.com"
-        config.db_path = "data/test.db"
+        config.db_path = str(tmp_path / "test.db")
         mock_from_env.return_value = config
         with patch('sys.argv', ['script']), \
              patch('sys.exit') as mock_exit:
             main()
             mock_exit.assert_called_once_with(1)
 
-def test_cli_error_handling(mock_extractor):
+def test_cli_error_handling(mock_extractor, tmp_path):
     """Test error handling in CLI"""
     with patch('src.unthread_extractor.cli.Config.from_env') as mock_from_env:
         config = MagicMock()
         config.api_key = "test-api-key"
         config.base_url = "https://api.test.com"
-        config.db_path = "data/test.db"
+        config.db_path = str(tmp_path / "test.db")
         mock_from_env.return_value = config
         mock_extractor.download_users.side_effect = Exception("Test error")
         with patch('sys.argv', ['script', 'users']), \
              patch('sys.exit') as mock_exit:
             main()
-            mock_exit.assert_called_once_with(1) 
\ No newline at end of file
+            mock_exit.assert_called_once_with(1) 
+def test_cli_reclassify_command(tmp_path):
+    """Test that reclassify passes --use-batch-api through"""
+    with patch('src.unthread_extractor.cli.Config.from_env') as mock_from_env, \
+         patch('src.unthread_extractor.reclassify.process_conversations_batch') as mock_process:
+        config = MagicMock()
+        config.api_key = "test-api-key"
+        config.base_url = "https://api.test.com"
+        config.db_path = str(tmp_path / "test.db")
+        config.batch_size = None
+        mock_from_env.return_value = config
+        with patch('sys.argv', ['script', 'reclassify', '--use-batch-api', '--max-conversations', '5']):
+            main()
+            assert mock_process.call_args.kwargs['use_batch_api'] is True
+            assert mock_process.call_args.kwargs['max_conversations'] == 5
+
+def test_command_context_is_lazy(mock_config):
+    """Test that the context only opens storage when a handler uses it"""
+    with patch('src.unthread_extractor.storage.DuckDBStorage') as mock_storage:
+        ctx = CommandContext(mock_config)
+        ctx.close()
+        mock_storage.assert_not_called()
+        
+        assert ctx.storage is ctx.storage
+        mock_storage.assert_called_once_with("test.db")
+        ctx.close()
+        mock_storage.return_value.close.assert_called_once()
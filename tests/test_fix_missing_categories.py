@@ -0,0 +1,71 @@
+import json
+import pytest
+from unittest.mock import MagicMock
+from src.unthread_extractor.fix_missing_categories import MissingCategoryFixer
+
+def _reply(content):
+    response = MagicMock()
+    response.choices[0].message.content = content if isinstance(content, str) else json.dumps(content)
+    return response
+
+@pytest.fixture
+def fixer(monkeypatch):
+    """Fixer with a mocked OpenAI client and no rate limits"""
+    monkeypatch.delenv("OPENAI_API_KEY", raising=False)
+    monkeypatch.delenv("OPENAI_MAX_RPM", raising=False)
+    monkeypatch.delenv("OPENAI_MAX_TPM", raising=False)
+    fixer = MissingCategoryFixer(MagicMock(), MagicMock())
+    fixer.openai_client = MagicMock()
+    return fixer
+
+def test_classify_conversations_batch_matches_ids(fixer):
+    """Test that batched replies are matched to cases by id, not position"""
+    fixer.openai_client.chat.completions.create.return_value = _reply({"classifications": [
+        {"id": "1", "category": "Admin", "sub_category": "Billing", "reasoning": "r"},
+        {"id": "0", "category": "LangSmith", "sub_category": "Tracing", "reasoning": "r"}
+    ]})
+    
+    results = fixer.classify_conversations_batch(["first", "second"])
+    
+    assert [result["category"] for result in results] == ["LangSmith", "Admin"]
+    assert fixer.openai_client.chat.completions.create.call_count == 1
+    assert "max_tokens" not in fixer.openai_client.chat.completions.create.call_args.kwargs
+
+def test_classify_conversations_batch_missing_id_falls_back(fixer):
+    """Test that a case missing from the batched reply is classified on its own"""
+    fixer.openai_client.chat.completions.create.side_effect = [
+        _reply({"classifications": [{"id": "0", "category": "Admin", "sub_category": "Billing", "reasoning": "r"}]}),
+        _reply({"category": "LangGraph", "sub_category": "Deployment", "reasoning": "r"})
+    ]
+    
+    results = fixer.classify_conversations_batch(["first", "second"])
+    
+    assert [result["category"] for result in results] == ["Admin", "LangGraph"]
+    single_prompt = fixer.openai_client.chat.completions.create.call_args.kwargs["messages"][1]["content"]
+    assert "<Conversation>second</Conversation>" in single_prompt
+
+def test_classify_conversations_batch_unparseable_falls_back(fixer):
+    """Test that an unparseable batched reply classifies every case on its own"""
+    fixer.openai_client.chat.completions.create.side_effect = [
+        _reply('{"classifications": [{"id": "0", '),
+        _reply({"category": "Admin", "sub_category": "Billing", "reasoning": "r"}),
+        _reply("not json")
+    ]
+    
+    results = fixer.classify_conversations_batch(["first", "second"])
+    
+    assert results[0]["category"] == "Admin"
+    assert results[1] is None
+    assert fixer.openai_client.chat.completions.create.call_count == 3
+
+def test_classify_conversations_batch_request_error_falls_back(fixer):
+    """Test that a failed batched request classifies every case on its own"""
+    fixer.openai_client.chat.completions.create.side_effect = [
+        Exception("boom"),
+        _reply({"category": "Admin", "sub_category": "Billing", "reasoning": "r"}),
+        _reply({"category": "LangSmith", "sub_category": "Tracing", "reasoning": "r"})
+    ]
+    
+    results = fixer.classify_conversations_batch(["first", "second"])
+    
+    assert [result["category"] for result in results] == ["Admin", "LangSmith"]
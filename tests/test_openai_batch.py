@@ -0,0 +1,46 @@
+import json
+import pytest
+from unittest.mock import patch, MagicMock
+from src.unthread_extractor.openai_batch import run_batch_job, batched_json_schema_format
+
+def _batch(batch_id, status, output_file_id=None):
+    return MagicMock(id=batch_id, status=status, output_file_id=output_file_id)
+
+def _output(*replies):
+    return "\n".join(
+        json.dumps({"custom_id": custom_id, "response": {"body": {"choices": [{"message": {"content": json.dumps(reply)}}]}}})
+        for custom_id, reply in replies
+    )
+
+def test_run_batch_job_submits_all_chunks_before_polling():
+    """Test that every input file is submitted before any job is polled, and replies are keyed by custom_id"""
+    client = MagicMock()
+    client.batches.create.side_effect = [_batch("b1", "validating"), _batch("b2", "in_progress")]
+    client.batches.retrieve.side_effect = lambda batch_id: _batch(batch_id, "completed", f"out-{batch_id}")
+    client.files.content.side_effect = lambda file_id: MagicMock(text={
+        "out-b1": _output(("a", {"resolution": "Bug fix"})),
+        "out-b2": _output(("b", {"resolution": "No Action"})) + '\n{"custom_id": "c", "error": {"message": "failed"}}'
+    }[file_id])
+    
+    with patch('src.unthread_extractor.openai_batch.BATCH_MAX_REQUESTS', 2), \
+         patch('src.unthread_extractor.openai_batch.time.sleep') as mock_sleep:
+        results = run_batch_job(client, {"a": {}, "b": {}, "c": {}}, poll_interval=5)
+    
+    assert client.batches.create.call_count == 2
+    mock_sleep.assert_called_once_with(5)
+    assert results == {"a": {"resolution": "Bug fix"}, "b": {"resolution": "No Action"}}
+
+def test_run_batch_job_failed_batch():
+    """Test that a batch ending without output yields no results"""
+    client = MagicMock()
+    client.batches.create.return_value = _batch("b1", "failed")
+    
+    assert run_batch_job(client, {"a": {}}) == {}
+    client.files.content.assert_not_called()
+
+def test_batched_json_schema_format():
+    """Test that batched replies require an id next to the given properties"""
+    schema = batched_json_schema_format("resolutions", {"resolution": {"type": "string"}})["json_schema"]["schema"]
+    items = schema["properties"]["classifications"]["items"]
+    assert items["required"] == ["id", "resolution"]
+    assert items["additionalProperties"] is False
@@ -0,0 +1,92 @@
+import time
+import threading
+from src.unthread_extractor.ratelimit import TokenBucket, AdaptiveConcurrencyLimit
+
+def test_burst_is_available_immediately():
+    """Test that a full bucket hands out its burst without waiting"""
+    bucket = TokenBucket(rate=1, burst=3)
+    
+    start = time.monotonic()
+    for _ in range(3):
+        bucket.acquire()
+    
+    assert time.monotonic() - start < 0.1
+
+def test_acquire_waits_for_refill():
+    """Test that acquire blocks once the burst is used up"""
+    bucket = TokenBucket(rate=20, burst=1)
+    bucket.acquire()
+    
+    start = time.monotonic()
+    bucket.acquire()
+    
+    assert time.monotonic() - start >= 0.04
+
+def test_block_delays_next_token():
+    """Test that a Retry-After cooldown blocks subsequent acquires"""
+    bucket = TokenBucket(rate=100, burst=5)
+    bucket.block(0.1)
+    
+    start = time.monotonic()
+    bucket.acquire()
+    
+    assert time.monotonic() - start >= 0.09
+
+def test_acquire_is_thread_safe():
+    """Test that concurrent acquires never exceed the available tokens"""
+    bucket = TokenBucket(rate=0.001, burst=5)
+    acquired = []
+    
+    def worker():
+        bucket.acquire()
+        acquired.append(1)
+    
+    threads = [threading.Thread(target=worker, daemon=True) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(timeout=0.2)
+    
+    assert len(acquired) == 5
+
+def test_adaptive_limit_halves_on_throttling_and_recovers():
+    """Test additive increase / multiplicative decrease of the concurrency limit"""
+    limit = AdaptiveConcurrencyLimit(maximum=8)
+    
+    limit.acquire()
+    limit.release(throttled=True)
+    assert limit.limit == 4
+    
+    for _ in range(4):
+        limit.acquire()
+        limit.release()
+    assert limit.limit == 5
+    
+    for _ in range(100):
+        limit.acquire()
+        limit.release()
+    assert limit.limit == 8
+
+def test_adaptive_limit_blocks_at_limit():
+    """Test that acquire waits while limit tasks are running"""
+    limit = AdaptiveConcurrencyLimit(maximum=1)
+    limit.acquire()
+    
+    acquired = threading.Event()
+    thread = threading.Thread(target=lambda: (limit.acquire(), acquired.set()))
+    thread.start()
+    assert not acquired.wait(0.05)
+    
+    limit.release()
+    assert acquired.wait(1)
+    thread.join()
+
+def test_acquire_consumes_multiple_tokens():
+    """Test that a weighted acquire waits until enough tokens have refilled"""
+    bucket = TokenBucket(rate=100, burst=10)
+    bucket.acquire(10)
+    
+    start = time.monotonic()
+    bucket.acquire(5)
+    
+    assert time.monotonic() - start >= 0.04
@@ -0,0 +1,70 @@
+import pytest
+from unittest.mock import patch, MagicMock
+from src.unthread_extractor.reclassify import generate_llm_response_batch, process_conversations_batch, _truncate_content, _token_batches
+from src.unthread_extractor.storage import DuckDBStorage
+
+@pytest.fixture
+def temp_db():
+    """Fixture for temporary database"""
+    storage = DuckDBStorage(":memory:")
+    yield storage
+    storage.close()
+
+@pytest.fixture
+def mock_openai():
+    """Mock OpenAI client fixture, with a whitespace tokenizer standing in for tiktoken"""
+    encoding = MagicMock()
+    encoding.encode.side_effect = str.split
+    encoding.decode.side_effect = " ".join
+    with patch('src.unthread_extractor.reclassify._get_client') as mock_client, \
+         patch('src.unthread_extractor.reclassify._get_encoding', return_value=encoding), \
+         patch('src.unthread_extractor.reclassify._classify_batch') as mock_classify:
+        mock_classify.side_effect = lambda client, prompt, batch_num, batch: [{"resolution": "Bug fix"} for _ in batch]
+        yield mock_classify
+
+def test_generate_llm_response_batch_without_content(temp_db, mock_openai):
+    """Test that conversations with no messages are not sent and get an error result"""
+    conversations = [
+        {"conversation_id": "conv1", "ticket_type": "Support", "message_content": None},
+        {"conversation_id": "conv2", "ticket_type": "Support", "message_content": "hello"},
+        {"conversation_id": "conv3", "ticket_type": "Support", "message_content": "  "}
+    ]
+    
+    results = generate_llm_response_batch(conversations, storage=temp_db)
+    
+    assert results == [{"error": "No message content"}, {"resolution": "Bug fix"}, {"error": "No message content"}]
+    sent = [conv for call in mock_openai.call_args_list for conv in call.args[3]]
+    assert [conv["conversation_id"] for conv in sent] == ["conv2"]
+
+def test_process_conversations_batch_skips_empty_content(temp_db, mock_openai):
+    """Test that conversations with no messages get no classification row"""
+    process_conversations_batch(
+        [
+            {"conversation_id": "conv1", "ticket_type": "Support", "message_content": None},
+            {"conversation_id": "conv2", "ticket_type": "Support", "message_content": "hello"}
+        ],
+        storage=temp_db
+    )
+    
+    rows = temp_db.conn.execute("SELECT conversation_id, resolution FROM conversation_classifications").fetchall()
+    assert rows == [("conv2", "Bug fix")]
+
+def test_truncate_content(mock_openai):
+    """Test keeping the start and end of long content, and tolerating missing content"""
+    assert _truncate_content(None) == ""
+    assert _truncate_content("a b c", max_tokens=4) == "a b c"
+    
+    truncated = _truncate_content("a b c d e f", max_tokens=4)
+    assert "[... 2 tokens omitted ...]" in truncated
+
+def test_token_batches(mock_openai):
+    """Test packing conversations by count and token budget, counting missing content as empty"""
+    conversations = [
+        {"conversation_id": "conv1", "message_content": "a b c"},
+        {"conversation_id": "conv2", "message_content": None},
+        {"conversation_id": "conv3", "message_content": "d e"},
+        {"conversation_id": "conv4", "message_content": "f"}
+    ]
+    
+    batches = _token_batches(conversations, batch_size=3, max_tokens=4)
+    assert [[conv["conversation_id"] for conv in batch] for batch in batches] == [["conv1", "conv2"], ["conv3", "conv4"]]
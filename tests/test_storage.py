@@ -26,6 +26,25 @@ def test_create_tables(temp_db):
     assert "customers" in table_names
     assert "messages" in table_names
 
+def test_schema_migrations_run_once(tmp_path):
+    """Test that a legacy database is migrated once and the version recorded"""
+    import duckdb
+    from src.unthread_extractor.storage import SCHEMA_VERSION
+    db_path = str(tmp_path / "legacy.duckdb")
+    conn = duckdb.connect(db_path)
+    conn.execute("CREATE TABLE conversations (id VARCHAR PRIMARY KEY, data JSON)")
+    conn.execute("INSERT INTO conversations VALUES ('conv1', '{\"status\": \"open\"}')")
+    conn.close()
+    
+    storage = DuckDBStorage(db_path)
+    assert storage.conn.execute("SELECT status FROM conversations").fetchone()[0] == "open"
+    assert storage.conn.execute("SELECT version FROM schema_version").fetchall() == [(SCHEMA_VERSION,)]
+    storage.close()
+    
+    storage = DuckDBStorage(db_path)
+    assert storage.conn.execute("SELECT version FROM schema_version").fetchall() == [(SCHEMA_VERSION,)]
+    storage.close()
+
 def test_store_users(temp_db):
     """Test storing users"""
     test_users = [
@@ -83,6 +102,21 @@ def test_store_conversations(temp_db):
         assert conversation_data["id"] in ["conv1", "conv2"]
         assert conversation_data["title"] in ["Test Conversation 1", "Test Conversation 2"]
 
+def test_store_conversations_filter_columns(temp_db):
+    """Test that filter fields are materialized as columns"""
+    temp_db.store_conversations([
+        {"id": "conv1", "sourceType": "slack", "status": "open", "createdAt": "2024-01-01T00:00:00.000Z"},
+        {"id": "conv2", "title": "No filter fields"}
+    ])
+    
+    rows = temp_db.conn.execute(
+        "SELECT id, source_type, status, created_at FROM conversations ORDER BY id"
+    ).fetchall()
+    assert rows == [
+        ("conv1", "slack", "open", "2024-01-01T00:00:00.000Z"),
+        ("conv2", None, None, None)
+    ]
+
 def test_store_messages(temp_db):
     """Test storing messages"""
     test_messages = [
@@ -102,6 +136,37 @@ def test_store_messages(temp_db):
         assert message_data["id"] in ["msg1", "msg2"]
         assert message_data["content"] in ["Test Message 1", "Test Message 2"]
 
+def test_store_message_reactions(temp_db):
+    """Test recording reactions on Slack messages"""
+    temp_db.store_message_reactions([("C1", "1700000000.000100"), ("C2", "1700000000.000200")], "ticket")
+    # Recording the same reaction again is ignored
+    temp_db.store_message_reactions([("C1", "1700000000.000100")], "ticket")
+    
+    stored = temp_db.conn.execute(
+        "SELECT channel_id, ts, emoji FROM message_reactions ORDER BY channel_id"
+    ).fetchall()
+    assert stored == [
+        ("C1", "1700000000.000100", "ticket"),
+        ("C2", "1700000000.000200", "ticket")
+    ]
+
+def test_store_processed_links(temp_db):
+    """Test bulk storing and reading back processed Slack links"""
+    links = [
+        {"position": 2, "conversation_id": "conv2", "link": "https://slack/2", "title": None, "success": False},
+        {"position": 1, "conversation_id": "conv1", "link": "https://slack/1", "title": "Ticket 1", "success": True}
+    ]
+    
+    temp_db.store_processed_links("run1", links)
+    temp_db.store_processed_links("run2", links[:1])
+    
+    stored = list(temp_db.iter_processed_links("run1", chunk_size=1))
+    assert [link["conversation_id"] for link in stored] == ["conv1", "conv2"]
+    assert stored[0]["title"] == "Ticket 1"
+    assert stored[0]["success"] is True
+    assert stored[1]["title"] is None
+    assert stored[1]["success"] is False
+
 def test_upsert_behavior(temp_db):
     """Test that storing the same ID updates the record"""
     # Store initial data
@@ -118,15 +183,176 @@ def test_upsert_behavior(temp_db):
     user_data = json.loads(stored_users[0][1])
     assert user_data["name"] == "Updated Name"
 
-def test_file_storage():
+def test_upsert_duplicates_in_one_batch(temp_db):
+    """Test that a batch containing the same ID twice keeps the last copy"""
+    temp_db.store_messages([
+        {"id": "msg1", "text": "First"},
+        {"id": "msg1", "text": "Second"}
+    ])
+    temp_db.store_messages([])
+    
+    stored_messages = temp_db.conn.execute("SELECT * FROM messages").fetchall()
+    assert len(stored_messages) == 1
+    assert json.loads(stored_messages[0][1])["text"] == "Second"
+
+def test_for_thread(temp_db):
+    """Test that each thread gets its own cursor on the same database"""
+    from concurrent.futures import ThreadPoolExecutor
+    
+    assert temp_db.for_thread() is temp_db.for_thread()
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        worker_storage = executor.submit(temp_db.for_thread).result()
+    assert worker_storage is not temp_db.for_thread()
+    
+    worker_storage.store_users([{"id": "user1", "name": "Test User 1"}])
+    assert temp_db.conn.execute("SELECT count(*) FROM users").fetchone()[0] == 1
+
+def test_release_thread(temp_db):
+    """Test that a finished thread's cursor is closed and forgotten"""
+    import threading
+    
+    def worker():
+        temp_db.for_thread().store_users([{"id": "user1", "name": "Test User 1"}])
+        temp_db.release_thread()
+        temp_db.release_thread()
+    
+    thread = threading.Thread(target=worker)
+    thread.start()
+    thread.join()
+    assert temp_db._thread_storages == []
+    assert temp_db.conn.execute("SELECT count(*) FROM users").fetchone()[0] == 1
+
+def test_get_conversation_updated_at(temp_db):
+    """Test looking up the stored updatedAt of conversations"""
+    temp_db.store_conversations([
+        {"id": "conv1", "updatedAt": "2024-03-01T00:00:00Z"},
+        {"id": "conv2"}
+    ])
+    
+    assert temp_db.get_conversation_updated_at(["conv1", "conv2", "conv3"]) == {
+        "conv1": "2024-03-01T00:00:00Z",
+        "conv2": None
+    }
+    assert temp_db.get_conversation_updated_at([]) == {}
+
+def test_bq_category_cache(temp_db):
+    """Test caching BigQuery category lookups"""
+    temp_db.store_bq_categories({
+        "conv1": {"ticket_category": "Admin", "ticket_sub_category": "Billing", "ticket_resolution": None}
+    })
+    temp_db.store_bq_categories({
+        "conv1": {"ticket_category": "Admin", "ticket_sub_category": "Security", "ticket_resolution": "Fixed"}
+    })
+    
+    assert temp_db.get_cached_bq_categories(["conv1", "conv2"]) == {
+        "conv1": {"ticket_category": "Admin", "ticket_sub_category": "Security", "ticket_resolution": "Fixed"}
+    }
+    
+    temp_db.conn.execute("UPDATE bq_category_cache SET fetched_at = fetched_at - INTERVAL 2 HOUR")
+    assert temp_db.get_cached_bq_categories(["conv1"], max_age_hours=1) == {}
+    assert "conv1" in temp_db.get_cached_bq_categories(["conv1"], max_age_hours=3)
+
+def test_ai_classification_cache(temp_db):
+    """Test caching AI classifications per content hash and model"""
+    temp_db.store_ai_classifications({"hash1": {"category": "Admin", "sub_category": "Billing", "reasoning": "x"}}, "gpt-4o")
+    
+    assert temp_db.get_cached_ai_classifications(["hash1", "hash2"], "gpt-4o") == {
+        "hash1": {"category": "Admin", "sub_category": "Billing"}
+    }
+    assert temp_db.get_cached_ai_classifications(["hash1"], "other-model") == {}
+
+def test_get_conversations(temp_db):
+    """Test reading unclassified conversations with their joined message text"""
+    temp_db.store_conversations([{"id": "conv1", "ticketType": {"name": "Support"}, "createdAt": "2024-01-01T00:00:00.000Z"}])
+    temp_db.store_messages([
+        {"id": "msg1", "conversationId": "conv1", "text": "hello", "timestamp": "1"},
+        {"id": "msg2", "conversationId": "conv1", "text": "bye", "timestamp": "2"}
+    ])
+    
+    conversations = temp_db.get_conversations()
+    assert len(conversations) == 1
+    assert conversations[0]["conversation_id"] == "conv1"
+    assert conversations[0]["ticket_type"] == "Support"
+    assert conversations[0]["message_content"].startswith("hello")
+    assert conversations[0]["message_content"].endswith("bye")
+
+def test_get_conversations_without_messages(temp_db):
+    """Test that a conversation with no messages comes back with no message content"""
+    temp_db.store_conversations([{"id": "conv1", "ticketType": {"name": "Support"}, "createdAt": "2024-01-01T00:00:00.000Z"}])
+    
+    conversations = temp_db.get_conversations()
+    assert len(conversations) == 1
+    assert conversations[0]["message_content"] is None
+
+def test_llm_response_cache(temp_db):
+    """Test caching reclassification responses without overwriting earlier ones"""
+    temp_db.store_llm_responses({"hash1": {"resolution": "Bug fix"}}, "gpt-4o")
+    temp_db.store_llm_responses({"hash1": {"resolution": "No Action"}}, "gpt-4o")
+    
+    assert temp_db.get_cached_llm_responses(["hash1", "hash2"], "gpt-4o") == {"hash1": {"resolution": "Bug fix"}}
+    assert temp_db.get_cached_llm_responses(["hash1"], "other-model") == {}
+
+def test_category_fix_progress(temp_db):
+    """Test recording category fix outcomes for resumable runs"""
+    temp_db.store_category_fix_progress([("conv1", "failed", "ai"), ("conv2", "updated", "bigquery")])
+    temp_db.store_category_fix_progress([("conv1", "updated", "ai")])
+    
+    assert temp_db.get_fixed_conversation_ids(["conv1", "conv2", "conv3"]) == {"conv1", "conv2"}
+    assert temp_db.get_fixed_conversation_ids([]) == set()
+
+def test_save_classifications_upsert(temp_db):
+    """Test that saving classifications keeps existing values where new ones are null"""
+    temp_db.save_classifications(
+        [{"conversation_id": "conv1"}, {"conversation_id": "conv2"}],
+        [{"category": "Admin", "sub_category": "Billing", "reasoning": "r"}, {"error": "failed"}]
+    )
+    temp_db.save_classifications(
+        [{"conversation_id": "conv1"}, {"conversation_id": "conv1"}],
+        [{"resolution": "Fixed"}, {"category": "LangSmith"}]
+    )
+    
+    rows = temp_db.conn.execute("""
+        SELECT conversation_id, category, sub_category, reasoning, resolution
+        FROM conversation_classifications ORDER BY conversation_id
+    """).fetchall()
+    assert rows == [
+        ("conv1", "LangSmith", "Billing", "r", "Fixed"),
+        ("conv2", "Error", "Error", "{'error': 'failed'}", "Error")
+    ]
+
+def test_file_storage(tmp_path):
     """Test storage with actual file"""
-    db_path = "test_data/test.db"
-    try:
-        storage = DuckDBStorage(db_path)
-        assert os.path.exists(db_path)
-        storage.close()
-    finally:
-        if os.path.exists(db_path):
-            os.remove(db_path)
-        if os.path.exists("test_data"):
-            os.rmdir("test_data") 
\ No newline at end of file
+    db_path = str(tmp_path / "test_data" / "test.db")
+    storage = DuckDBStorage(db_path)
+    assert os.path.exists(db_path)
+    storage.close()
+
+def test_attach_read_only(temp_db, tmp_path):
+    """Test querying another database file in place via ATTACH"""
+    source_path = str(tmp_path / "source.db")
+    source = DuckDBStorage(source_path)
+    source.store_conversations([{"id": "conv1", "sourceType": "slack"}])
+    source.close()
+    
+    temp_db.attach(source_path, "src")
+    
+    assert temp_db.conn.execute("SELECT id, source_type FROM src.conversations").fetchall() == [("conv1", "slack")]
+    with pytest.raises(Exception):
+        temp_db.conn.execute("DELETE FROM src.conversations")
+    with pytest.raises(ValueError):
+        temp_db.attach(source_path, "src; DROP TABLE users")
+
+def test_mark_conversations_updated(temp_db):
+    """Test marking several classifications as updated at once"""
+    temp_db.save_classifications(
+        [{"conversation_id": "conv1"}, {"conversation_id": "conv2"}, {"conversation_id": "conv3"}],
+        [{"category": "Admin"}, {"category": "Admin"}, {"category": "Admin"}]
+    )
+    assert sorted(temp_db.mark_conversations_updated(["conv1", "conv3"])) == ["conv1", "conv3"]
+    assert temp_db.mark_conversations_updated(["conv1", "conv2"]) == ["conv2"]
+    
+    rows = temp_db.conn.execute("""
+        SELECT conversation_id FROM conversation_classifications
+        WHERE updated_time IS NOT NULL ORDER BY conversation_id
+    """).fetchall()
+    assert rows == [("conv1",), ("conv2",), ("conv3",)]
@@ -0,0 +1,37 @@
+import pytest
+from unittest.mock import MagicMock
+from src.unthread_extractor.storage import DuckDBStorage
+from src.unthread_extractor.updater import UnthreadUpdater
+
+@pytest.fixture
+def temp_db():
+    """Fixture for temporary database"""
+    storage = DuckDBStorage(":memory:")
+    yield storage
+    storage.close()
+
+def test_update_all_conversations_marks_only_successes(temp_db):
+    """Test that only conversations whose PATCH succeeded are marked as updated"""
+    temp_db.save_classifications(
+        [{"conversation_id": "conv1"}, {"conversation_id": "conv2"}, {"conversation_id": "conv3"}],
+        [{"category": "Admin", "sub_category": "Billing", "resolution": "Bug fix"} for _ in range(3)]
+    )
+    api = MagicMock()
+    
+    def make_api_request(endpoint, method, data):
+        if endpoint == "/conversations/conv2":
+            raise Exception("API error")
+        return {}, None, False
+    api.make_api_request.side_effect = make_api_request
+    
+    updater = UnthreadUpdater(api, temp_db, batch_size=2, max_workers=2)
+    results = updater.update_all_conversations()
+    
+    assert results == {'success': 2, 'failure': 1, 'total_processed': 3}
+    assert [c["conversation_id"] for c in temp_db.get_classifications_for_update()] == ["conv2"]
+    assert api.make_api_request.call_count == 3
+
+def test_update_all_conversations_nothing_to_update(temp_db):
+    """Test the result when no classification needs updating"""
+    updater = UnthreadUpdater(MagicMock(), temp_db)
+    assert updater.update_all_conversations() == {'success': 0, 'failure': 0}